@@ -21,6 +21,7 @@ build_exe_options = {
         "email", 
         "requests", 
         "plyer", 
+        "numpy",
         "twilio"
     ],
     "include_files": [
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+
+from armazenamento import ColunasPorSlot
+
+
+class DetectorAnomalias(ColunasPorSlot):
+    """Detecta latência degradada em todos os hosts de uma vez, com EWMA e z-score vetorizados.
+
+    Cada host ocupa uma posição (slot) em arrays NumPy. Os threads de monitoramento só
+    acumulam as amostras do host em um buffer; a avaliação periódica aplica todas as amostras
+    recebidas desde a anterior, em ordem, com operações vetorizadas sobre todos os slots
+    (um passo por amostra pendente, sem laços Python por host).
+    """
+    def __init__(self, alfa=0.1, limiar_z=4.0, ciclos_minimos=3, amostras_aquecimento=20,
+                 desvio_minimo=1.0, capacidade=1024, amostras_pendentes=32):
+        self.alfa = alfa  # Peso de cada nova amostra na linha de base
+        self.limiar_z = limiar_z
+        self.ciclos_minimos = ciclos_minimos  # Amostras anômalas seguidas para alertar
+        self.amostras_aquecimento = amostras_aquecimento  # Amostras antes de avaliar o host
+        self.desvio_minimo = desvio_minimo  # Piso do desvio (ms), evita alertas em hosts muito estáveis
+        # Amostras guardadas por host entre avaliações; além disso ficam apenas as mais recentes
+        self.amostras_pendentes = amostras_pendentes
+        self.ultima_duracao_ms = 0.0
+        self.colunas = {
+            'pendentes': (np.nan, np.float64, (amostras_pendentes,)),  # Buffer circular de amostras
+            'recebidas': (0, np.int64, ()),  # Amostras gravadas no buffer desde a última avaliação
+            'amostra': (np.nan, np.float64, ()),  # Última amostra avaliada
+            'media': (0.0, np.float64, ()),
+            'variancia': (0.0, np.float64, ()),
+            'contagem': (0, np.int64, ()),
+            'consecutivos': (0, np.int64, ()),
+            'degradado': (False, np.bool_, ()),
+        }
+        super().__init__(capacidade)
+
+    def registrar(self, host, ping):
+        """Acumula uma amostra do host para a próxima avaliação (None para falha, que é ignorada)"""
+        if ping is None:
+            return  # Falhas não têm latência; a perda é tratada pelos alertas de status
+        with self.lock:
+            slot = self._slot(host)
+            self.pendentes[slot, self.recebidas[slot] % self.amostras_pendentes] = ping
+            self.recebidas[slot] += 1
+
+    def linha_de_base(self, host):
+        """Retorna (média, desvio) da latência normal do host"""
+        with self.lock:
+            slot = self.slots.get(host)
+            if slot is None:
+                return None, None
+            return float(self.media[slot]), float(np.sqrt(self.variancia[slot]))
+
+    def avaliar(self):
+        """Avalia as amostras recebidas por todos os hosts desde a última avaliação.
+
+        Retorna (degradados, recuperados): listas de (host, amostra, média, desvio) dos
+        hosts que acabaram de entrar ou sair do estado de latência degradada.
+        """
+        inicio = time.perf_counter()
+        with self.lock:
+            indices = np.flatnonzero(self.recebidas)
+            recebidas = self.recebidas[indices]
+            self.recebidas[indices] = 0
+            quantidade = np.minimum(recebidas, self.amostras_pendentes)
+            primeira_posicao = (recebidas - quantidade) % self.amostras_pendentes  # A mais antiga
+            pendentes = self.pendentes[indices]
+            linhas = np.arange(len(indices))
+
+            media = self.media[indices]
+            variancia = self.variancia[indices]
+            contagem = self.contagem[indices]
+            consecutivos = self.consecutivos[indices]
+            degradado_antes = self.degradado[indices]
+            degradado = degradado_antes.copy()
+            ultima = self.amostra[indices]
+
+            # Um passo vetorizado por amostra pendente, aplicando-as na ordem em que chegaram
+            for passo in range(int(quantidade.max(initial=0))):
+                ativo = quantidade > passo
+                amostra = pendentes[linhas, (primeira_posicao + passo) % self.amostras_pendentes]
+                desvio = np.maximum(np.sqrt(variancia), self.desvio_minimo)
+                z = (amostra - media) / desvio
+
+                # Só latência acima do normal é anomalia
+                anomalo = ativo & (contagem >= self.amostras_aquecimento) & (z > self.limiar_z)
+                consecutivos = np.where(ativo, np.where(anomalo, consecutivos + 1, 0), consecutivos)
+
+                # Amostras anômalas movem a média com peso menor e não alteram a variância: uma
+                # mudança permanente de rota é absorvida aos poucos, sem que a degradação vire o normal
+                alfa = np.where(anomalo, self.alfa / 10, self.alfa)
+                primeira = contagem == 0
+                diferenca = amostra - media
+                incremento = alfa * diferenca
+                nova_media = np.where(primeira, amostra, media + incremento)
+                nova_variancia = np.where(
+                    primeira, 0.0, np.where(anomalo, variancia, (1 - alfa) * (variancia + diferenca * incremento))
+                )
+                media = np.where(ativo, nova_media, media)
+                variancia = np.where(ativo, nova_variancia, variancia)
+                contagem = contagem + ativo
+                ultima = np.where(ativo, amostra, ultima)
+
+                degradado = np.where(ativo & (consecutivos >= self.ciclos_minimos), True, degradado)
+                degradado = np.where(ativo & (consecutivos == 0), False, degradado)
+
+            self.media[indices] = media
+            self.variancia[indices] = variancia
+            self.contagem[indices] = contagem
+            self.consecutivos[indices] = consecutivos
+            self.amostra[indices] = ultima
+            self.degradado[indices] = degradado
+
+            entrou = indices[degradado & ~degradado_antes]
+            saiu = indices[~degradado & degradado_antes]
+
+            # Laço Python apenas nos poucos hosts que mudaram de estado
+            degradados = [
+                (self.hosts[i], float(self.amostra[i]), float(self.media[i]), float(np.sqrt(self.variancia[i])))
+                for i in entrou
+            ]
+            recuperados = [
+                (self.hosts[i], float(self.amostra[i]), float(self.media[i]), float(np.sqrt(self.variancia[i])))
+                for i in saiu
+            ]
+        self.ultima_duracao_ms = (time.perf_counter() - inicio) * 1000
+        return degradados, recuperados
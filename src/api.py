@@ -0,0 +1,160 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import json
+import threading
+
+
+class _ManipuladorAPI(BaseHTTPRequestHandler):
+    """Atende as rotas da API de estatísticas"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, formato, *args):
+        """Silencia o log de acesso padrão no console"""
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        parametros = parse_qs(partes.query)
+        if partes.path == '/estatisticas':
+            self._responder_estatisticas(parametros)
+        elif partes.path == '/eventos':
+            self._transmitir_eventos(parametros)
+        elif partes.path == '/frota':
+            self._responder_frota()
+        elif partes.path == '/top':
+            self._responder_top(parametros)
+        elif partes.path == '/notificacoes':
+            self._responder_notificacoes()
+        elif partes.path == '/caminho':
+            self._responder_caminho(parametros)
+        else:
+            self._enviar_json(404, {'erro': 'Rota não encontrada'})
+
+    def _enviar_json(self, codigo, dados):
+        """Envia uma resposta JSON completa"""
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _responder_estatisticas(self, parametros):
+        """GET /estatisticas[?desde=versão]: estado completo ou apenas o que mudou desde a versão"""
+        try:
+            desde = int(parametros.get('desde', ['0'])[0])
+        except ValueError:
+            self._enviar_json(400, {'erro': 'Parâmetro desde inválido'})
+            return
+        versao, alterados, removidos, completo = self.server.monitor.obter_alteracoes(desde)
+        self._enviar_json(200, {
+            'versao': versao, 'completo': completo, 'hosts': alterados, 'removidos': removidos
+        })
+
+    def _responder_frota(self):
+        """GET /frota: agregados de toda a frota e por grupo"""
+        resumo = self.server.monitor.obter_resumo_frota()
+        if resumo is None:
+            self._enviar_json(503, {'erro': 'Armazenamento colunar indisponível (requer NumPy)'})
+            return
+        self._enviar_json(200, resumo)
+
+    def _responder_top(self, parametros):
+        """GET /top[?metrica=p95&n=20]: os piores hosts pela métrica da janela recente"""
+        monitor = self.server.monitor
+        if not monitor.armazenamento:
+            self._enviar_json(503, {'erro': 'Armazenamento colunar indisponível (requer NumPy)'})
+            return
+        metrica = parametros.get('metrica', ['p95'])[0]
+        try:
+            quantidade = int(parametros.get('n', ['20'])[0])
+            hosts = monitor.obter_estatisticas(top=quantidade, metrica=metrica)
+        except ValueError:
+            self._enviar_json(400, {'erro': 'Parâmetros metrica ou n inválidos'})
+            return
+        self._enviar_json(200, {'metrica': metrica, 'hosts': [
+            {'host': host, **stats} for host, stats in hosts.items()
+        ]})
+
+    def _responder_notificacoes(self):
+        """GET /notificacoes: métricas da caixa de saída de notificações"""
+        caixa_saida = self.server.monitor.caixa_saida
+        if caixa_saida is None:
+            self._enviar_json(503, {'erro': 'Caixa de saída de notificações desativada'})
+            return
+        self._enviar_json(200, caixa_saida.obter_metricas())
+
+    def _responder_caminho(self, parametros):
+        """GET /caminho?host=<host>: saltos até o host com perda e latência de cada um"""
+        host = parametros.get('host', [None])[0]
+        monitor = self.server.monitor
+        if host not in monitor.hosts:
+            self._enviar_json(404, {'erro': 'Host não monitorado'})
+            return
+        self._enviar_json(200, {'host': host, 'saltos': monitor.obter_caminho(host)})
+
+    def _transmitir_eventos(self, parametros):
+        """GET /eventos: Server-Sent Events com o estado inicial e, a cada intervalo, só os hosts alterados"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            desde = int(parametros.get('desde', ['0'])[0])
+        except ValueError:
+            desde = 0
+        api = self.server.api
+        try:
+            while not api.evento_parada.is_set():
+                versao, alterados, removidos, completo = api.monitor.obter_alteracoes(desde)
+                if completo or alterados or removidos:
+                    dados = json.dumps({
+                        'versao': versao, 'hosts': alterados, 'removidos': removidos
+                    }, ensure_ascii=False)
+                    evento = 'completo' if completo else 'delta'
+                    self.wfile.write(f"id: {versao}\nevent: {evento}\ndata: {dados}\n\n".encode('utf-8'))
+                    desde = versao
+                else:
+                    # Comentário SSE para manter a conexão viva e detectar clientes desconectados
+                    self.wfile.write(b": sem alteracoes\n\n")
+                self.wfile.flush()
+                api.evento_parada.wait(api.intervalo_eventos)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class ServidorAPI:
+    """API HTTP/JSON local com as estatísticas ao vivo do monitor"""
+    def __init__(self, monitor, endereco='127.0.0.1', porta=8765, intervalo_eventos=1):
+        self.monitor = monitor
+        self.endereco = endereco
+        self.porta = porta
+        self.intervalo_eventos = intervalo_eventos  # Segundos entre envios no fluxo de eventos
+        self.evento_parada = threading.Event()
+        self.servidor = None
+        self.thread = None
+
+    def iniciar(self):
+        """Inicia o servidor HTTP em um thread dedicado"""
+        self.evento_parada.clear()
+        self.servidor = ThreadingHTTPServer((self.endereco, self.porta), _ManipuladorAPI)
+        self.servidor.daemon_threads = True
+        self.servidor.monitor = self.monitor
+        self.servidor.api = self
+        self.porta = self.servidor.server_address[1]
+        # Intervalo curto de verificação para que parar() não espere o padrão de 0,5s
+        self.thread = threading.Thread(target=self.servidor.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def parar(self):
+        """Para o servidor e encerra os fluxos de eventos abertos"""
+        self.evento_parada.set()
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.thread = None
@@ -0,0 +1,226 @@
+import threading
+
+import numpy as np
+
+# Códigos do vetor de status por host
+STATUS_INICIANDO = 0
+STATUS_SUCESSO = 1
+STATUS_FALHA = 2
+
+# Métricas por host calculadas pelo ArmazenamentoColunar
+METRICAS = ('media', 'minimo', 'maximo', 'p95', 'perda')
+
+
+class ColunasPorSlot:
+    """Arrays NumPy indexados por slot de host, com alocação e reaproveitamento de slots.
+
+    As subclasses definem `self.colunas` (nome -> (valor inicial, dtype, dimensões extras))
+    antes de chamar este construtor. Cada host recebe um slot (linha) em todos os arrays.
+    """
+    def __init__(self, capacidade):
+        self.lock = threading.Lock()
+        self.slots = {}  # host -> slot
+        self.hosts = []  # slot -> host (None se livre)
+        self.livres = []
+        self._alocar(capacidade)
+
+    def _alocar(self, capacidade):
+        """Cria ou amplia os arrays para a capacidade informada"""
+        atual = len(self.hosts)
+        extra = capacidade - atual
+        for nome, (valor, tipo, dimensoes) in self.colunas.items():
+            novo = np.full((extra,) + dimensoes, valor, dtype=tipo)
+            antigo = getattr(self, nome, None)
+            setattr(self, nome, novo if antigo is None else np.concatenate([antigo, novo]))
+        self.hosts.extend([None] * extra)
+        self.livres.extend(range(capacidade - 1, atual - 1, -1))
+
+    def _slot(self, host):
+        """Retorna o slot do host, alocando um novo se necessário. Chamar com o lock."""
+        slot = self.slots.get(host)
+        if slot is None:
+            if not self.livres:
+                self._alocar(max(1, len(self.hosts)) * 2)
+            slot = self.livres.pop()
+            self.slots[host] = slot
+            self.hosts[slot] = host
+        return slot
+
+    def remover(self, host):
+        """Libera o slot de um host que deixou de ser monitorado"""
+        with self.lock:
+            slot = self.slots.pop(host, None)
+            if slot is None:
+                return
+            for nome, (valor, _, _) in self.colunas.items():
+                getattr(self, nome)[slot] = valor
+            self.hosts[slot] = None
+            self.livres.append(slot)
+
+    def exportar(self, hosts=None):
+        """Retorna (hosts, {coluna: array}) com as linhas dos hosts informados (ou de todos)"""
+        with self.lock:
+            if hosts is None:
+                slots, hosts = self.slots_ativos()
+            else:
+                hosts = [h for h in hosts if h in self.slots]
+                slots = np.array([self.slots[h] for h in hosts], dtype=np.int64)
+            return hosts, {nome: getattr(self, nome)[slots] for nome in self.colunas}
+
+    def restaurar(self, hosts, colunas, permitidos=None):
+        """Restaura linhas exportadas por `exportar`, apenas dos hosts em `permitidos` (se informado)"""
+        with self.lock:
+            for i, host in enumerate(hosts):
+                if permitidos is not None and host not in permitidos:
+                    continue
+                slot = self._slot(host)
+                for nome, valores in colunas.items():
+                    # Ignora colunas de outro formato (ex: janela alterada entre execuções)
+                    if nome in self.colunas and valores.shape[1:] == getattr(self, nome).shape[1:]:
+                        getattr(self, nome)[slot] = valores[i]
+
+    def slots_ativos(self):
+        """Retorna (array de slots, lista de hosts) dos hosts registrados. Chamar com o lock."""
+        hosts = list(self.slots)
+        return np.fromiter((self.slots[h] for h in hosts), dtype=np.int64, count=len(hosts)), hosts
+
+
+class ArmazenamentoColunar(ColunasPorSlot):
+    """Armazenamento em memória das últimas latências de toda a frota, em formato colunar.
+
+    As latências ficam em um array 2D pré-alocado (slot do host × janela) usado como
+    buffer circular, com vetores de status e contadores por host. Agregados da frota,
+    ordenações e agrupamentos são calculados com operações vetorizadas.
+    """
+    def __init__(self, janela=120, capacidade=1024):
+        self.janela = janela  # Amostras mantidas por host
+        self.colunas = {
+            'rtt': (np.nan, np.float32, (janela,)),  # NaN = falha ou posição ainda vazia
+            # Pacotes de cada ciclo da janela: a perda é sempre em pacotes, com ou sem rajadas
+            'enviados_janela': (0, np.int32, (janela,)),
+            'recebidos_janela': (0, np.int32, (janela,)),
+            'posicao': (0, np.int64, ()),  # Próxima posição do buffer circular
+            'preenchidos': (0, np.int64, ()),  # Amostras gravadas (até `janela`)
+            'status': (STATUS_INICIANDO, np.int8, ()),
+            'enviados': (0, np.int64, ()),
+            'recebidos': (0, np.int64, ()),
+        }
+        super().__init__(capacidade)
+
+    def registrar(self, host, ping, sucesso, enviados=1, recebidos=None):
+        """Grava um resultado do host (ping None em falha)"""
+        if recebidos is None:
+            recebidos = 1 if ping is not None else 0
+        with self.lock:
+            slot = self._slot(host)
+            self.rtt[slot, self.posicao[slot]] = np.nan if ping is None else ping
+            self.enviados_janela[slot, self.posicao[slot]] = enviados
+            self.recebidos_janela[slot, self.posicao[slot]] = recebidos
+            self.posicao[slot] = (self.posicao[slot] + 1) % self.janela
+            self.preenchidos[slot] = min(self.preenchidos[slot] + 1, self.janela)
+            self.status[slot] = STATUS_SUCESSO if sucesso else STATUS_FALHA
+            self.enviados[slot] += enviados
+            self.recebidos[slot] += recebidos
+
+    def _calcular(self, slots):
+        """Calcula as métricas da janela de cada slot informado. Chamar com o lock."""
+        rtt = self.rtt[slots]
+        validos = ~np.isnan(rtt)
+        quantidade = validos.sum(axis=1)
+        preenchidos = self.preenchidos[slots]
+        com_dados = quantidade > 0
+
+        # Médias e extremos ignorando NaN, sem avisos para hosts sem nenhuma resposta
+        soma = np.where(validos, rtt, 0).sum(axis=1, dtype=np.float64)
+        media = np.divide(soma, quantidade, out=np.full(len(slots), np.nan), where=com_dados)
+        minimo = np.where(com_dados, np.where(validos, rtt, np.inf).min(axis=1), np.nan)
+        maximo = np.where(com_dados, np.where(validos, rtt, -np.inf).max(axis=1), np.nan)
+
+        # Percentil 95: ordena cada linha (NaN vai para o fim) e indexa pela quantidade válida
+        ordenado = np.sort(rtt, axis=1)
+        indice = np.floor(0.95 * np.maximum(quantidade - 1, 0)).astype(np.int64)
+        p95 = np.where(com_dados, np.take_along_axis(ordenado, indice[:, None], axis=1)[:, 0], np.nan)
+
+        # Perda na janela em pacotes, a mesma unidade da perda geral da frota
+        enviados = self.enviados_janela[slots].sum(axis=1, dtype=np.int64)
+        perdidos = enviados - self.recebidos_janela[slots].sum(axis=1, dtype=np.int64)
+        perda = np.divide(100.0 * perdidos, enviados, out=np.zeros(len(slots)), where=enviados > 0)
+        return {'media': media, 'minimo': minimo, 'maximo': maximo, 'p95': p95, 'perda': perda}
+
+    def calcular_agregados(self, hosts=None):
+        """Retorna {host: {métrica: valor}} calculado para a janela de cada host"""
+        with self.lock:
+            if hosts is None:
+                slots, hosts = self.slots_ativos()
+            else:
+                hosts = [h for h in hosts if h in self.slots]
+                slots = np.array([self.slots[h] for h in hosts], dtype=np.int64)
+            metricas = self._calcular(slots)
+        return {
+            host: {nome: _valor(metricas[nome][i]) for nome in METRICAS}
+            for i, host in enumerate(hosts)
+        }
+
+    def top_n(self, metrica='p95', n=20, maiores=True):
+        """Retorna os n hosts com os maiores (ou menores) valores da métrica, com seus valores"""
+        if metrica not in METRICAS:
+            raise ValueError(f"Métrica desconhecida: {metrica}")
+        with self.lock:
+            slots, hosts = self.slots_ativos()
+            if not hosts or n <= 0:
+                return []
+            valores = self._calcular(slots)[metrica]
+        # Hosts sem dados ficam sempre no fim da ordenação
+        chave = np.where(np.isnan(valores), -np.inf if maiores else np.inf, valores)
+        if maiores:
+            chave = -chave
+        n = min(n, len(hosts))
+        escolhidos = np.argpartition(chave, n - 1)[:n]
+        escolhidos = escolhidos[np.argsort(chave[escolhidos], kind='stable')]
+        return [(hosts[i], _valor(valores[i])) for i in escolhidos]
+
+    def resumo_frota(self):
+        """Retorna agregados de toda a frota (perda geral, latência média e p95, hosts em falha)"""
+        with self.lock:
+            slots, hosts = self.slots_ativos()
+            if not hosts:
+                return {'hosts': 0, 'em_falha': 0, 'perda_geral': 0.0, 'media_ping': None, 'p95_medio': None}
+            metricas = self._calcular(slots)
+            enviados = int(self.enviados[slots].sum())
+            recebidos = int(self.recebidos[slots].sum())
+            em_falha = int((self.status[slots] == STATUS_FALHA).sum())
+        return {
+            'hosts': len(hosts),
+            'em_falha': em_falha,
+            'perda_geral': round(100.0 * (enviados - recebidos) / enviados, 2) if enviados else 0.0,
+            'media_ping': _valor(np.nanmean(metricas['media'])) if np.any(~np.isnan(metricas['media'])) else None,
+            'p95_medio': _valor(np.nanmean(metricas['p95'])) if np.any(~np.isnan(metricas['p95'])) else None,
+        }
+
+    def agregados_por_grupo(self, grupos):
+        """Retorna, por grupo, a quantidade de hosts, latência média, p95 médio e perda média.
+
+        `grupos` é um dicionário grupo -> hosts. O laço é por grupo; as métricas dos
+        hosts são calculadas uma única vez e indexadas de forma vetorizada.
+        """
+        with self.lock:
+            slots, hosts = self.slots_ativos()
+            metricas = self._calcular(slots)
+        posicao = {host: i for i, host in enumerate(hosts)}
+
+        resultado = {}
+        for grupo, membros in grupos.items():
+            indices = np.array([posicao[h] for h in membros if h in posicao], dtype=np.int64)
+            if not len(indices):
+                continue
+            resultado[grupo] = {'hosts': len(indices)}
+            for nome in ('media', 'p95', 'perda'):
+                valores = metricas[nome][indices]
+                resultado[grupo][nome] = _valor(np.nanmean(valores)) if np.any(~np.isnan(valores)) else None
+        return resultado
+
+
+def _valor(numero):
+    """Converte um escalar NumPy em float Python arredondado (None para NaN)"""
+    numero = float(numero)
+    return None if np.isnan(numero) else round(numero, 3)
@@ -0,0 +1,95 @@
+"""Benchmark de inicialização a frio do monitor.
+
+Mede, em processos novos, o tempo para importar o programa e montar os notificadores
+ativos, a memória alocada (tracemalloc) e o RSS ao final, e lista os módulos mais
+lentos de importar (python -X importtime).
+
+Uso: python src/benchmark_inicializacao.py --repeticoes 10 --tipos desktop,email
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DIRETORIO_SRC = os.path.dirname(os.path.abspath(__file__))
+
+# Executado em um processo novo para medir a inicialização a frio
+CODIGO_MEDICAO = """
+import json, sys, time, tracemalloc
+inicio = time.perf_counter()
+tracemalloc.start()
+sys.path.insert(0, {src!r})
+import main
+from notificação import configurar_notificacoes
+configurar_notificacoes({{'tipos_notificacao': {tipos!r}}})
+tempo_ms = (time.perf_counter() - inicio) * 1000
+memoria_kb = tracemalloc.get_traced_memory()[0] / 1024
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb /= 1024
+except ImportError:
+    rss_kb = None
+print(json.dumps({{'tempo_ms': tempo_ms, 'memoria_kb': memoria_kb, 'rss_kb': rss_kb,
+                  'modulos': sorted(m for m in ('plyer', 'requests', 'twilio', 'smtplib') if m in sys.modules)}}))
+"""
+
+
+def medir(tipos):
+    """Executa uma inicialização a frio e retorna as medições"""
+    codigo = CODIGO_MEDICAO.format(src=DIRETORIO_SRC, tipos=tipos)
+    saida = subprocess.check_output([sys.executable, '-c', codigo], cwd=DIRETORIO_SRC, text=True)
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def modulos_mais_lentos(tipos, quantidade):
+    """Retorna os módulos com maior tempo acumulado de importação"""
+    codigo = CODIGO_MEDICAO.format(src=DIRETORIO_SRC, tipos=tipos)
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=DIRETORIO_SRC, capture_output=True, text=True
+    )
+    tempos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        # Formato: "import time: <próprio> | <acumulado> | <módulo>"
+        _, acumulado, modulo = linha[len('import time:'):].split('|')
+        tempos.append((int(acumulado), modulo.rstrip()))
+    return sorted(tempos, reverse=True)[:quantidade]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do Monitor de Ping")
+    parser.add_argument('--repeticoes', type=int, default=10, help="Quantidade de inicializações medidas")
+    parser.add_argument('--tipos', default='desktop', help="Tipos de notificação ativos, separados por vírgula")
+    parser.add_argument('--top', type=int, default=10, help="Quantidade de módulos mais lentos exibidos")
+    parser.add_argument('--maximo-ms', type=float, help="Falha se a mediana ultrapassar este tempo")
+    args = parser.parse_args()
+
+    tipos = [tipo.strip() for tipo in args.tipos.split(',') if tipo.strip()]
+    medicoes = [medir(tipos) for _ in range(args.repeticoes)]
+    tempos = [m['tempo_ms'] for m in medicoes]
+    mediana = statistics.median(tempos)
+
+    print(f"Tipos de notificação ativos: {', '.join(tipos) or 'nenhum'}")
+    print(f"Tempo de inicialização: mediana {mediana:.1f}ms - mín {min(tempos):.1f}ms - máx {max(tempos):.1f}ms")
+    print(f"Memória alocada (tracemalloc): {medicoes[-1]['memoria_kb']:.0f}KB")
+    if medicoes[-1]['rss_kb'] is not None:
+        print(f"RSS máximo: {medicoes[-1]['rss_kb'] / 1024:.1f}MB")
+    print(f"Bibliotecas de notificação carregadas: {', '.join(medicoes[-1]['modulos']) or 'nenhuma'}")
+
+    print("\nMódulos mais lentos (tempo acumulado de importação):")
+    for acumulado, modulo in modulos_mais_lentos(tipos, args.top):
+        print(f"  {acumulado / 1000:8.1f}ms  {modulo.strip()}")
+
+    if args.maximo_ms is not None and mediana > args.maximo_ms:
+        print(f"\nFALHA: mediana {mediana:.1f}ms acima do limite de {args.maximo_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+ADIADA = 'adiada'  # Retorno de `entregar`: o canal pediu para aguardar; não conta como tentativa
+
+
+class CaixaSaida:
+    """Caixa de saída de notificações que falharam, persistida em disco e reenviada em segundo plano.
+
+    Cada notificação pendente é um arquivo JSON em `diretorio`, identificado por uma chave de
+    idempotência (canal, host, título e estado do alerta, sem a mensagem, que traz valores
+    variáveis): o mesmo alerta não é enfileirado duas vezes. As tentativas seguem backoff
+    exponencial com jitter; após `tentativas_maximas` falhas a notificação vai para
+    `diretorio/mortas`. Acima de `maximo_pendentes` a pendente mais antiga vai para as mortas,
+    e só as `maximo_mortas` mais recentes são mantidas. A entrega é "ao menos uma vez": se o
+    processo terminar entre o envio e a remoção do arquivo, a notificação é reenviada ao reiniciar.
+    """
+    def __init__(self, diretorio, entregar, tentativas_maximas=8, atraso_base=5, atraso_maximo=900, intervalo=1,
+                 maximo_pendentes=1000, maximo_mortas=1000):
+        self.diretorio = diretorio
+        self.diretorio_mortas = os.path.join(diretorio, 'mortas')
+        # entregar(tipo, host, titulo, mensagem) -> (entregue, erro); entregue None = canal inativo,
+        # entregue ADIADA = limite de taxa atingido, com erro = segundos até poder enviar
+        self.entregar = entregar
+        self.tentativas_maximas = tentativas_maximas
+        self.atraso_base = atraso_base  # Segundos até a primeira nova tentativa
+        self.atraso_maximo = atraso_maximo
+        self.intervalo = intervalo  # Segundos entre verificações das pendentes
+        self.maximo_pendentes = maximo_pendentes
+        self.maximo_mortas = maximo_mortas
+        self.pendentes = {}  # chave -> notificação
+        self.metricas = {'enfileiradas': 0, 'duplicadas': 0, 'tentativas': 0, 'entregues': 0, 'mortas': 0,
+                         'excedentes': 0}
+        self.lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        os.makedirs(self.diretorio_mortas, exist_ok=True)
+        self.carregar()
+
+    def carregar(self):
+        """Carrega as notificações pendentes gravadas por execuções anteriores"""
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, nome), 'r', encoding='utf-8') as f:
+                    item = json.load(f)
+                self.pendentes[item['chave']] = item
+            except (OSError, ValueError, KeyError):
+                continue
+
+    @staticmethod
+    def gerar_chave(tipo, host, titulo, estado=None):
+        """Chave de idempotência da notificação"""
+        conteudo = '\x1f'.join(str(parte) for parte in (tipo, host, titulo, estado))
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def _gravar(self, item, caminho):
+        """Grava a notificação de forma atômica (arquivo temporário + substituição)"""
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix='.caixa_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(item, f, ensure_ascii=False)
+            os.replace(temporario, caminho)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def _atraso(self, tentativas):
+        """Backoff exponencial com jitter: metade fixa e metade aleatória do atraso"""
+        atraso = min(self.atraso_maximo, self.atraso_base * 2 ** (tentativas - 1))
+        return atraso / 2 + random.uniform(0, atraso / 2)
+
+    def adicionar(self, tipo, host, titulo, mensagem, erro=None, estado=None):
+        """Enfileira uma notificação que falhou. Retorna a chave ou None se ela já estava pendente."""
+        chave = self.gerar_chave(tipo, host, titulo, estado)
+        agora = time.time()
+        item = {
+            'chave': chave,
+            'tipo': tipo,
+            'host': host,
+            'titulo': titulo,
+            'mensagem': mensagem,
+            'criada_em': agora,
+            'tentativas': 1,  # O envio original já foi a primeira tentativa
+            'proxima_tentativa': agora + self._atraso(1),
+            'ultimo_erro': erro,
+        }
+        with self.lock:
+            if chave in self.pendentes:
+                self.metricas['duplicadas'] += 1
+                return None
+            self.pendentes[chave] = item
+            self.metricas['enfileiradas'] += 1
+            excedentes = []
+            if len(self.pendentes) > self.maximo_pendentes:
+                excedentes = sorted(self.pendentes.values(), key=lambda pendente: pendente['criada_em'])
+                excedentes = excedentes[:len(self.pendentes) - self.maximo_pendentes]
+                self.metricas['excedentes'] += len(excedentes)
+        self._gravar(item, self._caminho(chave))
+        for excedente in excedentes:
+            # Caixa cheia (canal fora do ar por muito tempo): a pendente mais antiga desiste
+            excedente['ultimo_erro'] = "Limite de notificações pendentes atingido"
+            self._concluir(excedente, entregue=False)
+        return chave
+
+    def processar(self):
+        """Reenvia as notificações cujo horário de nova tentativa chegou"""
+        agora = time.time()
+        with self.lock:
+            vencidas = [item for item in self.pendentes.values() if item['proxima_tentativa'] <= agora]
+
+        for item in vencidas:
+            if self._parar.is_set():
+                break
+            entregue, erro = self.entregar(item['tipo'], item['host'], item['titulo'], item['mensagem'])
+            if entregue == ADIADA:
+                item['proxima_tentativa'] = time.time() + max(erro or 0, self.intervalo)
+                self._gravar(item, self._caminho(item['chave']))
+                continue
+            with self.lock:
+                self.metricas['tentativas'] += 1
+            if entregue:
+                self._concluir(item, entregue=True)
+                continue
+
+            item['tentativas'] += 1
+            item['ultimo_erro'] = erro if entregue is False else "Canal de notificação inativo"
+            if item['tentativas'] >= self.tentativas_maximas:
+                self._concluir(item, entregue=False)
+            else:
+                item['proxima_tentativa'] = time.time() + self._atraso(item['tentativas'])
+                self._gravar(item, self._caminho(item['chave']))
+
+    def _concluir(self, item, entregue):
+        """Remove a notificação das pendentes, movendo-a para as mortas se não foi entregue"""
+        caminho = self._caminho(item['chave'])
+        if entregue:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        else:
+            item['morta_em'] = time.time()
+            nome = f"{item['chave']}-{int(item['morta_em'])}.json"
+            self._gravar(item, os.path.join(self.diretorio_mortas, nome))
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            self._limitar_mortas()
+        with self.lock:
+            self.pendentes.pop(item['chave'], None)
+            self.metricas['entregues' if entregue else 'mortas'] += 1
+
+    def _limitar_mortas(self):
+        """Remove as notificações mortas mais antigas acima de `maximo_mortas`"""
+        try:
+            mortas = [(entrada.stat().st_mtime_ns, entrada.path) for entrada in os.scandir(self.diretorio_mortas)
+                      if entrada.name.endswith('.json')]
+        except OSError:
+            return
+        mortas.sort()
+        for _, caminho in mortas[:len(mortas) - self.maximo_mortas]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                continue
+
+    def obter_metricas(self):
+        """Retorna os contadores da caixa de saída e a quantidade de pendentes"""
+        with self.lock:
+            pendentes = list(self.pendentes.values())
+            metricas = dict(self.metricas)
+        metricas['pendentes'] = len(pendentes)
+        metricas['mais_antiga'] = min((item['criada_em'] for item in pendentes), default=None)
+        return metricas
+
+    def iniciar(self):
+        """Inicia o thread de reenvio"""
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+
+    def parar(self, prazo=None):
+        """Para o thread de reenvio; as pendentes continuam gravadas para a próxima execução"""
+        self._parar.set()
+        if self._thread:
+            # Um reenvio em andamento termina sozinho (thread daemon) se passar do prazo
+            self._thread.join(prazo)
+            self._thread = None
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.processar()
+            except Exception as e:
+                print(f"Erro ao reenviar notificações pendentes: {str(e)}")
@@ -2,12 +2,67 @@ import json
 import os
 
 class Configuracao:
-    def __init__(self):
-        self.CONFIG_FILE = 'config.json'
+    def __init__(self, arquivo='config.json'):
+        self.CONFIG_FILE = arquivo
         self.configuracoes_padrao = {
             'intervalo_ping': 1,
             'max_hosts': 9,
+            # Sondas enviadas por ciclo (rajada) e espaçamento entre elas, em segundos
+            'pacotes_por_ciclo': 1,
+            'intervalo_rajada': 0.2,
+            # Perda (%) a partir da qual a rajada é tratada como falha ("Perda elevada"); None desativa
+            'limiar_perda_rajada': 50,
+            # Quantidade de resultados mantidos em memória por host
+            'tamanho_historico': 1000,
+            # Amostras por host no armazenamento colunar (agregados e rankings da frota, requer NumPy)
+            'janela_armazenamento': 120,
+            # Acima desta quantidade de hosts o console mostra o resumo da frota e os piores hosts
+            'hosts_console': 20,
             'tipos_notificacao': ['desktop'],
+            # Notificações seguidas permitidas por host e canal antes de aguardar o intervalo
+            'rajada_notificacao': 1,
+            # Hosts monitorados a partir do arquivo (texto ou {"host": ..., "intervalo_ping": ...});
+            # com "caminho": true os saltos até o host também são sondados (estilo MTR)
+            'hosts': [],
+            # Modo caminho: ciclos entre descobertas dos saltos e quantidade máxima de saltos
+            'ciclos_descoberta_caminho': 30,
+            'max_saltos': 30,
+            # Intervalo, em segundos, para verificar alterações no config.json
+            'intervalo_recarregamento': 2,
+            # Dependências entre hosts no formato {"filho": "pai"} e fator de intervalo
+            # aplicado às sondas dos filhos enquanto o pai estiver em falha
+            'dependencias': {},
+            'fator_intervalo_dependente': 5,
+            # Segundos em que um pai ainda sem resultado ("Iniciando...") suprime os alertas dos filhos
+            'carencia_pai_pendente': 30,
+            # Detecção de latência degradada (EWMA + z-score, requer NumPy)
+            'deteccao_anomalias': True,
+            'intervalo_anomalias': 5,
+            'limiar_z_anomalias': 4.0,
+            # API local de estatísticas (desativada se a porta for None)
+            'api_endereco': '127.0.0.1',
+            'api_porta': None,
+            'api_intervalo_eventos': 1,
+            # Ponto de restauração: estado gravado a cada `intervalo_estado` segundos (0 desativa)
+            # e restaurado na inicialização se tiver no máximo `idade_maxima_estado` segundos
+            'arquivo_estado': 'estado_monitor.json',  # Arrays NumPy em estado_monitor.npz
+            'intervalo_estado': 30,
+            'historico_estado': 100,
+            'idade_maxima_estado': 86400,
+            # Caixa de saída: notificações que falharam são reenviadas com backoff exponencial
+            # (diretório None desativa); após `tentativas_notificacao` vão para `mortas`, que guarda
+            # as `maximo_notificacoes_mortas` mais recentes; acima de `maximo_notificacoes_pendentes`
+            # a pendente mais antiga vai para `mortas`
+            'diretorio_caixa_saida': 'caixa_saida',
+            'tentativas_notificacao': 8,
+            'atraso_reenvio': 5,
+            'atraso_maximo_reenvio': 900,
+            'maximo_notificacoes_pendentes': 1000,
+            'maximo_notificacoes_mortas': 1000,
+            # Tempo máximo, em segundos, para gravar logs e notificações pendentes ao encerrar
+            'prazo_encerramento': 5,
+            # Executa sem interface interativa (serviço systemd, contêiner), como `--servico`
+            'modo_servico': False,
             # Configurar envio de email
             'email_remetente': None,
             'senha_remetente': None,
@@ -44,6 +99,10 @@ class Configuracao:
                 setattr(self, chave, valor)
             return self.configuracoes_padrao
 
+    def obter_configuracoes(self):
+        """Retorna um dicionário com os valores atuais de todas as configurações conhecidas"""
+        return {chave: getattr(self, chave, valor) for chave, valor in self.configuracoes_padrao.items()}
+
     def salvar_configuracoes(self, configuracoes):
         """Salva as configurações atuais no arquivo JSON"""
         with open(self.CONFIG_FILE, 'w') as f:
@@ -75,30 +134,14 @@ class Configuracao:
                     
                     
                 # Salva todas as configurações
-            self.salvar_configuracoes({
-                'intervalo_ping': self.intervalo_ping,
-                'max_hosts': self.max_hosts,
-                'tipos_notificacao': self.tipos_notificacao,
-                # Adicionando as configurações específicas de cada notificação
-                'account_sid_twilio': getattr(self, 'account_sid_twilio', None),
-                'auth_token_twilio': getattr(self, 'auth_token_twilio', None),
-                'numero_remetente_twilio': getattr(self, 'numero_remetente_twilio', None),
-                'numero_destinatario_twilio': getattr(self, 'numero_destinatario_twilio', None),
-                'email_remetente': getattr(self, 'email_remetente', None),
-                'senha_remetente': getattr(self, 'senha_remetente', None),
-                'email_destinatario': getattr(self, 'email_destinatario', None),
-                'token_bot_telegram': getattr(self, 'token_bot_telegram', None),
-                'chat_id_telegram': getattr(self, 'chat_id_telegram', None),
-                'url_whatsapp': getattr(self, 'url_whatsapp', None),
-                'token_whatsapp': getattr(self, 'token_whatsapp', None),
-                'numero_destinatario_whatsapp': getattr(self, 'numero_destinatario_whatsapp', None)
-            })
+            self.salvar_configuracoes(self.obter_configuracoes())
 
             print("\nNovas configurações:")
             # Filtra e exibe apenas as configurações que foram alteradas
             configuracoes_exibicao = {
                 'intervalo_ping': self.intervalo_ping,
                 'max_hosts': self.max_hosts,
+                'pacotes_por_ciclo': self.pacotes_por_ciclo,
                 'tipos_notificacao': self.tipos_notificacao
             }
             print(json.dumps(configuracoes_exibicao, indent=4))
@@ -120,9 +163,13 @@ class Configuracao:
         self.intervalo_ping = int(intervalo_input) if intervalo_input else self.intervalo_ping
         
         """Configura o número máximo de hosts a serem monitorados"""
-        max_hosts_input = input(f"Digite o número máximo de hosts a serem monitorados (padrão {self.max_hosts}): ")
+        max_hosts_input = input(f"Digite o número máximo de hosts a serem monitorados (0 = sem limite, padrão {self.max_hosts}): ")
         self.max_hosts = int(max_hosts_input) if max_hosts_input else self.max_hosts
 
+        """Configura a quantidade de sondas enviadas em rajada a cada ciclo"""
+        pacotes_input = input(f"Digite a quantidade de pacotes por ciclo (padrão {self.pacotes_por_ciclo}): ")
+        self.pacotes_por_ciclo = max(1, int(pacotes_input)) if pacotes_input else self.pacotes_por_ciclo
+
     def configurar_notificacao(self):
         """Configura as opções de notificação"""
         print("\n=== Configuração de Notificação ===")
@@ -0,0 +1,70 @@
+import time
+
+
+class MapaDependencias:
+    """Mapa de dependências pai/filho entre hosts (ex: hosts atrás de um gateway)"""
+    def __init__(self, dependencias=None):
+        self.pais = {}  # host -> set de pais
+        self.filhos = {}  # host -> set de filhos
+        self.atualizar(dependencias or {})
+
+    def atualizar(self, dependencias):
+        """Recria o mapa a partir da configuração no formato {"filho": "pai" | ["pai1", "pai2"]}"""
+        pais = {}
+        filhos = {}
+        for filho, pais_filho in dependencias.items():
+            if isinstance(pais_filho, str):
+                pais_filho = [pais_filho]
+            for pai in pais_filho:
+                if pai == filho:
+                    continue
+                pais.setdefault(filho, set()).add(pai)
+                filhos.setdefault(pai, set()).add(filho)
+        # Substitui de uma vez para não expor um mapa parcial aos threads de monitoramento
+        self.pais, self.filhos = pais, filhos
+
+    def _percorrer(self, host, arestas):
+        """Percorre o grafo a partir do host, tolerando ciclos na configuração"""
+        visitados = set()
+        pendentes = list(arestas.get(host, ()))
+        while pendentes:
+            atual = pendentes.pop()
+            if atual in visitados or atual == host:
+                continue
+            visitados.add(atual)
+            yield atual
+            pendentes.extend(arestas.get(atual, ()))
+
+    def ancestrais(self, host):
+        """Retorna todos os hosts dos quais o host depende, direta ou indiretamente"""
+        return list(self._percorrer(host, self.pais))
+
+    def descendentes(self, host):
+        """Retorna todos os hosts que dependem do host, direta ou indiretamente"""
+        return list(self._percorrer(host, self.filhos))
+
+    def pai_em_falha(self, host, monitores, carencia_pendentes=0):
+        """Retorna o primeiro ancestral monitorado que está em falha, ou None.
+
+        Ancestrais ainda sem resultado também contam durante `carencia_pendentes` segundos
+        desde a sua criação, evitando que o filho alerte antes do pai no primeiro ciclo.
+        Depois disso um pai que nunca respondeu (ex: thread aguardando vaga ou sonda
+        travada) deixa de suprimir os alertas dos filhos.
+        """
+        agora = time.monotonic()
+        for ancestral in self._percorrer(host, self.pais):
+            monitor = monitores.get(ancestral)
+            if monitor is None or monitor.status == "Sucesso":
+                continue
+            if monitor.status != "Iniciando...":
+                return ancestral
+            if agora - getattr(monitor, 'criado_em', agora) < carencia_pendentes:
+                return ancestral
+        return None
+
+    def descendentes_em_falha(self, host, monitores):
+        """Retorna os descendentes monitorados que estão em falha (com alertas suprimidos pelo host)"""
+        return [
+            descendente for descendente in self._percorrer(host, self.filhos)
+            if descendente in monitores and monitores[descendente].status not in ("Sucesso", "Iniciando...")
+        ]
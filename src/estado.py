@@ -0,0 +1,246 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+
+VERSAO_FORMATO = 1  # Incrementar quando a estrutura do estado gravado mudar
+
+# Campos numéricos dos registros do histórico, gravados como colunas no .npz (NaN para ausentes)
+CAMPOS_HISTORICO_NUMERICOS = ('ping', 'min', 'max', 'jitter', 'perda')
+
+
+def _gravar_atomico(caminho, escrever, modo='w'):
+    """Grava o arquivo de forma atômica (arquivo temporário + substituição)"""
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix='.estado_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, modo, **({} if 'b' in modo else {'encoding': 'utf-8'})) as f:
+            escrever(f)
+        os.replace(temporario, caminho)
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def caminho_arrays(caminho):
+    """Arquivo .npz com os arrays NumPy, gravado ao lado do estado em JSON"""
+    return os.path.splitext(caminho)[0] + '.npz'
+
+
+def gravar_estado(caminho, estado, arrays=None):
+    """Grava o estado em JSON e, se houver, os arrays NumPy em um .npz ao lado.
+
+    O .npz é gravado primeiro e identificado pelo mesmo `gravado_em` do JSON: arrays de
+    outra gravação (ex: interrompida entre os dois arquivos) são descartados ao carregar.
+    """
+    gravado_em = time.time()
+    if arrays is not None:
+        import numpy as np
+
+        _gravar_atomico(
+            caminho_arrays(caminho),
+            lambda f: np.savez_compressed(f, _gravado_em=np.array(gravado_em), **arrays),
+            'wb'
+        )
+    dados = {'versao_formato': VERSAO_FORMATO, 'gravado_em': gravado_em, **estado}
+    # json.dumps em uma chamada usa o codificador em C; json.dump gera e grava pedaço a pedaço
+    texto = json.dumps(dados, ensure_ascii=False)
+    _gravar_atomico(caminho, lambda f: f.write(texto))
+
+
+def carregar_estado(caminho, idade_maxima=None):
+    """Carrega o estado gravado. Retorna None se ausente, ilegível, de outro formato ou antigo demais.
+
+    Um ponto de restauração existente que é ignorado é informado no console, com o motivo.
+    """
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ponto de restauração {caminho} ilegível e ignorado: {e}")
+        return None
+    versao = dados.get('versao_formato') if isinstance(dados, dict) else None
+    if versao != VERSAO_FORMATO:
+        print(f"Ponto de restauração {caminho} ignorado: formato {versao}, esperado {VERSAO_FORMATO}")
+        return None
+    idade = time.time() - dados.get('gravado_em', 0)
+    if idade_maxima and idade > idade_maxima:
+        print(f"Ponto de restauração {caminho} ignorado: gravado há {idade / 3600:.1f}h "
+              f"(máximo {idade_maxima / 3600:.1f}h)")
+        return None
+    return dados
+
+
+def carregar_arrays(caminho, gravado_em):
+    """Carrega os arrays gravados junto com o estado. Retorna {} se ausentes, ilegíveis ou de outra gravação."""
+    try:
+        import numpy as np
+
+        # allow_pickle=False: o .npz só pode conter arrays numéricos, nunca objetos Python
+        with np.load(caminho_arrays(caminho), allow_pickle=False) as dados:
+            if float(dados['_gravado_em']) != gravado_em:
+                print("Arrays do ponto de restauração são de outra gravação; análises reiniciadas")
+                return {}
+            return {nome: dados[nome] for nome in dados.files if nome != '_gravado_em'}
+    except (FileNotFoundError, ImportError):
+        return {}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        print(f"Arrays do ponto de restauração ilegíveis ({e}); análises reiniciadas")
+        return {}
+
+
+def dividir_analises(analises):
+    """Separa {nome: (chaves, {coluna: array})} em chaves para o JSON e arrays 'nome.coluna' para o .npz"""
+    chaves = {}
+    arrays = {}
+    for nome, (chaves_analise, colunas) in analises.items():
+        chaves[nome] = chaves_analise
+        arrays.update({f"{nome}.{coluna}": valores for coluna, valores in colunas.items()})
+    return chaves, arrays
+
+
+def juntar_analises(chaves, arrays):
+    """Inverso de `dividir_analises`, ignorando análises com arrays ausentes ou de tamanho diferente"""
+    analises = {}
+    for nome, chaves_analise in chaves.items():
+        # Chaves compostas, como (host, salto), voltam do JSON como listas
+        chaves_analise = [tuple(chave) if isinstance(chave, list) else chave for chave in chaves_analise]
+        prefixo = f"{nome}."
+        colunas = {
+            coluna[len(prefixo):]: valores for coluna, valores in arrays.items() if coluna.startswith(prefixo)
+        }
+        if colunas and all(len(valores) == len(chaves_analise) for valores in colunas.values()):
+            analises[nome] = (chaves_analise, colunas)
+    return analises
+
+
+def dividir_historico(historicos):
+    """Converte {host: [registro, ...]} em (hosts para o JSON, arrays 'historico.*' para o .npz).
+
+    Os registros de todos os hosts ficam nas mesmas colunas, na ordem de `hosts`;
+    'historico.quantidade' indica quantos registros pertencem a cada host. O status é
+    gravado como índice em 'historico.status_nomes'.
+    """
+    import numpy as np
+
+    hosts = list(historicos)
+    registros = [registro for host in hosts for registro in historicos[host]]
+    nomes_status = {}
+    arrays = {
+        'historico.quantidade': np.array([len(historicos[host]) for host in hosts], dtype=np.int64),
+        # Timestamps no formato fixo "AAAA-MM-DD HH:MM:SS", em bytes: 19 por registro
+        'historico.timestamp': np.array([registro['timestamp'] for registro in registros], dtype='S19'),
+        'historico.status': np.array(
+            [nomes_status.setdefault(registro['status'], len(nomes_status)) for registro in registros],
+            dtype=np.int32
+        ),
+    }
+    arrays['historico.status_nomes'] = np.array(list(nomes_status), dtype=str)
+    for campo in CAMPOS_HISTORICO_NUMERICOS:
+        # None vira NaN em um array float
+        arrays[f'historico.{campo}'] = np.array([registro.get(campo) for registro in registros], dtype=float)
+    return hosts, arrays
+
+
+def juntar_historico(hosts, arrays):
+    """Inverso de `dividir_historico`. Retorna {} se as colunas estiverem ausentes ou com tamanhos diferentes."""
+    import numpy as np
+
+    def valores(campo):
+        # NaN volta a ser None
+        numeros = arrays[f'historico.{campo}']
+        objetos = numeros.astype(object)
+        objetos[np.isnan(numeros)] = None
+        return objetos.tolist()
+
+    try:
+        quantidades = arrays['historico.quantidade'].tolist()
+        colunas = {
+            'timestamp': arrays['historico.timestamp'].astype(str).tolist(),
+            'status': arrays['historico.status_nomes'].astype(object)[arrays['historico.status']].tolist(),
+            **{campo: valores(campo) for campo in CAMPOS_HISTORICO_NUMERICOS},
+        }
+    except (KeyError, IndexError):
+        return {}
+    total = sum(quantidades)
+    if len(quantidades) != len(hosts) or any(len(coluna) != total for coluna in colunas.values()):
+        return {}
+
+    # Só os ciclos em rajada registram perda, jitter e mínimo/máximo
+    registros = [
+        {'timestamp': timestamp, 'ping': ping, 'status': status} if perda is None else
+        {'timestamp': timestamp, 'ping': ping, 'status': status, 'min': minimo, 'max': maximo,
+         'jitter': jitter, 'perda': perda}
+        for timestamp, status, ping, minimo, maximo, jitter, perda in zip(*colunas.values())
+    ]
+
+    historicos = {}
+    inicio = 0
+    for host, quantidade in zip(hosts, quantidades):
+        historicos[host] = registros[inicio:inicio + quantidade]
+        inicio += quantidade
+    return historicos
+
+
+class PontoRestauracao:
+    """Grava periodicamente, em um thread próprio, o estado retornado por `capturar`"""
+    def __init__(self, caminho, capturar, intervalo=30):
+        self.caminho = caminho
+        self.capturar = capturar  # Função que retorna (estado, arrays NumPy ou None) a gravar
+        self.intervalo = intervalo
+        self.ultima_duracao_ms = 0.0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia as gravações periódicas"""
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+        self._thread.start()
+
+    def parar(self, gravar=True, prazo=None):
+        """Encerra as gravações periódicas e, opcionalmente, grava o estado final.
+
+        Aguarda no máximo `prazo` segundos (None aguarda sem limite). Uma gravação que não
+        terminar no prazo segue em segundo plano; como é atômica, o arquivo anterior continua
+        válido se o processo terminar antes. Retorna False se a parada não terminou no prazo.
+        """
+        fim = None if prazo is None else time.monotonic() + prazo
+
+        def restante():
+            return None if fim is None else max(0, fim - time.monotonic())
+
+        self._parar.set()
+        if self._thread:
+            self._thread.join(restante())
+            if self._thread.is_alive():
+                return False  # A gravação periódica em andamento é a última
+            self._thread = None
+        if gravar:
+            thread = threading.Thread(target=self._gravar_com_aviso, daemon=True)
+            thread.start()
+            thread.join(restante())
+            return not thread.is_alive()
+        return True
+
+    def gravar(self):
+        """Captura e grava o estado atual"""
+        inicio = time.perf_counter()
+        gravar_estado(self.caminho, *self.capturar())
+        self.ultima_duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    def _gravar_com_aviso(self):
+        try:
+            self.gravar()
+        except Exception as e:
+            # Uma falha de disco não interrompe o monitoramento; tenta de novo no próximo ciclo
+            print(f"Erro ao gravar o ponto de restauração: {str(e)}")
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self._gravar_com_aviso()
@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import queue
+import threading
+import time
+
+
+class BaldeTokens:
+    """Token bucket: permite rajadas de até `capacidade` envios, recarregando `taxa` tokens por segundo"""
+    __slots__ = ('capacidade', 'taxa', 'tokens', 'atualizado')
+
+    def __init__(self, capacidade, taxa, agora=None):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.tokens = float(capacidade)
+        self.atualizado = time.monotonic() if agora is None else agora
+
+    def _recarregar(self, agora):
+        """Adiciona os tokens acumulados desde a última atualização"""
+        decorrido = agora - self.atualizado
+        if decorrido > 0:
+            self.tokens = min(self.capacidade, self.tokens + decorrido * self.taxa)
+            self.atualizado = agora
+
+    def disponivel(self, agora):
+        """Verifica se há ao menos um token, sem consumi-lo"""
+        self._recarregar(agora)
+        return self.tokens >= 1
+
+    def consumir(self, agora):
+        """Consome um token. Retorna False se não houver tokens disponíveis."""
+        self._recarregar(agora)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def tempo_restante(self, agora):
+        """Segundos até o próximo token ficar disponível"""
+        self._recarregar(agora)
+        if self.tokens >= 1 or self.taxa <= 0:
+            return 0
+        return (1 - self.tokens) / self.taxa
+
+
+class LimitadorTaxa:
+    """Conjunto de token buckets por chave (ex: host e canal), com quantidade máxima de baldes.
+
+    Cada verificação é O(1). Ao atingir `max_baldes`, o balde usado há mais tempo é
+    descartado; um balde descartado equivale a um balde cheio, então nenhum alerta
+    é bloqueado indevidamente e a memória permanece constante.
+    """
+    def __init__(self, capacidade=1, taxa=1 / 60, max_baldes=10000):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.max_baldes = max_baldes
+        self.baldes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _obter_balde(self, chave, agora):
+        """Retorna o balde da chave, criando-o se necessário"""
+        balde = self.baldes.get(chave)
+        if balde is None:
+            balde = self.baldes[chave] = BaldeTokens(self.capacidade, self.taxa, agora)
+            if len(self.baldes) > self.max_baldes:
+                self.baldes.popitem(last=False)
+        else:
+            self.baldes.move_to_end(chave)
+        return balde
+
+    def disponivel(self, chave):
+        """Verifica se a chave pode enviar agora, sem consumir um token"""
+        agora = time.monotonic()
+        with self.lock:
+            balde = self.baldes.get(chave)
+            return balde is None or balde.disponivel(agora)
+
+    def consumir(self, chave):
+        """Consome um token da chave. Retorna False se o limite foi atingido."""
+        agora = time.monotonic()
+        with self.lock:
+            return self._obter_balde(chave, agora).consumir(agora)
+
+    def tempo_restante(self, chave):
+        """Segundos até a chave poder enviar novamente"""
+        agora = time.monotonic()
+        with self.lock:
+            balde = self.baldes.get(chave)
+            return balde.tempo_restante(agora) if balde else 0
+
+    def exportar(self):
+        """Retorna [[chave, tokens, atualizado], ...] com o horário no relógio de parede (time.time)"""
+        # time.monotonic não tem significado entre processos; converte para o relógio de parede
+        deslocamento = time.time() - time.monotonic()
+        with self.lock:
+            return [[chave, balde.tokens, balde.atualizado + deslocamento] for chave, balde in self.baldes.items()]
+
+    def restaurar(self, estado):
+        """Restaura os baldes exportados por `exportar`, possivelmente em outro processo"""
+        deslocamento = time.time() - time.monotonic()
+        with self.lock:
+            for chave, tokens, atualizado in estado:
+                # Chaves compostas, como (host, canal), voltam do JSON como listas
+                chave = tuple(chave) if isinstance(chave, list) else chave
+                balde = self._obter_balde(chave, atualizado - deslocamento)
+                balde.tokens = min(tokens, self.capacidade)
+                balde.atualizado = atualizado - deslocamento
+
+
+class FilaLimitada(queue.Queue):
+    """Fila com tamanho máximo que descarta novos itens quando cheia, contando os descartes"""
+    def __init__(self, maxsize=10000):
+        super().__init__(maxsize)
+        self.descartados = 0
+
+    def colocar(self, item):
+        """Adiciona um item sem bloquear. Retorna False se ele foi descartado."""
+        try:
+            self.put_nowait(item)
+            return True
+        except queue.Full:
+            with self.mutex:
+                self.descartados += 1
+            return False
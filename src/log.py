@@ -1,22 +1,86 @@
 from datetime import datetime
 import os
 import queue
+import re
+import sys
 import threading
+import time
+from limitador import FilaLimitada
+
+_FIM = object()  # Marcador na fila: o thread de escrita termina ao alcançá-lo
 
 class GerenciadorLog:
     _instances = {}  # Dicionário para armazenar instâncias únicas por host
+    _instances_lock = threading.Lock()
+    _encerrado = False  # Após parar_todas, novas instâncias não iniciam threads de escrita
+    _inativas = {}  # Instâncias inativas entregues após parar_todas, uma por host
+    TAMANHO_MAXIMO_FILA = 10000  # Entradas além disso são descartadas e contadas
     
     @classmethod
     def get_instance(cls, host=None):
         """Implementa o padrão Singleton por host"""
-        if host not in cls._instances:
-            cls._instances[host] = cls(host)
-        return cls._instances[host]
+        with cls._instances_lock:
+            if cls._encerrado:
+                # Encerramento em andamento: uma instância inativa, que recusa as entradas,
+                # em vez de um novo thread de escrita que ninguém mais vai parar. A mesma para
+                # cada host, para avisar uma única vez e contar os descartes em parar_todas
+                if host not in cls._inativas:
+                    cls._inativas[host] = cls(host, iniciar=False)
+                return cls._inativas[host]
+            if host not in cls._instances:
+                cls._instances[host] = cls(host)
+            return cls._instances[host]
+
+    @classmethod
+    def reabrir(cls):
+        """Permite criar instâncias novamente após parar_todas (novo início do monitoramento)"""
+        with cls._instances_lock:
+            cls._encerrado = False
+            cls._inativas.clear()
+
+    @classmethod
+    def liberar_instancia(cls, host):
+        """Para e descarta a instância de um host que deixou de ser monitorado"""
+        with cls._instances_lock:
+            instancia = cls._instances.pop(host, None)
+        if instancia is not None:
+            instancia.parar()
+
+    @classmethod
+    def parar_todas(cls, prazo=5):
+        """Para todas as instâncias, gravando as filas pendentes em até `prazo` segundos.
+
+        Retorna (descartados, nao_gravados): entradas descartadas por fila cheia durante a
+        execução ou recusadas após o encerramento, e entradas que ainda estavam na fila quando
+        o prazo terminou.
+        """
+        with cls._instances_lock:
+            cls._encerrado = True
+            instancias = list(cls._instances.values())
+            cls._instances.clear()
+        fim = time.monotonic() + prazo
+        # Sinaliza todas antes de aguardar, para que as filas sejam gravadas em paralelo
+        for instancia in instancias:
+            instancia.sinalizar_fim(max(0, fim - time.monotonic()))
+        nao_gravados = 0
+        for instancia in instancias:
+            nao_gravados += instancia.aguardar_fim(max(0, fim - time.monotonic()))
+        with cls._instances_lock:
+            # Inclui as entradas recusadas pelas instâncias inativas durante o encerramento
+            instancias += cls._inativas.values()
+        return sum(instancia.descartados for instancia in instancias), nao_gravados
     
-    def __init__(self, host=None):
+    def __init__(self, host=None, iniciar=True):
         self.host = host
-        self.log_queue = queue.Queue()
-        self.running = True
+        self.log_queue = FilaLimitada(self.TAMANHO_MAXIMO_FILA)
+        self.running = iniciar
+        self.rejeitados = 0  # Entradas recebidas depois que a instância parou
+        # Torna atômicos a verificação de `running` e a entrada na fila, frente a sinalizar_fim
+        self._lock_parada = threading.Lock()
+        self._fim_na_fila = False
+        self.log_thread = None
+        if not iniciar:
+            return
         self._criar_diretorio_logs()
         self.log_file = self._criar_arquivo_log()
         # Inicia o thread para salvar logs
@@ -31,12 +95,32 @@ class GerenciadorLog:
         """Cria o nome do arquivo de log baseado no host"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         if self.host:
-            return f"logs/log_{self.host}_{timestamp}.txt"
+            # Alvos como tcp://host:porta têm caracteres inválidos em nomes de arquivo
+            nome = re.sub(r'[^\w.-]+', '_', self.host)
+            return f"logs/log_{nome}_{timestamp}.txt"
         return f"logs/ping_multi_log_{timestamp}.txt"
         
     def registrar_log(self, log_entry):
-        """Adiciona uma entrada de log à fila"""
-        self.log_queue.put(log_entry)
+        """Adiciona uma entrada de log à fila. Retorna False se ela foi descartada.
+
+        Entradas são descartadas com a fila cheia ou depois que a instância parou (o thread
+        de escrita não as gravaria); estas são contadas em `rejeitados` e avisadas no console.
+        """
+        with self._lock_parada:
+            if self.running:
+                # Sob o lock, a entrada sempre fica antes do marcador de fim
+                return self.log_queue.colocar(log_entry)
+            self.rejeitados += 1
+            primeira = self.rejeitados == 1
+        if primeira:
+            print(f"Log {'de ' + self.host if self.host else 'geral'} já encerrado; "
+                  f"novas entradas serão descartadas", file=sys.stderr)
+        return False
+
+    @property
+    def descartados(self):
+        """Quantidade de entradas de log descartadas por fila cheia ou após a parada"""
+        return self.log_queue.descartados + self.rejeitados
         
     def registrar_log_notificacao(self, resultados_notificacao):
         """Registra os resultados das tentativas de notificação"""
@@ -55,30 +139,91 @@ class GerenciadorLog:
                 })
             
     def salvar_logs(self):
-        """Salva os logs em arquivo"""
-        while self.running:
-            try:
-                log_entry = self.log_queue.get(timeout=1)
+        """Salva os logs em arquivo, em lotes, até encontrar o marcador de fim"""
+        while True:
+            lote = [self.log_queue.get()]  # Bloqueia sem consultar periodicamente a fila
+            while lote[-1] is not _FIM and len(lote) < 1000:
+                try:
+                    lote.append(self.log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            fim = lote[-1] is _FIM
+            if fim:
+                lote.pop()
+            if lote:
                 with open(self.log_file, 'a', encoding='utf-8') as f:
-                    if 'tipo' in log_entry:
-                        if log_entry['tipo'] == 'erro_notificacao':
-                            f.write(f"[{log_entry['timestamp']}] ERRO {log_entry['servico']}: "
-                                   f"{log_entry['mensagem']}\n")
-                        elif log_entry['tipo'] == 'aguardando_intervalo':
-                            f.write(f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
-                                   f"Notificação {log_entry['servico']}: Aguardando "
-                                   f"({int(log_entry['tempo_restante'])}s restantes)\n")
-                    elif 'tipo_notificacao' in log_entry:
-                        f.write(f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
-                               f"Notificação {log_entry['tipo_notificacao']}: {log_entry['status']}\n")
-                    else:
-                        f.write(f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
-                               f"Ping: {log_entry['ping']}ms - Status: {log_entry['status']}\n")
-            except queue.Empty:
-                continue
-                
-    def parar(self):
-        """Para o gerenciador de logs"""
-        self.running = False
-        if self.log_thread.is_alive():
-            self.log_thread.join()
+                    f.writelines(self._formatar(log_entry) for log_entry in lote)
+            if fim:
+                return
+
+    def _formatar(self, log_entry):
+        """Converte uma entrada de log na linha gravada no arquivo"""
+        if 'tipo' in log_entry:
+            if log_entry['tipo'] == 'erro_notificacao':
+                return (f"[{log_entry['timestamp']}] ERRO {log_entry['servico']}: "
+                        f"{log_entry['mensagem']}\n")
+            elif log_entry['tipo'] == 'aguardando_intervalo':
+                return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                        f"Notificação {log_entry['servico']}: Aguardando "
+                        f"({int(log_entry['tempo_restante'])}s restantes)\n")
+            elif log_entry['tipo'] == 'alerta_suprimido':
+                return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                        f"Alertas suprimidos: host pai {log_entry['pai']} em falha\n")
+            elif log_entry['tipo'] == 'latencia_degradada':
+                return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                        f"Latência degradada: {log_entry['ping']}ms (normal {log_entry['media']}ms)\n")
+            elif log_entry['tipo'] == 'latencia_normalizada':
+                return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                        f"Latência normalizada: {log_entry['ping']}ms (normal {log_entry['media']}ms)\n")
+            elif log_entry['tipo'] == 'caminho_alterado':
+                anterior = ' > '.join(salto or '*' for salto in log_entry['anterior'])
+                novo = ' > '.join(salto or '*' for salto in log_entry['novo'])
+                return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                        f"Rota alterada: {anterior} => {novo}\n")
+            elif log_entry['tipo'] == 'limite_hosts':
+                return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                        f"Aguardando vaga: limite de {log_entry['limite']} hosts monitorados\n")
+            elif log_entry['tipo'] == 'servico':
+                # Pares chave=valor, fáceis de filtrar por coletores de log
+                detalhes = ' '.join(f"{chave}={valor}" for chave, valor in log_entry['detalhes'].items())
+                return f"[{log_entry['timestamp']}] Serviço {log_entry['evento']}: {detalhes}\n"
+            return ""
+        elif 'tipo_notificacao' in log_entry:
+            return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                    f"Notificação {log_entry['tipo_notificacao']}: {log_entry['status']}\n")
+        elif 'perda' in log_entry:
+            return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                    f"Ping: {log_entry['ping']}ms - Status: {log_entry['status']} - "
+                    f"Perda: {log_entry['perda']}% - Mín/Máx: {log_entry['min']}/{log_entry['max']}ms - "
+                    f"Jitter: {log_entry['jitter']}ms\n")
+        return (f"[{log_entry['timestamp']}] Host: {log_entry['host']} - "
+                f"Ping: {log_entry['ping']}ms - Status: {log_entry['status']}\n")
+
+    def sinalizar_fim(self, prazo=5):
+        """Coloca o marcador de fim na fila; o que já estava nela ainda será gravado"""
+        with self._lock_parada:
+            if not self.running:
+                return
+            self.running = False
+        try:
+            # Com a fila cheia, aguarda o thread de escrita liberar espaço (fora do lock:
+            # registrar_log já recusa as entradas e não fica esperando junto)
+            self.log_queue.put(_FIM, timeout=prazo)
+            self._fim_na_fila = True
+        except queue.Full:
+            pass
+
+    def aguardar_fim(self, prazo=5):
+        """Aguarda o thread de escrita terminar. Retorna as entradas que ficaram sem gravar."""
+        if self.log_thread is None:
+            return 0
+        self.log_thread.join(prazo)
+        if not self.log_thread.is_alive():
+            return 0
+        return max(0, self.log_queue.qsize() - self._fim_na_fila)
+
+    def parar(self, prazo=5):
+        """Para o gerenciador de logs, gravando as entradas pendentes em até `prazo` segundos"""
+        fim = time.monotonic() + prazo
+        self.sinalizar_fim(prazo)
+        return self.aguardar_fim(max(0, fim - time.monotonic()))
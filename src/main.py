@@ -1,15 +1,27 @@
+import argparse
+import asyncio
 import sys
 import os
+import signal
 import threading
 import platform
-import subprocess
 import time
+import itertools
+from collections import deque
 from datetime import datetime
-import json
-from notificação import configurar_notificacoes
+from notificação import configurar_notificacoes, criar_notificador, notificadores_alterados, tipos_ativos
 from log import GerenciadorLog
 from logo_alefe import Apresentação
 from configuracao import Configuracao
+from recarregamento import ObservadorArquivo, calcular_diferencas, normalizar_hosts
+from registro_hosts import RegistroHosts
+from sondas import MotorSondas, caminho_alterado
+from dependencias import MapaDependencias
+from estado import (
+    PontoRestauracao, carregar_arrays, carregar_estado, dividir_analises, dividir_historico, juntar_analises,
+    juntar_historico,
+)
+from caixa_saida import CaixaSaida
 
 # Adiciona o caminho do diretório pai ao sistema
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,39 +34,145 @@ CONFIG_FILE = 'config.json'
 
 # Classe para gerenciar o monitoramento de múltiplos hosts
 class MonitorHost:
-    def __init__(self, host):
+    _versoes = itertools.count(1)  # Versões globais e crescentes dos snapshots de todos os hosts
+
+    def __init__(self, host, intervalo_ping=None, tamanho_historico=1000, caminho=False):
         """Inicializa o monitoramento de um host específico."""
         self.host = host
+        self.intervalo_ping = intervalo_ping  # Se None, usa o intervalo global
+        # Modo caminho (estilo MTR): saltos até o host, sondados a cada ciclo
+        self.caminho = caminho
+        self.saltos = []  # Endereço de cada salto (None para saltos que não respondem)
+        self.ciclos_caminho = 0  # Ciclos desde a última descoberta dos saltos
+        self.alteracoes_caminho = 0
         self.ultimo_ping = None
         self.status = "Iniciando..."
-        self.historico = []
+        self.historico = deque(maxlen=tamanho_historico)  # Mantém só os resultados mais recentes
+        self.resultados = 0  # Resultados recebidos; filhos aguardam um novo resultado do pai
         self.falhas = 0
+        self.falhas_consecutivas = 0
         self.ultima_falha = None
         self.tempo_total_falhas = 0
         self.ultima_notificacao_enviada = None  # Novo atributo para controlar notificações
+        self.ultima_rajada = None  # Perda, jitter e mín/máx do último ciclo em rajada
+        self.suprimido_por = None  # Pai em falha que está suprimindo os alertas deste host
+        # Agregados acumulados, atualizados a cada resultado sem percorrer o histórico
+        self.soma_pings = 0
+        self.quantidade_pings = 0
+        self.min_ping = None
+        self.max_ping = None
+        # Snapshot imutável das estatísticas e sua versão, usados pelo console e pela API
+        self.snapshot = self._montar_snapshot()
+        self.versao = next(self._versoes)
+        self.criado_em = time.monotonic()  # Início da carência de dependência enquanto "Iniciando..."
+        self.despertar = threading.Event()  # Interrompe a espera entre sondas (intervalo alterado, remoção, parada)
         
-    def adicionar_resultado(self, ping, status):
+    def adicionar_resultado(self, ping, status, rajada=None):
         """Adiciona um novo resultado de ping e atualiza as estatísticas."""
         self.ultimo_ping = ping
         self.status = status
         tempo_atual = datetime.now()
         
-        # Registra o resultado no histórico
-        self.historico.append({
+        # Registra o resultado no histórico (um único registro agregado por rajada)
+        registro = {
             'timestamp': tempo_atual.strftime("%Y-%m-%d %H:%M:%S"),
             'ping': ping,
             'status': status
-        })
+        }
+        if rajada:
+            self.ultima_rajada = rajada
+            registro.update({chave: rajada[chave] for chave in ('min', 'max', 'jitter', 'perda')})
+        self.historico.append(registro)
+        self.resultados += 1
         
         # Atualiza contagem de falhas e tempo
         if status != "Sucesso":
             self.falhas += 1
+            self.falhas_consecutivas += 1
             if self.ultima_falha:
                 delta = (tempo_atual - self.ultima_falha).total_seconds()
                 self.tempo_total_falhas += delta
             self.ultima_falha = tempo_atual
+        else:
+            self.falhas_consecutivas = 0
+            self.ultima_falha = None
+
+        if ping is not None:
+            # Em rajadas, o mínimo/máximo do ciclo é mais fiel que a média
+            minimo = rajada['min'] if rajada else ping
+            maximo = rajada['max'] if rajada else ping
+            self.soma_pings += ping
+            self.quantidade_pings += 1
+            self.min_ping = minimo if self.min_ping is None else min(self.min_ping, minimo)
+            self.max_ping = maximo if self.max_ping is None else max(self.max_ping, maximo)
+
+        return self.atualizar_snapshot()
+
+    def _montar_snapshot(self):
+        """Monta o dicionário de estatísticas do host."""
+        return {
+            'último_ping': self.ultimo_ping,
+            'status': self.status,
+            'média_ping': self.soma_pings / self.quantidade_pings if self.quantidade_pings else 0,
+            'min_ping': self.min_ping or 0,
+            'max_ping': self.max_ping or 0,
+            'total_falhas': self.falhas,
+            'tempo_total_falhas': self.tempo_total_falhas,
+            'última_falha': self.ultima_falha.strftime("%Y-%m-%d %H:%M:%S") if self.ultima_falha else None,
+            'perda': self.ultima_rajada['perda'] if self.ultima_rajada else None,
+            'jitter': self.ultima_rajada['jitter'] if self.ultima_rajada else None,
+            'saltos': len(self.saltos) if self.caminho else None,
+            'alteracoes_caminho': self.alteracoes_caminho
+        }
+
+    def atualizar_snapshot(self):
+        """Recria o snapshot e incrementa a versão se algo mudou. Retorna True se mudou."""
+        snapshot = self._montar_snapshot()
+        if snapshot == self.snapshot:
+            return False
+        self.snapshot = snapshot  # Substituído, nunca alterado: leitores não precisam copiar
+        self.versao = next(self._versoes)
+        return True
+            
+    # Atributos gravados no ponto de restauração (o histórico vai em colunas, no .npz)
+    CAMPOS_ESTADO = (
+        'ultimo_ping', 'status', 'falhas', 'falhas_consecutivas', 'ultima_falha', 'tempo_total_falhas', 'ultima_rajada',
+        'suprimido_por', 'soma_pings', 'quantidade_pings', 'min_ping', 'max_ping', 'saltos',
+        'alteracoes_caminho'
+    )
+
+    def exportar_estado(self):
+        """Retorna o estado do host, sem o histórico. Chamar com o lock."""
+        estado = {campo: getattr(self, campo) for campo in self.CAMPOS_ESTADO}
+        estado['ultima_falha'] = self.ultima_falha.isoformat() if self.ultima_falha else None  # JSON
+        return estado
+
+    def exportar_historico(self, tamanho_historico):
+        """Retorna os últimos `tamanho_historico` resultados. Chamar com o lock."""
+        inicio = max(0, len(self.historico) - tamanho_historico)
+        return list(itertools.islice(self.historico, inicio, None))
+
+    def restaurar_estado(self, estado, manter_ultima_falha=True):
+        """Restaura o estado exportado por `exportar_estado` e atualiza o snapshot.
+
+        Sem `manter_ultima_falha`, a falha em andamento não é retomada: o tempo em que o
+        monitor ficou parado não entra em `tempo_total_falhas` nem na duração da falha.
+        """
+        for campo in self.CAMPOS_ESTADO:
+            if campo in estado:
+                setattr(self, campo, estado[campo])
+        if self.ultima_falha and manter_ultima_falha:
+            self.ultima_falha = datetime.fromisoformat(self.ultima_falha)
         else:
             self.ultima_falha = None
+        self.atualizar_snapshot()
+
+    def restaurar_historico(self, historico):
+        """Coloca o histórico gravado antes dos resultados já registrados nesta execução. Chamar com o lock."""
+        recentes = list(self.historico)
+        self.historico.clear()
+        self.historico.extend(historico)
+        self.historico.extend(recentes)
             
     def deve_notificar(self):
         """Verifica se deve enviar uma nova notificação."""
@@ -62,170 +180,841 @@ class MonitorHost:
 
 
 class MonitorMultiplosHosts:
-    def __init__(self):
+    def __init__(self, arquivo_config=CONFIG_FILE):
         """Inicializa o monitoramento de múltiplos hosts."""
         self.hosts = {}
         self.running = False
-        self.threads = []
+        self.evento_parada = threading.Event()  # Acorda todas as esperas ao parar o monitoramento
+        self.threads = {}
         self.lock = threading.Lock()
-        self.historico = self.carregar_historico()
+        self.novo_resultado = threading.Condition(self.lock)  # Notificada a cada resultado registrado
+        self.registro = RegistroHosts(HISTORICO_FILE)
+        self.motor = MotorSondas()  # Event loop compartilhado por todas as sondas
         
-        self.config = Configuracao()  # Mantenha a instância da configuração, mas não atualize ainda
+        self.config = Configuracao(arquivo_config)  # Mantenha a instância da configuração, mas não atualize ainda
+        self.configs = {}
+        self.observador_config = None
+        self.api = None
+        self.detector = None
+        self.thread_anomalias = None
+        self.armazenamento = None
+        self.armazenamento_saltos = None  # Estatísticas por (host, salto) do modo caminho
+        self.ponto_restauracao = None
+        self.caixa_saida = None
+        self.aguardando_vaga = {}  # Hosts acima de max_hosts, em ordem de chegada
+        self.tarefas_caminho = {}  # host -> futuro da tarefa do modo caminho no event loop do motor
+        self.dependencias = MapaDependencias()
+        # Log de alterações (versão, host) usado para enviar apenas o que mudou
+        self.alteracoes = deque(maxlen=100000)
+        self.versao_atual = 0
 
     def atualizar_configuracoes(self):
         """Atualiza todas as configurações e recria o notificador."""
         configs = self.config.carregar_configuracoes()
         self.notificador = configurar_notificacoes(configs)
+        self.notificador.obter_log = self.log_notificacoes
+        self.configs = configs
         self.intervalo_ping = self.config.intervalo_ping
         self.max_hosts = self.config.max_hosts
+        self.pacotes_por_ciclo = self.config.pacotes_por_ciclo
+        self.intervalo_rajada = self.config.intervalo_rajada
+        self.fator_intervalo_dependente = self.config.fator_intervalo_dependente
+        self.dependencias.atualizar(self.config.dependencias)
         self.tipos_notificacao = self.config.tipos_notificacao
 
-    def carregar_historico(self):
-        """Carrega o histórico de hosts monitorados."""
-        if os.path.exists(HISTORICO_FILE):
-            try:
-                with open(HISTORICO_FILE, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+    def criar_monitor(self, host, intervalo_ping=None, caminho=False):
+        """Cria e registra o MonitorHost de um host. Chamar com o lock."""
+        monitor = MonitorHost(host, intervalo_ping, self.config.tamanho_historico, caminho)
+        self.hosts[host] = monitor
+        self.registrar_alteracao(host, monitor.versao)
+        return monitor
+
+    def adicionar_hosts_configurados(self):
+        """Adiciona ao monitoramento os hosts definidos no arquivo de configuração."""
+        with self.lock:
+            for host, opcoes in normalizar_hosts(self.config.hosts).items():
+                if host not in self.hosts:
+                    self.criar_monitor(host, opcoes.get('intervalo_ping'), opcoes.get('caminho', False))
+
+    def recarregar_configuracoes(self):
+        """Recarrega o config.json aplicando apenas as diferenças, sem reiniciar o monitoramento."""
+        novas = self.config.carregar_configuracoes()
+        antigas = self.configs
+        diferencas = calcular_diferencas(antigas, novas)
+
+        # Recria apenas os notificadores recém-ativados ou cujas credenciais mudaram. O dicionário
+        # é montado à parte e trocado sob o lock: o ponto de restauração e o encerramento o percorrem
+        notificadores = dict(self.notificador.notificadores)
+        for tipo in notificadores_alterados(antigas, novas):
+            notificadores[tipo] = criar_notificador(tipo, novas)
+        for tipo in set(tipos_ativos(antigas)) - set(tipos_ativos(novas)):
+            notificadores.pop(tipo, None)
+        with self.lock:
+            self.notificador.notificadores = notificadores
+
+        self.configs = novas
+        self.intervalo_ping = self.config.intervalo_ping
+        self.max_hosts = self.config.max_hosts
+        self.pacotes_por_ciclo = self.config.pacotes_por_ciclo
+        self.intervalo_rajada = self.config.intervalo_rajada
+        self.fator_intervalo_dependente = self.config.fator_intervalo_dependente
+        self.dependencias.atualizar(self.config.dependencias)
+        self.tipos_notificacao = self.config.tipos_notificacao
+
+        for host in diferencas['removidos']:
+            self.remover_host(host, manter_historico=True)
+            print(f"Host {host} removido pela configuração.")
+
+        with self.lock:
+            if self.running:
+                self.iniciar_pendentes()  # O limite de hosts pode ter aumentado
+
+            saltos_descartados = []
+            for host in diferencas['alterados']:
+                if host in self.hosts:
+                    monitor = self.hosts[host]
+                    monitor.intervalo_ping = diferencas['opcoes'][host].get('intervalo_ping')
+                    caminho = diferencas['opcoes'][host].get('caminho', False)
+                    if monitor.caminho and not caminho:
+                        # Sem o modo caminho, os saltos e suas estatísticas deixam de valer
+                        self.parar_caminho(host)
+                        saltos_descartados.append((host, len(monitor.saltos)))
+                        monitor.saltos = []
+                        monitor.ciclos_caminho = 0
+                    monitor.caminho = caminho
+                    monitor.despertar.set()  # A espera em andamento passa a usar o novo intervalo
+                    if monitor.atualizar_snapshot():
+                        self.registrar_alteracao(host, monitor.versao)
+
+            for host in diferencas['adicionados']:
+                if host not in self.hosts:
+                    self.criar_monitor(
+                        host,
+                        diferencas['opcoes'][host].get('intervalo_ping'),
+                        diferencas['opcoes'][host].get('caminho', False)
+                    )
+                    print(f"Host {host} adicionado pela configuração.")
+                    if self.running and not self.iniciar_thread(host):
+                        print(f"Host {host} aguardando vaga: limite de {self.max_hosts} hosts monitorados.")
+
+        for host, quantidade in saltos_descartados:
+            self.descartar_saltos(host, quantidade)
 
     def adicionar_ao_historico(self, host):
-        """Adiciona um host ao histórico, evitando duplicatas."""
-        if host not in self.historico:
-            self.historico.insert(0, host)  # Adiciona no início da lista
-            if len(self.historico) > 9:  # Mantém apenas os 9 últimos
-                self.historico.pop()
-        elif host in self.historico:  # Se já existe, move para o topo
-            self.historico.remove(host)
-            self.historico.insert(0, host)
-        self.salvar_historico()  # Salva o histórico
-
-    def salvar_historico(self):
-        """Salva o histórico de hosts monitorados."""
-        with open(HISTORICO_FILE, 'w') as f:
-            json.dump(self.historico, f)
+        """Adiciona um host ao histórico, movendo-o para o topo se já existir."""
+        self.registro.marcar_recente(host)  # A gravação em disco é agrupada pelo registro
 
     def adicionar_host(self, hosts):
         """Adiciona um ou mais hosts ao monitoramento."""
-        for host in hosts:
-            if host not in self.hosts:
-                self.hosts[host] = MonitorHost(host)
-                print(f"Host {host} adicionado para monitoramento.")
-            else:
-                print(f"Host {host} já está sendo monitorado.")
+        detalhar = len(hosts) <= 9  # Evita poluir o console em importações grandes
+        adicionados = 0
+        with self.lock:
+            for host in hosts:
+                if host not in self.hosts:
+                    self.criar_monitor(host)
+                    adicionados += 1
+                    if detalhar:
+                        print(f"Host {host} adicionado para monitoramento.")
+                elif detalhar:
+                    print(f"Host {host} já está sendo monitorado.")
+        if not detalhar:
+            print(f"{adicionados} hosts adicionados para monitoramento.")
 
-    def remover_host(self, host):
-        """Remove um host do monitoramento e do histórico."""
+    def remover_host(self, host, manter_historico=False):
+        """Remove um host do monitoramento e, opcionalmente, do histórico."""
         with self.lock:
-            if host in self.hosts:
-                del self.hosts[host]
-                self.historico.remove(host)
-                self.salvar_historico()
+            if host not in self.hosts:
+                return
+            # O thread do host encerra sozinho ao perceber que foi removido
+            monitor = self.hosts.pop(host)
+            monitor.despertar.set()
+            self.novo_resultado.notify_all()  # Filhos aguardando este host deixam de esperar
+            saltos = len(monitor.saltos)
+            self.parar_caminho(host)
+            self.aguardando_vaga.pop(host, None)
+            if self.threads.pop(host, None) and self.running:
+                self.iniciar_pendentes()  # A vaga liberada vai para o próximo host na espera
+            self.registrar_alteracao(host, next(MonitorHost._versoes))
+            if not manter_historico:
+                self.registro.remover(host)
+        if self.armazenamento:
+            self.armazenamento.remover(host)
+        self.descartar_saltos(host, saltos)
+        if self.detector:
+            self.detector.remover(host)
+        GerenciadorLog.liberar_instancia(host)  # Fora do lock: aguarda o thread de log
 
     def verificar_ping(self, host):
-        """Verifica o ping para um host específico."""
-        param = '-n' if platform.system().lower() == 'windows' else '-c'
-        
-        try:
-            comando = ['ping', param, '1', host]
-            encoding = 'cp1252' if platform.system().lower() == 'windows' else 'utf-8'
-            resultado = subprocess.check_output(comando, timeout=5).decode(encoding)
-            
-            if platform.system().lower() == 'windows':
-                if 'tempo=' in resultado:
-                    ms = float(resultado.split('tempo=')[1].split('ms')[0].strip())
-                    return ms, "Sucesso"
-            else:
-                if 'time=' in resultado:
-                    ms = float(resultado.split('time=')[1].split('ms')[0].strip())
-                    return ms, "Sucesso"
-                    
-            return None, "Timeout"
-        except subprocess.TimeoutExpired:
-            return None, "Timeout"
-        except subprocess.CalledProcessError:
-            return None, "Falha na conexão"
-        except Exception as e:
-            return None, f"Erro: {str(e)}"
+        """Verifica um host com a sonda do seu tipo (ICMP, TCP, HTTP(S) ou UDP)."""
+        return self.motor.sondar(host)
+
+    def verificar_rajada(self, host):
+        """Envia uma rajada de sondas ao host e retorna o resultado agregado do ciclo."""
+        return self.motor.sondar_rajada(
+            host, self.pacotes_por_ciclo, self.intervalo_rajada, self.config.limiar_perda_rajada
+        )
+
+    def iniciar_caminho(self, host, monitor):
+        """Inicia a tarefa do modo caminho do host no event loop do motor, se ainda não estiver ativa."""
+        tarefa = self.tarefas_caminho.get(host)
+        if tarefa is None or tarefa.done():
+            self.tarefas_caminho[host] = self.motor.executar_em_segundo_plano(self.monitorar_caminho(host, monitor))
+
+    def parar_caminho(self, host):
+        """Cancela a tarefa do modo caminho do host, se houver."""
+        tarefa = self.tarefas_caminho.pop(host, None)
+        if tarefa:
+            tarefa.cancel()
+
+    async def monitorar_caminho(self, host, monitor):
+        """Sonda em paralelo os saltos até o host, redescobrindo-os periodicamente (modo caminho).
+
+        Executa como tarefa própria no event loop do motor: a descoberta (vários lotes de
+        TTL) não atrasa as sondas do host no seu thread de monitoramento. O que toma locks
+        disputados por outros threads roda no executor, sem bloquear o event loop.
+        """
+        loop = asyncio.get_running_loop()
+        while self.running and monitor.caminho and self.hosts.get(host) is monitor:
+            if not monitor.saltos or monitor.ciclos_caminho >= self.config.ciclos_descoberta_caminho:
+                monitor.ciclos_caminho = 0
+                try:
+                    saltos = await self.motor.descobrir_caminho_async(host, self.config.max_saltos)
+                except (OSError, asyncio.TimeoutError, ValueError):
+                    saltos = []
+                if saltos:
+                    await loop.run_in_executor(None, self.atualizar_saltos, host, monitor, saltos)
+            monitor.ciclos_caminho += 1
+            if monitor.saltos:
+                saltos = monitor.saltos
+                resultados = await self.motor.sondar_caminho_async(saltos)
+                await loop.run_in_executor(None, self.registrar_saltos, host, monitor, saltos, resultados)
+            await asyncio.sleep(monitor.intervalo_ping or self.intervalo_ping)
+
+    def descartar_saltos(self, host, quantidade):
+        """Remove do armazenamento as estatísticas dos `quantidade` primeiros saltos do host."""
+        if self.armazenamento_saltos:
+            for ttl in range(1, quantidade + 1):
+                self.armazenamento_saltos.remover((host, ttl))
+
+    def atualizar_saltos(self, host, monitor, saltos):
+        """Aplica uma nova descoberta de saltos, registrando no log se a rota mudou."""
+        anteriores = monitor.saltos
+        gerenciador_log = self._log_host_monitorado(host)
+        if gerenciador_log is None:
+            return  # Host removido durante a descoberta: não recria o log liberado
+        if caminho_alterado(anteriores, saltos):
+            monitor.alteracoes_caminho += 1
+            gerenciador_log.registrar_log({
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'tipo': 'caminho_alterado',
+                'host': host,
+                'anterior': anteriores,
+                'novo': saltos
+            })
+
+        # Estatísticas de um salto cujo endereço mudou não valem para o novo endereço
+        if self.armazenamento_saltos:
+            for ttl in range(1, max(len(anteriores), len(saltos)) + 1):
+                antigo = anteriores[ttl - 1] if ttl <= len(anteriores) else None
+                novo = saltos[ttl - 1] if ttl <= len(saltos) else None
+                if antigo != novo:
+                    self.armazenamento_saltos.remover((host, ttl))
+
+        with self.lock:
+            if not monitor.caminho:
+                return  # Modo caminho desativado durante a descoberta
+            monitor.saltos = saltos
+            if self.hosts.get(host) is monitor and monitor.atualizar_snapshot():
+                self.registrar_alteracao(host, monitor.versao)
+
+    def registrar_saltos(self, host, monitor, saltos, resultados):
+        """Grava no armazenamento colunar o resultado de cada salto (de `saltos`) que responde."""
+        if not self.armazenamento_saltos or saltos is not monitor.saltos:
+            return  # Saltos redescobertos ou descartados durante a sonda
+        for ttl, (endereco, (ms, status)) in enumerate(zip(saltos, resultados), 1):
+            if endereco is not None:
+                self.armazenamento_saltos.registrar((host, ttl), ms if status == "Sucesso" else None, status == "Sucesso")
+
+    def obter_caminho(self, host):
+        """Retorna os saltos até o host com as estatísticas recentes de cada um (modo caminho)."""
+        monitor = self.hosts.get(host)
+        if monitor is None or not monitor.saltos:
+            return []
+        saltos = list(monitor.saltos)
+        agregados = {}
+        if self.armazenamento_saltos:
+            agregados = self.armazenamento_saltos.calcular_agregados([(host, ttl) for ttl in range(1, len(saltos) + 1)])
+        return [
+            {'salto': ttl, 'endereco': endereco, **agregados.get((host, ttl), {})}
+            for ttl, endereco in enumerate(saltos, 1)
+        ]
 
     def monitor_thread(self, host):
         """Thread para monitorar um host específico."""
         gerenciador_log = GerenciadorLog.get_instance(host)
+        monitor: MonitorHost = self.hosts.get(host)
         
-        while self.running:
-            ms, status = self.verificar_ping(host)
+        # Encerra quando o monitoramento para ou quando o host é removido/substituído
+        while self.running and monitor is not None and self.hosts.get(host) is monitor:
+            rajada = None
+            if self.pacotes_por_ciclo > 1:
+                rajada = self.verificar_rajada(host)
+                ms, status = rajada['ping'], rajada['status']
+            else:
+                ms, status = self.verificar_ping(host)
+            if monitor.caminho:
+                self.iniciar_caminho(host, monitor)  # Também quando ativado por recarregamento
+            if self.evento_parada.is_set():
+                break  # Sonda cancelada pelo encerramento: não é um resultado real
             
+            alerta = None  # (mensagem, título) decidido sob o lock e enfileirado depois dele
             with self.lock:
-                monitor: MonitorHost = self.hosts[host]
-                monitor.adicionar_resultado(ms, status)
+                if self.hosts.get(host) is not monitor:
+                    break
+                if monitor.adicionar_resultado(ms, status, rajada):
+                    self.registrar_alteracao(host, monitor.versao)
+                self.novo_resultado.notify_all()
+                if self.armazenamento:
+                    self.armazenamento.registrar(
+                        host,
+                        ms if status == "Sucesso" else None,
+                        status == "Sucesso",
+                        rajada['enviados'] if rajada else 1,
+                        rajada['recebidos'] if rajada else None
+                    )
+                if self.detector:
+                    self.detector.registrar(host, ms if status == "Sucesso" else None)
                 
-                gerenciador_log.registrar_log({
+                log_entry = {
                     'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     'host': host,
                     'ping': ms,
                     'status': status
-                })
+                }
+                if rajada:
+                    log_entry.update({chave: rajada[chave] for chave in ('min', 'max', 'jitter', 'perda')})
+                gerenciador_log.registrar_log(log_entry)
+
+                if monitor.falhas_consecutivas == 1:
+                    # Início da falha: o pai pode ter caído no mesmo ciclo, com a sonda ainda em andamento
+                    self.aguardar_resultado_pais(host, monitor)
+                    if self.hosts.get(host) is not monitor or self.evento_parada.is_set():
+                        break
                 
-                if monitor.deve_notificar():
+                # Com um pai em falha, o alerta deste host é suprimido (causa raiz já alertada)
+                pai_em_falha = self.dependencias.pai_em_falha(host, self.hosts)
+                if pai_em_falha != monitor.suprimido_por:
+                    monitor.suprimido_por = pai_em_falha
+                    if pai_em_falha:
+                        gerenciador_log.registrar_log({
+                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            'tipo': 'alerta_suprimido',
+                            'host': host,
+                            'pai': pai_em_falha
+                        })
+
+                pai_pendente = self.dependencias.pai_em_falha(
+                    host, self.hosts, self.config.carencia_pai_pendente
+                )
+                if monitor.deve_notificar() and not pai_pendente:
                     mensagem = f"Falha detectada no host {host}\nStatus: {status}"
                     titulo = f"Alerta de Conexão - {host}"
-                    
-                    resultados = self.notificador.enviar_notificacao(
-                        mensagem=mensagem,
-                        titulo=titulo,
-                        tipos=self.tipos_notificacao,
-                        host=host
-                    )
-                    
-                    gerenciador_log.registrar_log_notificacao(resultados)
-            
-            time.sleep(self.intervalo_ping)
+                    dependentes = self.dependencias.descendentes_em_falha(host, self.hosts)
+                    if dependentes:
+                        mensagem += f"\nHosts dependentes em falha: {len(dependentes)} (alertas suprimidos)"
+                    alerta = mensagem, titulo
+
+            if alerta:
+                # Enviado pelos threads de envio: um canal lento (SMTP, HTTP) não atrasa as sondas
+                self.notificador.enfileirar(
+                    mensagem=alerta[0],
+                    titulo=alerta[1],
+                    tipos=self.tipos_notificacao,
+                    host=host,
+                    estado='falha'
+                )
+
+            self.aguardar_proximo_ciclo(host, monitor)
+
+    def aguardar_resultado_pais(self, host, monitor):
+        """Aguarda um novo resultado dos ancestrais monitorados que ainda estão com sucesso. Chamar com o lock.
+
+        Pai e filho usam o mesmo timeout de sonda: quando caem juntos, a sonda do filho pode
+        terminar antes e ele alertaria sem saber da falha do pai. A espera libera o lock e dura
+        no máximo um intervalo do pai mais a duração de uma sonda.
+        """
+        pais = [
+            self.hosts[ancestral] for ancestral in self.dependencias.ancestrais(host)
+            if ancestral in self.hosts and self.hosts[ancestral].status == "Sucesso"
+        ]
+        if not pais:
+            return
+        marcas = [(pai, pai.resultados) for pai in pais]
+        duracao_sonda = self.motor.timeout
+        if self.pacotes_por_ciclo > 1:
+            duracao_sonda += self.pacotes_por_ciclo * self.intervalo_rajada
+        prazo = max(
+            (pai.intervalo_ping or self.intervalo_ping) * (self.fator_intervalo_dependente if pai.suprimido_por else 1)
+            for pai in pais
+        ) + duracao_sonda
+        self.novo_resultado.wait_for(
+            lambda: self.evento_parada.is_set() or self.hosts.get(host) is not monitor or all(
+                pai.resultados > marca or self.hosts.get(pai.host) is not pai for pai, marca in marcas
+            ),
+            prazo
+        )
+
+    def aguardar_proximo_ciclo(self, host, monitor):
+        """Aguarda o intervalo do host até a próxima sonda.
+
+        Quando o host é acordado (ex: intervalo alterado por recarregamento) o prazo é
+        recalculado a partir do início da espera, em vez de cumprir o intervalo antigo.
+        """
+        inicio = time.monotonic()
+        while self.running and self.hosts.get(host) is monitor:
+            intervalo = monitor.intervalo_ping or self.intervalo_ping
+            if monitor.suprimido_por:
+                # Reduz a frequência das sondas enquanto o pai estiver em falha
+                intervalo *= self.fator_intervalo_dependente
+            restante = inicio + intervalo - time.monotonic()
+            if restante <= 0 or not monitor.despertar.wait(restante):
+                return
+            monitor.despertar.clear()
+
+    def iniciar_thread(self, host):
+        """Inicia o thread de monitoramento de um host, respeitando o limite de hosts.
+
+        Acima de `max_hosts` o host aguarda uma vaga e é iniciado por `iniciar_pendentes`.
+        Retorna False se o host ficou aguardando.
+        """
+        if host in self.threads:
+            return True
+        if self.max_hosts and len(self.threads) >= self.max_hosts:
+            if host not in self.aguardando_vaga:
+                self.aguardando_vaga[host] = None
+                GerenciadorLog.get_instance().registrar_log({
+                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'tipo': 'limite_hosts',
+                    'host': host,
+                    'limite': self.max_hosts
+                })
+            return False
+        self.aguardando_vaga.pop(host, None)
+        thread = threading.Thread(target=self.monitor_thread, args=(host,))
+        thread.daemon = True
+        self.threads[host] = thread
+        thread.start()
+        return True
+
+    def iniciar_pendentes(self):
+        """Inicia, na ordem de chegada, os hosts que aguardavam vaga no limite de hosts."""
+        for host in list(self.aguardando_vaga):
+            if host not in self.hosts:
+                self.aguardando_vaga.pop(host, None)
+            elif not self.iniciar_thread(host):
+                break
 
     def iniciar_monitoramento(self):
         """Inicia o monitoramento de todos os hosts."""
+        GerenciadorLog.reabrir()  # Um encerramento anterior bloqueia novas instâncias de log
         self.atualizar_configuracoes()  # Mova a atualização de configurações para cá
+        self.adicionar_hosts_configurados()
+        self.motor.iniciar()
+
+        # Notificações que falharam (inclusive em execuções anteriores) são reenviadas em segundo plano
+        if self.config.diretorio_caixa_saida:
+            self.caixa_saida = CaixaSaida(
+                self.config.diretorio_caixa_saida,
+                self.reenviar_notificacao,
+                self.config.tentativas_notificacao,
+                self.config.atraso_reenvio,
+                self.config.atraso_maximo_reenvio,
+                maximo_pendentes=self.config.maximo_notificacoes_pendentes,
+                maximo_mortas=self.config.maximo_notificacoes_mortas
+            )
+            self.notificador.caixa_saida = self.caixa_saida
+            self.caixa_saida.iniciar()
+        self.notificador.iniciar_envios()
+
+        # Retoma estatísticas e limitadores da execução anterior antes da primeira sonda
+        estado = None
+        if self.config.intervalo_estado:
+            estado = carregar_estado(self.config.arquivo_estado, self.config.idade_maxima_estado)
+        restaurados = self.restaurar_estado(estado) if estado else []
+
+        self.evento_parada.clear()
         self.running = True
         
-        for host in list(self.hosts.keys())[:self.max_hosts]:
-            thread = threading.Thread(target=self.monitor_thread, args=(host,))
-            thread.daemon = True
-            self.threads.append(thread)
-            thread.start()
+        with self.lock:
+            for host in list(self.hosts.keys()):
+                self.iniciar_thread(host)
+            if self.aguardando_vaga:
+                print(f"{len(self.aguardando_vaga)} hosts aguardando vaga: limite de {self.max_hosts} hosts "
+                      f"monitorados (max_hosts). Serão iniciados quando outros hosts forem removidos.")
+
+        # Importar o NumPy leva dezenas de ms: as análises são criadas com as sondas já em andamento
+        self.iniciar_analises(estado, restaurados)
+
+        # Observa o config.json para aplicar alterações sem reiniciar
+        self.observador_config = ObservadorArquivo(
+            self.config.CONFIG_FILE,
+            self.recarregar_configuracoes,
+            self.config.intervalo_recarregamento
+        )
+        self.observador_config.iniciar()
+
+        # API local de estatísticas ao vivo, se configurada
+        if self.config.api_porta is not None:
+            from api import ServidorAPI  # http.server só é importado quando a API está ativa
+            self.api = ServidorAPI(
+                self,
+                self.config.api_endereco,
+                self.config.api_porta,
+                self.config.api_intervalo_eventos
+            )
+            self.api.iniciar()
+            print(f"API de estatísticas em http://{self.api.endereco}:{self.api.porta}/estatisticas")
+
+        # Gravação periódica do estado em segundo plano, fora dos threads de monitoramento
+        if self.config.intervalo_estado:
+            self.ponto_restauracao = PontoRestauracao(
+                self.config.arquivo_estado,
+                self.capturar_estado,
+                self.config.intervalo_estado
+            )
+            self.ponto_restauracao.iniciar()
+
+    def reenviar_notificacao(self, tipo, host, titulo, mensagem):
+        """Reenvia uma notificação da caixa de saída pelo gerenciador de notificações atual."""
+        return self.notificador.reenviar(tipo, host, titulo, mensagem)
+
+    def capturar_estado(self):
+        """Captura (estado, arrays NumPy) dos hosts, notificadores e análises para o ponto de restauração."""
+        # Uma única aquisição do lock: apenas cópias rasas aqui, a serialização ocorre fora dele.
+        # Adquirir o lock por host, disputando com milhares de threads, é muito mais lento.
+        with self.lock:
+            estado = {
+                'hosts': {host: monitor.exportar_estado() for host, monitor in self.hosts.items()},
+                'notificadores': self.notificador.exportar_estado(),
+            }
+            historicos = {
+                host: monitor.exportar_historico(self.config.historico_estado) for host, monitor in self.hosts.items()
+            }
+        # O histórico vai para o .npz em colunas; sem o NumPy, só as estatísticas são gravadas
+        try:
+            estado['historico'], arrays = dividir_historico(historicos)
+        except ImportError:
+            arrays = None
+        analises = {}
+        if self.armazenamento:
+            analises['armazenamento'] = self.armazenamento.exportar()
+            analises['armazenamento_saltos'] = self.armazenamento_saltos.exportar()
+        if self.detector:
+            analises['detector'] = self.detector.exportar()
+        if analises:
+            # Arrays NumPy gravados à parte, em .npz: carregar o ponto de restauração não importa
+            # o NumPy, e as primeiras sondas não esperam por ele
+            estado['analises'], arrays_analises = dividir_analises(analises)
+            arrays.update(arrays_analises)
+        return estado, arrays
+
+    def restaurar_estado(self, estado):
+        """Restaura os hosts monitorados e os notificadores de um ponto de restauração. Retorna os hosts restaurados."""
+        inicio = time.perf_counter()
+        idade = time.time() - estado['gravado_em']
+        with self.lock:
+            restaurados = [host for host in estado['hosts'] if host in self.hosts]
+            for host in restaurados:
+                monitor = self.hosts[host]
+                # Uma falha só continua se o monitor ficou parado menos que um intervalo do host
+                monitor.restaurar_estado(
+                    estado['hosts'][host],
+                    manter_ultima_falha=idade <= (monitor.intervalo_ping or self.intervalo_ping)
+                )
+                self.registrar_alteracao(host, monitor.versao)
+            self.notificador.restaurar_estado(estado['notificadores'])
+
+        duracao = (time.perf_counter() - inicio) * 1000
+        print(f"Estado de {len(restaurados)} hosts restaurado em {duracao:.0f}ms")
+        return restaurados
+
+    def iniciar_analises(self, estado=None, restaurados=()):
+        """Cria o armazenamento colunar e o detector de anomalias (NumPy), restaurando seus arrays."""
+        # Latências recentes de todos os hosts em arrays NumPy, para agregados e rankings da frota
+        try:
+            from armazenamento import ArmazenamentoColunar
+            armazenamento = ArmazenamentoColunar(self.config.janela_armazenamento)
+            armazenamento_saltos = ArmazenamentoColunar(self.config.janela_armazenamento, capacidade=64)
+        except ImportError:
+            print("NumPy não está instalado; agregados da frota desativados. Use: pip install numpy")
+            armazenamento = armazenamento_saltos = None
+
+        # Detecção de latência degradada, avaliada em lote para todos os hosts
+        detector = None
+        if self.config.deteccao_anomalias:
+            try:
+                from anomalias import DetectorAnomalias
+                detector = DetectorAnomalias(limiar_z=self.config.limiar_z_anomalias)
+            except ImportError:
+                print("NumPy não está instalado; detecção de anomalias desativada. Use: pip install numpy")
+
+        analises = {}
+        historicos = {}
+        if estado and (estado.get('analises') or estado.get('historico')):
+            # Arrays ausentes ou ilegíveis resultam em análises reiniciadas, sem impedir o monitoramento
+            arrays = carregar_arrays(self.config.arquivo_estado, estado['gravado_em'])
+            analises = juntar_analises(estado.get('analises', {}), arrays)
+            historicos = juntar_historico(estado.get('historico', []), arrays)
+        # Hosts que não são mais monitorados ficam de fora dos arrays
+        permitidos = set(restaurados)
+        if historicos:
+            with self.lock:
+                for host in permitidos & historicos.keys():
+                    if host in self.hosts:
+                        self.hosts[host].restaurar_historico(historicos[host])
+        if armazenamento and 'armazenamento' in analises:
+            armazenamento.restaurar(*analises['armazenamento'], permitidos)
+        if armazenamento_saltos and 'armazenamento_saltos' in analises:
+            chaves, colunas = analises['armazenamento_saltos']
+            armazenamento_saltos.restaurar(chaves, colunas, {chave for chave in chaves if chave[0] in permitidos})
+        if detector and 'detector' in analises:
+            detector.restaurar(*analises['detector'], permitidos)
+
+        # Publicados só depois de restaurados; os threads passam a registrar a partir daqui
+        self.armazenamento_saltos = armazenamento_saltos
+        self.armazenamento = armazenamento
+        self.detector = detector
+        if self.detector:
+            self.thread_anomalias = threading.Thread(target=self.monitorar_anomalias, daemon=True)
+            self.thread_anomalias.start()
+
+    def monitorar_anomalias(self):
+        """Thread que avalia periodicamente a latência de todos os hosts."""
+        while not self.evento_parada.wait(self.config.intervalo_anomalias):
+            self.avaliar_anomalias()
+
+    def _log_host_monitorado(self, host):
+        """Retorna o log do host, ou None se ele foi removido (sem recriar a instância liberada)."""
+        # Sob o lock: remover_host retira o host do dicionário antes de liberar o log
+        with self.lock:
+            return GerenciadorLog.get_instance(host) if host in self.hosts else None
+
+    def log_notificacoes(self, host):
+        """Log dos envios para o host: o do próprio host, ou o geral se ele não é mais monitorado."""
+        # Reenvios da caixa de saída podem chegar depois da remoção; não recriam o log do host
+        return self._log_host_monitorado(host) or GerenciadorLog.get_instance()
+
+    def avaliar_anomalias(self):
+        """Avalia a latência de todos os hosts e alerta os que ficaram degradados."""
+        degradados, recuperados = self.detector.avaliar()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        for host, ping, media, desvio in degradados:
+            gerenciador_log = self._log_host_monitorado(host)
+            if gerenciador_log is None:
+                continue
+            gerenciador_log.registrar_log({
+                'timestamp': timestamp,
+                'tipo': 'latencia_degradada',
+                'host': host,
+                'ping': round(ping, 1),
+                'media': round(media, 1)
+            })
+            # Hosts atrás de um pai em falha já são cobertos pelo alerta de causa raiz
+            if self.dependencias.pai_em_falha(host, self.hosts):
+                continue
+            self.notificador.enfileirar(
+                mensagem=(f"Latência degradada no host {host}\n"
+                          f"Atual: {ping:.1f}ms - Normal: {media:.1f}ms (±{desvio:.1f}ms)"),
+                titulo=f"Latência Degradada - {host}",
+                tipos=self.tipos_notificacao,
+                host=host,
+                estado='latencia_degradada'
+            )
+
+        for host, ping, media, _ in recuperados:
+            gerenciador_log = self._log_host_monitorado(host)
+            if gerenciador_log is None:
+                continue
+            gerenciador_log.registrar_log({
+                'timestamp': timestamp,
+                'tipo': 'latencia_normalizada',
+                'host': host,
+                'ping': round(ping, 1),
+                'media': round(media, 1)
+            })
 
     def parar_monitoramento(self):
-        """Para o monitoramento de todos os hosts."""
+        """Para o monitoramento de todos os hosts.
+
+        As esperas e as sondas em andamento são interrompidas imediatamente; logs e
+        notificações pendentes são gravados em até `prazo_encerramento` segundos.
+        Retorna um resumo do encerramento, inclusive o que precisou ser descartado.
+        """
+        inicio = time.monotonic()
+        fim = inicio + self.config.prazo_encerramento
+
+        def restante():
+            return max(0, fim - time.monotonic())
+
         self.running = False
-        for thread in self.threads:
-            thread.join()
+        self.evento_parada.set()
+        with self.lock:
+            for monitor in self.hosts.values():
+                monitor.despertar.set()
+            self.novo_resultado.notify_all()
+        self.motor.cancelar_pendentes()
+        if self.observador_config:
+            self.observador_config.parar()
+        if self.api:
+            self.api.parar()
+            self.api = None
+
+        # Threads ainda ocupados (ex: envio de notificação) são abandonados ao fim do prazo
+        threads = list(self.threads.values())
+        if self.thread_anomalias:
+            threads.append(self.thread_anomalias)
+        for thread in threads:
+            thread.join(restante())
+        threads_pendentes = sum(thread.is_alive() for thread in threads)
         self.threads.clear()
-        
-    def obter_estatisticas(self):
-        """Retorna estatísticas de todos os hosts monitorados."""
-        estatisticas = {}
+        self.tarefas_caminho.clear()  # Canceladas com as sondas pendentes
+        self.thread_anomalias = None
+        # Alertas já enfileirados são enviados dentro do prazo; envios que falharem vão para a caixa de saída
+        gerenciador = getattr(self, 'notificador', None)
+        notificacoes_pendentes = gerenciador.parar_envios(restante()) if gerenciador else 0
+
+        if self.caixa_saida:
+            self.caixa_saida.parar(restante())
+            self.caixa_saida = None
+        if self.ponto_restauracao:
+            # Com os threads parados, o estado final é gravado sem concorrência
+            if not self.ponto_restauracao.parar(prazo=restante()):
+                print("Ponto de restauração não gravado no prazo de encerramento; mantido o anterior")
+            self.ponto_restauracao = None
+        self.motor.parar(restante())
+        self.registro.gravar()  # Garante que alterações pendentes no registro sejam salvas
+
+        # Logs que os notificadores ainda não repassaram vão para o log geral
         with self.lock:
-            for host, monitor in self.hosts.items():
-                pings = [h['ping'] for h in monitor.historico if h['ping'] is not None]
-                estatisticas[host] = {
-                    'último_ping': monitor.ultimo_ping,
-                    'status': monitor.status,
-                    'média_ping': sum(pings) / len(pings) if pings else 0,
-                    'min_ping': min(pings) if pings else 0,
-                    'max_ping': max(pings) if pings else 0,
-                    'total_falhas': monitor.falhas,
-                    'tempo_total_falhas': monitor.tempo_total_falhas,
-                    'última_falha': monitor.ultima_falha.strftime("%Y-%m-%d %H:%M:%S") if monitor.ultima_falha else None
+            notificadores = list(gerenciador.notificadores.values()) if gerenciador else []
+        for notificador in notificadores:
+            if notificador.log_queue.qsize():
+                notificador.descarregar_logs(GerenciadorLog.get_instance())
+
+        logs_descartados, logs_nao_gravados = GerenciadorLog.parar_todas(restante())
+        resumo = {
+            'duracao_ms': round((time.monotonic() - inicio) * 1000, 1),
+            'threads_pendentes': threads_pendentes,
+            'logs_descartados': logs_descartados,
+            'logs_nao_gravados': logs_nao_gravados,
+            'notificacoes_pendentes': notificacoes_pendentes,
+        }
+        if threads_pendentes or logs_descartados or logs_nao_gravados or notificacoes_pendentes:
+            print(f"Encerramento em {resumo['duracao_ms']:.0f}ms - Threads não finalizados: {threads_pendentes} - "
+                  f"Logs descartados (fila cheia): {logs_descartados} - Logs não gravados: {logs_nao_gravados} - "
+                  f"Notificações não enviadas: {notificacoes_pendentes}")
+        return resumo
+        
+    def obter_estatisticas(self, top=None, metrica='p95'):
+        """Retorna estatísticas de todos os hosts monitorados.
+
+        Com o armazenamento colunar, cada host inclui em 'janela' os agregados da janela
+        recente, calculados de uma vez para toda a frota. Com `top`, retorna apenas os
+        `top` piores hosts pela métrica (ordenados).
+        """
+        if not self.armazenamento:
+            with self.lock:
+                return {host: monitor.snapshot for host, monitor in self.hosts.items()}
+        if top is None:
+            agregados = self.armazenamento.calcular_agregados()
+            with self.lock:
+                return {
+                    host: {**monitor.snapshot, 'janela': agregados.get(host)}
+                    for host, monitor in self.hosts.items()
                 }
-        return estatisticas
+
+        piores = [host for host, _ in self.armazenamento.top_n(metrica, top)]
+        agregados = self.armazenamento.calcular_agregados(piores)
+        with self.lock:
+            return {
+                host: {**self.hosts[host].snapshot, 'janela': agregados.get(host)}
+                for host in piores if host in self.hosts
+            }
+
+    def obter_resumo_frota(self):
+        """Retorna os agregados de toda a frota e de cada grupo do registro de hosts."""
+        if not self.armazenamento:
+            return None
+        with self.registro.lock:
+            grupos = {grupo: list(membros) for grupo, membros in self.registro.grupos.items()}
+        resumo = self.armazenamento.resumo_frota()
+        resumo['grupos'] = self.armazenamento.agregados_por_grupo(grupos)
+        return resumo
+
+    def registrar_alteracao(self, host, versao):
+        """Registra no log de alterações que o host mudou (versao) ou foi removido. Chamar com o lock."""
+        self.alteracoes.append((versao, host))
+        self.versao_atual = versao
+
+    def obter_alteracoes(self, desde=0):
+        """Retorna (versão atual, hosts alterados, hosts removidos) desde uma versão.
+
+        Percorre apenas o log de alterações, então o custo é proporcional ao que mudou.
+        Se a versão for anterior ao início do log, retorna o estado completo.
+        """
+        with self.lock:
+            versao_atual = self.versao_atual
+            if not desde or not self.alteracoes or self.alteracoes[0][0] > desde + 1:
+                return versao_atual, {host: monitor.snapshot for host, monitor in self.hosts.items()}, [], True
+
+            alterados = {}
+            removidos = []
+            for versao, host in reversed(self.alteracoes):
+                if versao <= desde:
+                    break
+                if host in alterados or host in removidos:
+                    continue
+                monitor = self.hosts.get(host)
+                if monitor is None:
+                    removidos.append(host)
+                else:
+                    alterados[host] = monitor.snapshot
+            return versao_atual, alterados, removidos, False
 
     def configurar_monitoramento(self):
         """Configura o monitoramento e atualiza o notificador."""
         self.config.configurar()
         self.atualizar_configuracoes()  # Atualiza todas as configurações incluindo o notificador
 
+    def descrever_host(self, host):
+        """Retorna o host acompanhado do rótulo do registro, se houver."""
+        rotulo = self.registro.obter_rotulo(host)
+        return f"{host} ({rotulo})" if rotulo else host
+
+    def importar_hosts(self):
+        """Importa hosts de um arquivo ou de uma faixa CIDR para o registro."""
+        origem = input("\nDigite o caminho do arquivo ou a faixa CIDR (ex: 192.168.0.0/24): ").strip()
+        if not origem:
+            return []
+        rotulo = input("Rótulo (opcional): ").strip() or None
+        grupos = [g.strip() for g in input("Grupos separados por vírgula (opcional): ").split(',') if g.strip()]
+
+        try:
+            if os.path.isfile(origem):
+                importados = self.registro.importar_arquivo(origem, rotulo, grupos)
+            else:
+                importados = self.registro.importar([origem], rotulo, grupos)
+        except (OSError, ValueError) as e:
+            print(f"Não foi possível importar: {str(e)}")
+            return []
+
+        print(f"{len(importados)} hosts importados.")
+        return importados
+
     def selecionar_host(self):
         """Permite ao usuário selecionar um ou mais hosts do histórico ou digitar novos."""
-        historico = self.carregar_historico()
+        historico = self.registro.listar_recentes()
         hosts_selecionados = []  # Lista para armazenar os hosts selecionados
 
         while True:
@@ -233,20 +1022,32 @@ class MonitorMultiplosHosts:
                 if historico:
                     print("\nÚltimos endereços pesquisados:")
                     for i, host in enumerate(historico, 1):
-                        print(f"{i}. {host}")
+                        print(f"{i}. {self.descrever_host(host)}")
                     print("D. Digitar novo endereço")
+                    print("I. Importar hosts de arquivo ou faixa CIDR")
+                    print("G. Monitorar um grupo")
                     print("C. Configurar o monitor")
                 
                     opcao = input("\nEscolha uma opção ou digite os números separados por vírgula): ")
 
                 else:
                     print("D. Digitar novo endereço")
+                    print("I. Importar hosts de arquivo ou faixa CIDR")
+                    print("G. Monitorar um grupo")
                     print("C. Configurar o monitor")
                 
                     opcao = input("\nEscolha uma opção: ")
                     
                 if opcao.upper() == "C":
                     self.configurar_monitoramento()  # Chama a nova função de configuração
+                elif opcao.upper() == 'I':
+                    hosts_selecionados.extend(self.importar_hosts())
+                elif opcao.upper() == 'G':
+                    grupo = input("\nDigite o nome do grupo: ").strip()
+                    hosts_grupo = self.registro.hosts_do_grupo(grupo)
+                    if not hosts_grupo:
+                        print(f"Grupo {grupo} não encontrado.")
+                    hosts_selecionados.extend(hosts_grupo)
                 elif opcao.upper() == 'D':
                     # Permite ao usuário digitar um novo endereço
                     host = input("\nDigite o endereço para monitorar: ").strip()
@@ -278,7 +1079,7 @@ class MonitorMultiplosHosts:
         return [host]  # Retorna uma lista com o host
 
 
-def main():
+def main(arquivo_config=CONFIG_FILE):
     """Função principal que inicia o programa."""
     
     print(" By: ".center(120, "—"))
@@ -291,7 +1092,7 @@ def main():
     print("Pressione Enter para continuar...")
     input()
     
-    MonitorMultiplo = MonitorMultiplosHosts()
+    MonitorMultiplo = MonitorMultiplosHosts(arquivo_config)
     # Solicita ao usuário para adicionar hosts para monitoramento
     while True:
         hosts = MonitorMultiplo.selecionar_host()  # Agora retorna uma lista de hosts
@@ -307,7 +1108,7 @@ def main():
 
     print("Hosts selecionados para monitoramento:")
     for host in MonitorMultiplo.hosts.keys():
-        print(f"- {host}")
+        print(f"- {MonitorMultiplo.descrever_host(host)}")
 
     print("Iniciando monitoramento de múltiplos hosts...")
     print("Pressione Ctrl+C para parar")
@@ -317,22 +1118,59 @@ def main():
         
         while True:
             # Exibe estatísticas a cada 5 segundos
-            estatisticas = MonitorMultiplo.obter_estatisticas()
+            limite = MonitorMultiplo.config.hosts_console
+            resumo = None
+            if len(MonitorMultiplo.hosts) > limite and MonitorMultiplo.armazenamento:
+                # Frotas grandes: resumo geral e apenas os piores hosts por p95
+                resumo = MonitorMultiplo.obter_resumo_frota()
+                estatisticas = MonitorMultiplo.obter_estatisticas(top=limite)
+            else:
+                estatisticas = MonitorMultiplo.obter_estatisticas()
             os.system('cls' if platform.system().lower() == 'windows' else 'clear')
             print("\nEstatísticas de Monitoramento:")
             print("-" * 50)
-            
+
+            if resumo:
+                media = f"{resumo['media_ping']:.1f}ms" if resumo['media_ping'] is not None else "-"
+                p95 = f"{resumo['p95_medio']:.1f}ms" if resumo['p95_medio'] is not None else "-"
+                print(f"Hosts: {resumo['hosts']} - Em falha: {resumo['em_falha']} - "
+                      f"Perda geral: {resumo['perda_geral']:.2f}%")
+                print(f"Média da frota: {media} - p95 médio: {p95}")
+                for grupo, dados in sorted(resumo['grupos'].items()):
+                    p95_grupo = f"{dados['p95']:.1f}ms" if dados['p95'] is not None else "-"
+                    print(f"  Grupo {grupo}: {dados['hosts']} hosts - p95 médio: {p95_grupo} - "
+                          f"Perda: {dados['perda']:.1f}%")
+                print(f"\n{len(estatisticas)} hosts com maior p95:")
+
             for host, stats in estatisticas.items():
-                print(f"\nHost: {host}")
+                print(f"\nHost: {MonitorMultiplo.descrever_host(host)}")
                 print(f"Status: {stats['status']}")
                 print(f"Último ping: {stats['último_ping']}ms")
                 print(f"Média: {stats['média_ping']:.1f}ms")
                 print(f"Mín/Máx: {stats['min_ping']:.1f}ms / {stats['max_ping']:.1f}ms")
+                if stats['perda'] is not None:
+                    jitter = f"{stats['jitter']:.1f}ms" if stats['jitter'] is not None else "-"
+                    print(f"Perda no ciclo: {stats['perda']:.1f}% - Jitter: {jitter}")
+                janela = stats.get('janela')
+                if janela and janela['p95'] is not None:
+                    print(f"p95 recente: {janela['p95']:.1f}ms - Perda recente: {janela['perda']:.1f}%")
                 print(f"Total de falhas: {stats['total_falhas']}")
                 print(f"Tempo total em falha: {stats['tempo_total_falhas']:.1f}s")
                 if stats['última_falha']:
                     print(f"Última falha: {stats['última_falha']}")
+                if stats['saltos']:
+                    print(f"Caminho ({stats['saltos']} saltos, {stats['alteracoes_caminho']} alterações de rota):")
+                    for salto in MonitorMultiplo.obter_caminho(host):
+                        media = f"{salto['media']:.1f}ms" if salto.get('media') is not None else "-"
+                        perda = f"{salto['perda']:.0f}%" if 'perda' in salto else "-"
+                        print(f"  {salto['salto']:>2}. {salto['endereco'] or '???':<39} {media:>9}  Perda: {perda}")
                 print("-" * 30)
+
+            if MonitorMultiplo.caixa_saida:
+                metricas = MonitorMultiplo.caixa_saida.obter_metricas()
+                if metricas['pendentes'] or metricas['mortas']:
+                    print(f"\nNotificações pendentes de reenvio: {metricas['pendentes']} - "
+                          f"Entregues no reenvio: {metricas['entregues']} - Descartadas: {metricas['mortas']}")
                 
             time.sleep(5)
             
@@ -344,9 +1182,93 @@ def main():
     except Exception as e:
         print(f"Ocorreu um erro: {str(e)}")
         input("Pressione Enter para sair...")
-    
+
+
+def registrar_evento_servico(evento, **detalhes):
+    """Registra um evento do modo serviço no log geral."""
+    GerenciadorLog.get_instance().registrar_log({
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'tipo': 'servico',
+        'evento': evento,
+        'detalhes': detalhes
+    })
+
+
+def executar_servico(arquivo_config=CONFIG_FILE, hosts=None):
+    """Executa o monitoramento sem interface interativa (serviço systemd, contêiner).
+
+    Os hosts vêm do config.json e de `hosts`; eventos vão para o log geral. O thread
+    principal fica bloqueado até SIGTERM/SIGINT, sem o laço de exibição do console.
+    Retorna o código de saída do processo.
+    """
+    if not os.path.exists(arquivo_config):
+        # Sem terminal não há quem revise um config.json padrão criado aqui: é um erro de implantação
+        print(f"Arquivo de configuração {arquivo_config} não encontrado.", file=sys.stderr)
+        return 1
+    inicio = time.perf_counter()
+    encerrar = threading.Event()
+
+    def ao_receber_sinal(sinal, quadro):
+        encerrar.set()
+
+    signal.signal(signal.SIGTERM, ao_receber_sinal)
+    signal.signal(signal.SIGINT, ao_receber_sinal)
+    # Sem terminal a saída padrão é bufferizada em blocos; o journald receberia as linhas com atraso
+    sys.stdout.reconfigure(line_buffering=True)
+
+    monitor = MonitorMultiplosHosts(arquivo_config)
+    if hosts:
+        monitor.adicionar_host(hosts)
+    try:
+        monitor.iniciar_monitoramento()
+    except Exception as e:
+        print(f"Erro ao iniciar o monitoramento: {str(e)}", file=sys.stderr)
+        registrar_evento_servico('erro', mensagem=str(e))
+        monitor.parar_monitoramento()
+        return 1
+
+    if not monitor.hosts:
+        print(f"Nenhum host configurado em {monitor.config.CONFIG_FILE} ou informado com --host.", file=sys.stderr)
+        registrar_evento_servico('sem_hosts', config=monitor.config.CONFIG_FILE)
+        monitor.parar_monitoramento()
+        return 2
+
+    registrar_evento_servico(
+        'iniciado',
+        versao=__version__,
+        pid=os.getpid(),
+        hosts=len(monitor.hosts),
+        inicializacao_ms=round((time.perf_counter() - inicio) * 1000, 1)
+    )
+
+    # No Windows a espera só é interrompida por Ctrl+C ao expirar; no POSIX o sinal a interrompe
+    espera = 1 if platform.system().lower() == 'windows' else None
+    while not encerrar.wait(espera):
+        pass
+
+    registrar_evento_servico('encerrando', hosts=len(monitor.hosts))  # Gravado pelo próprio encerramento
+    resumo = monitor.parar_monitoramento()
+    print(f"Monitoramento finalizado em {resumo['duracao_ms']:.0f}ms.")
+    return 0
+
+
+def analisar_argumentos(argumentos=None):
+    """Lê os argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description="Monitor de Ping")
+    parser.add_argument('--servico', action='store_true',
+                        help="Executa sem interface interativa (também ativado por modo_servico no config.json)")
+    parser.add_argument('--config', default=CONFIG_FILE, help="Arquivo de configuração")
+    parser.add_argument('--host', dest='hosts', action='append', metavar='ALVO',
+                        help="Host monitorado no modo serviço, além dos do config.json (pode repetir)")
+    return parser.parse_args(argumentos)
+
+
 if __name__ == "__main__":
+    args = analisar_argumentos()
+    # Só consulta modo_servico em um arquivo existente; Configuracao criaria um padrão
+    if args.servico or args.hosts or (os.path.exists(args.config) and Configuracao(args.config).modo_servico):
+        sys.exit(executar_servico(args.config, args.hosts))
     try:
-        main()
+        main(args.config)
     except KeyboardInterrupt:
         print("\nMonitoramento finalizado!")
@@ -1,53 +1,92 @@
 from datetime import datetime
-from plyer import notification
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests
+import copy
 import queue
+import threading
+import time
 from log import GerenciadorLog
-from twilio.rest import Client
+from limitador import FilaLimitada, LimitadorTaxa
+from caixa_saida import ADIADA
+
+# As bibliotecas de cada canal (plyer, smtplib, requests, twilio) são importadas
+# apenas no primeiro envio, para que canais desativados não pesem na inicialização.
+
+_FIM_ENVIOS = object()  # Marcador na fila de envios: o thread de envio termina ao alcançá-lo
 
 class NotificadorBase:
     """Classe base para todos os tipos de notificadores"""
+    intervalo_minimo = 60  # 1 minuto entre notificações (taxa de recarga do limitador)
+    reenviar_falhas = True  # Envios que falharem vão para a caixa de saída
+
     def __init__(self):
-        self.ultima_notificacao = None
-        self.intervalo_minimo = 60  # 1 minuto entre notificações
-        self.log_queue = queue.Queue()  # Fila para logs
+        # Token buckets por (host, canal): um host ruidoso não bloqueia os alertas dos demais
+        self.limitador = LimitadorTaxa(capacidade=1, taxa=1 / self.intervalo_minimo)
+        self.log_queue = FilaLimitada()  # Fila para logs, esvaziada pelo GerenciadorNotificacoes
         self.host = None  # Novo atributo para identificar o host
+        self.erro_entrega = None  # Erro do último envio que falhou (None se não houve falha de entrega)
+
+    @property
+    def canal(self):
+        """Nome do canal derivado da classe (ex: NotificadorEmail -> email)"""
+        return self.__class__.__name__.replace('Notificador', '').lower()
 
     def pode_notificar(self):
-        if not self.ultima_notificacao:
+        """Consome um token do host neste canal para uma tentativa de envio.
+
+        O token vale para a tentativa, e não só para a entrega: com o provedor fora do ar,
+        cada host tenta no máximo uma vez por intervalo em vez de a cada ciclo de sonda.
+        """
+        if self.limitador.consumir((self.host, self.canal)):
             return True
-        """Verifica se já passou tempo suficiente desde a última notificação"""
-        tempo_passado = (datetime.now() - self.ultima_notificacao).total_seconds()
-        if tempo_passado < self.intervalo_minimo:
-            # Registra que está aguardando o intervalo
-            log_entry = {
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'tipo': 'aguardando_intervalo',
-                'servico': self.__class__.__name__.replace('Notificador', '').lower(),
-                'tempo_restante': self.intervalo_minimo - tempo_passado,
-                'host': self.host,
-                'tipo_notificacao': self.__class__.__name__.replace('Notificador', '').lower()
-            }
-            self.log_queue.put(log_entry)
-            return False
-        return True
+        # Registra que está aguardando o intervalo
+        log_entry = {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'tipo': 'aguardando_intervalo',
+            'servico': self.canal,
+            'tempo_restante': self.tempo_restante(),
+            'host': self.host,
+            'tipo_notificacao': self.canal
+        }
+        self.log_queue.colocar(log_entry)
+        return False
+
+    def definir_rajada(self, rajada):
+        """Define quantas notificações seguidas um host pode enviar antes de aguardar o intervalo"""
+        self.limitador.capacidade = max(1, int(rajada))
+
+    def tempo_restante(self):
+        """Segundos até o host poder notificar novamente neste canal"""
+        return self.limitador.tempo_restante((self.host, self.canal))
 
-    def atualizar_tempo_notificacao(self):
-        """Atualiza o timestamp da última notificação"""
-        self.ultima_notificacao = datetime.now()
+    def clonar(self, host):
+        """Cópia com as mesmas credenciais e fila própria, para reenvios em outro thread.
+
+        O limitador é compartilhado (ele é thread-safe): reenvios e envios normais consomem
+        os mesmos tokens por (host, canal).
+        """
+        copia = copy.copy(self)
+        copia.log_queue = FilaLimitada()
+        copia.host = host
+        copia.erro_entrega = None
+        return copia
 
     def registrar_erro(self, tipo_notificacao, erro):
         """Registra erro no log"""
+        self.erro_entrega = str(erro)
         log_entry = {
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'tipo': 'erro_notificacao',
             'servico': tipo_notificacao,
             'mensagem': str(erro)
         }
-        self.log_queue.put(log_entry)
+        self.log_queue.colocar(log_entry)
+
+    def descarregar_logs(self, gerenciador_log):
+        """Move os logs pendentes do notificador para o gerenciador de log do host"""
+        while True:
+            try:
+                gerenciador_log.registrar_log(self.log_queue.get_nowait())
+            except queue.Empty:
+                break
 
 # Notificar por meio do Email
 class NotificadorEmail(NotificadorBase):
@@ -67,10 +106,11 @@ class NotificadorEmail(NotificadorBase):
             print("Credenciais de Email não configuradas corretamente.")
             return False
 
-        if not self.pode_notificar():
-            return False
-
         try:
+            import smtplib
+            from email.mime.text import MIMEText
+            from email.mime.multipart import MIMEMultipart
+
             msg = MIMEMultipart()
             msg['From'] = self.email_remetente
             msg['To'] = self.email_destinatario
@@ -78,7 +118,7 @@ class NotificadorEmail(NotificadorBase):
 
             msg.attach(MIMEText(mensagem, 'plain'))
 
-            servidor = smtplib.SMTP(self.servidor_smtp, self.porta_smtp)
+            servidor = smtplib.SMTP(self.servidor_smtp, self.porta_smtp, timeout=10)
             servidor.starttls()
             servidor.login(self.email_remetente, self.senha_remetente)
             
@@ -86,7 +126,6 @@ class NotificadorEmail(NotificadorBase):
             servidor.sendmail(self.email_remetente, self.email_destinatario, texto)
             servidor.quit()
 
-            self.atualizar_tempo_notificacao()
             return True
         except Exception as e:
             self.registrar_erro('email', e)
@@ -108,10 +147,9 @@ class NotificadorTelegram(NotificadorBase):
             print("Credenciais do Telegram não configuradas corretamente.")
             return False
 
-        if not self.pode_notificar():
-            return False
-
         try:
+            import requests
+
             url = f"{self.api_url}/sendMessage"
             data = {
                 "chat_id": self.chat_id,
@@ -119,9 +157,8 @@ class NotificadorTelegram(NotificadorBase):
                 "parse_mode": "HTML"
             }
             
-            response = requests.post(url, data=data)
+            response = requests.post(url, data=data, timeout=10)
             if response.status_code == 200:
-                self.atualizar_tempo_notificacao()
                 return True
             
             self.registrar_erro('telegram', f"Status code: {response.status_code}")
@@ -141,10 +178,16 @@ class NotificadorSMS(NotificadorBase):
         self.numero_destinatario = numero_destinatario
         self.client = None  # Inicializa como None
 
+    def clonar(self, host):
+        """Inicializa o cliente no original, para que as cópias de cada envio o reaproveitem"""
+        self.inicializar_client()
+        return super().clonar(host)
+
     def inicializar_client(self):
         """Inicializa o cliente Twilio apenas quando necessário"""
         if self.client is None and all([self.account_sid, self.auth_token]):
             try:
+                from twilio.rest import Client
                 self.client = Client(self.account_sid, self.auth_token)
             except ImportError:
                 print("Twilio não está instalado. Use: pip install twilio")
@@ -169,7 +212,6 @@ class NotificadorSMS(NotificadorBase):
                 to=self.numero_destinatario
             )
             if message.sid:
-                self.atualizar_tempo_notificacao()
                 return True
                 
             self.registrar_erro('sms', "Falha ao obter SID da mensagem")
@@ -181,24 +223,23 @@ class NotificadorSMS(NotificadorBase):
 # Notificar pelo Desktop
 class NotificadorDesktop(NotificadorBase):
     """Classe para enviar notificações desktop usando plyer"""
+    intervalo_minimo = 10  # Reduzido para 10 segundos para notificações desktop
+    reenviar_falhas = False  # Falha local (sem suporte a notificações), não é transitória
+
     def __init__(self, app_name="Monitor de Ping"):
         super().__init__()
         self.app_name = app_name
-        self.intervalo_minimo = 10  # Reduzido para 10 segundos para notificações desktop
 
     def enviar_notificacao(self, mensagem, titulo=None):
         """Envia uma notificação desktop"""
-        if not self.pode_notificar():
-            return False
-
         try:
+            from plyer import notification
             notification.notify(
                 title=titulo or self.app_name,
                 message=mensagem,
                 app_icon=None,  # Pode especificar o caminho para um ícone
                 timeout=10,     # Notificação desaparece após 10 segundos
             )
-            self.atualizar_tempo_notificacao()
             return True
         except Exception as e:
             self.registrar_erro('desktop', e)
@@ -220,119 +261,258 @@ class NotificadorWhatsApp(NotificadorBase):
             print("Credenciais do WhatsApp não configuradas corretamente.")
             return False
 
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "messaging_product": "whatsapp",
-            "to": self.numero_destinatario,
-            "text": {
-                "body": mensagem
+        try:
+            import requests
+
+            headers = {
+                "Authorization": f"Bearer {self.token}",
+                "Content-Type": "application/json"
             }
-        }
-        response = requests.post(self.url, headers=headers, json=data)
-        if response.status_code == 200:
-            self.atualizar_tempo_notificacao()
-            return True
-        else:
-            self.registrar_erro('whatsapp', response.json())
+            data = {
+                "messaging_product": "whatsapp",
+                "to": self.numero_destinatario,
+                "text": {
+                    "body": mensagem
+                }
+            }
+            response = requests.post(self.url, headers=headers, json=data, timeout=10)
+            if response.status_code == 200:
+                return True
+
+            self.registrar_erro('whatsapp', f"Status code: {response.status_code} - {response.text[:200]}")
+            return False
+        except Exception as e:
+            self.registrar_erro('whatsapp', e)
             return False
 
 # Classe para gerenciar todas as notificações
 class GerenciadorNotificacoes:
     """Classe para gerenciar todos os tipos de notificações"""
+    THREADS_ENVIO = 4  # Envios simultâneos: um provedor lento ocupa apenas um dos threads
+
     def __init__(self):
         self.notificadores = {}
+        self.caixa_saida = None  # CaixaSaida que recebe os envios que falharam, se configurada
+        # host -> GerenciadorLog dos envios; o monitor usa o log geral para hosts já removidos
+        self.obter_log = GerenciadorLog.get_instance
+        self.fila_envios = FilaLimitada(1000)  # Notificações aguardando os threads de envio
+        self.threads_envio = []
 
     def adicionar_notificador(self, tipo, notificador):
         """Adiciona um novo notificador"""
         self.notificadores[tipo] = notificador
 
-    def enviar_notificacao(self, mensagem, titulo=None, tipos=None, host=None):
-        """Envia notificação para todos os tipos especificados"""
+    def remover_notificador(self, tipo):
+        """Remove um notificador que deixou de ser usado"""
+        self.notificadores.pop(tipo, None)
+
+    def iniciar_envios(self, threads=None):
+        """Inicia os threads que enviam as notificações enfileiradas por `enfileirar`"""
+        for _ in range(threads or self.THREADS_ENVIO):
+            thread = threading.Thread(target=self._processar_envios, daemon=True)
+            thread.start()
+            self.threads_envio.append(thread)
+
+    def parar_envios(self, prazo=5):
+        """Para os threads de envio depois de esvaziar a fila, em até `prazo` segundos.
+
+        Retorna quantas notificações ficaram sem envio (fila cheia ou fim do prazo).
+        """
+        fim = time.monotonic() + prazo
+        threads, self.threads_envio = self.threads_envio, []
+        for _ in threads:
+            try:
+                self.fila_envios.put(_FIM_ENVIOS, timeout=max(0, fim - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(0, fim - time.monotonic()))
+        with self.fila_envios.mutex:
+            pendentes = sum(item is not _FIM_ENVIOS for item in self.fila_envios.queue)
+        return pendentes + self.fila_envios.descartados
+
+    def enfileirar(self, mensagem, titulo=None, tipos=None, host=None, estado=None):
+        """Entrega a notificação aos threads de envio, sem aguardar o envio.
+
+        Os threads de monitoramento não esperam pelos canais (SMTP, HTTP). Sem threads de
+        envio iniciados, a notificação é enviada no thread atual. Retorna False se a fila
+        estava cheia e a notificação foi descartada.
+        """
+        if not self.threads_envio:
+            self._enviar_e_registrar(mensagem, titulo, tipos, host, estado)
+            return True
+        return self.fila_envios.colocar((mensagem, titulo, tipos, host, estado))
+
+    def _enviar_e_registrar(self, mensagem, titulo, tipos, host, estado):
+        """Envia a notificação e registra os resultados no log do host"""
+        resultados = self.enviar_notificacao(mensagem, titulo, tipos, host, estado)
+        self.obter_log(host).registrar_log_notificacao(resultados)
+
+    def _processar_envios(self):
+        while True:
+            item = self.fila_envios.get()
+            if item is _FIM_ENVIOS:
+                return
+            try:
+                self._enviar_e_registrar(*item)
+            except Exception as e:
+                print(f"Erro ao enviar notificação: {str(e)}")
+
+    def enviar_notificacao(self, mensagem, titulo=None, tipos=None, host=None, estado=None):
+        """Envia notificação para todos os tipos especificados.
+
+        `estado` identifica o alerta (ex.: 'falha') na caixa de saída, junto com canal, host e
+        título: reenvios do mesmo alerta com mensagens diferentes não se acumulam.
+        """
         if tipos is None:
-            tipos = self.notificadores.keys()
+            tipos = list(self.notificadores)
 
         resultados = {}
-        gerenciador_log = GerenciadorLog.get_instance(host)
+        gerenciador_log = self.obter_log(host)
         
         for tipo in tipos:
-            if tipo in self.notificadores:
-                notificador = self.notificadores[tipo]
-                notificador.host = host
+            original = self.notificadores.get(tipo)  # Pode ter sido removido por um recarregamento
+            if original is not None:
+                # Cada envio usa uma cópia: vários threads enviam ao mesmo tempo, sem lock
+                notificador = original.clonar(host)
                 
                 pode_notificar = notificador.pode_notificar()
                 
                 if pode_notificar:
-                    if tipo == 'email':
-                        resultados[tipo] = notificador.enviar_notificacao(
-                            titulo or "Alerta de Monitoramento", 
-                            mensagem
-                        )
-                    elif tipo == 'desktop':
-                        resultados[tipo] = notificador.enviar_notificacao(
-                            mensagem,
-                            titulo
-                        )
-                    else:
-                        resultados[tipo] = notificador.enviar_notificacao(mensagem)
+                    resultados[tipo] = _enviar_por_tipo(tipo, notificador, mensagem, titulo)
+                    # Falhas de entrega (rede, servidor) vão para a caixa de saída e são reenviadas
+                    if (not resultados[tipo] and notificador.erro_entrega
+                            and notificador.reenviar_falhas and self.caixa_saida):
+                        self.caixa_saida.adicionar(tipo, host, titulo, mensagem, notificador.erro_entrega, estado)
                 else:
                     resultados[tipo] = False
                     
-                # Registra logs de notificação no gerenciador específico do host
-                if not pode_notificar:
-                    gerenciador_log.registrar_log({
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'tipo': 'aguardando_intervalo',
-                        'servico': tipo,
-                        'host': host,
-                        'tempo_restante': notificador.intervalo_minimo - 
-                            (datetime.now() - notificador.ultima_notificacao).total_seconds()
-                    })
+                # Registra logs de notificação (espera e erros) no gerenciador específico do host
+                notificador.descarregar_logs(gerenciador_log)
         
         return resultados
 
+    def reenviar(self, tipo, host, titulo, mensagem):
+        """Reenvia uma notificação da caixa de saída. Retorna (entregue, erro) no formato esperado pela CaixaSaida."""
+        notificador = self.notificadores.get(tipo)
+        if notificador is None:
+            return None, None
+        # Uma cópia evita disputar o notificador (e seu atributo host) com os threads de monitoramento
+        copia = notificador.clonar(host)
+        if not copia.limitador.consumir((host, copia.canal)):
+            # O host esgotou os tokens do canal: adia o reenvio sem contá-lo como tentativa
+            return ADIADA, copia.tempo_restante()
+        # O reenvio consome o token do limitador compartilhado, como um envio normal
+        entregue = _enviar_por_tipo(tipo, copia, mensagem, titulo)
+        copia.descarregar_logs(self.obter_log(host))
+        return entregue, copia.erro_entrega
+
+    def exportar_estado(self):
+        """Retorna o estado dos limitadores de cada notificador, para o ponto de restauração"""
+        return {tipo: notificador.limitador.exportar() for tipo, notificador in self.notificadores.items()}
+
+    def restaurar_estado(self, estado):
+        """Restaura os limitadores dos notificadores ativos a partir de `exportar_estado`"""
+        for tipo, baldes in estado.items():
+            if tipo in self.notificadores:
+                self.notificadores[tipo].limitador.restaurar(baldes)
 
-# Função para configurar notificações a partir do arquivo de configuração
-def configurar_notificacoes(config):
-    """Configura e retorna um gerenciador de notificações"""
-    gerenciador = GerenciadorNotificacoes()
 
-    # Configurar Notificação Desktop
-    desktop_notificador = NotificadorDesktop()
-    gerenciador.adicionar_notificador('desktop', desktop_notificador)
+def _enviar_por_tipo(tipo, notificador, mensagem, titulo):
+    """Chama o envio do notificador com os argumentos esperados pelo seu tipo"""
+    if tipo == 'email':
+        return notificador.enviar_notificacao(titulo or "Alerta de Monitoramento", mensagem)
+    if tipo == 'desktop':
+        return notificador.enviar_notificacao(mensagem, titulo)
+    return notificador.enviar_notificacao(mensagem)
+
+
+# Registro de plugins de notificação: tipo -> (chaves de configuração, fábrica)
+REGISTRO_NOTIFICADORES = {}
+
+
+def registrar_notificador(tipo, chaves=()):
+    """Decorador que registra a fábrica de um tipo de notificador e as chaves que ela usa"""
+    def decorador(fabrica):
+        REGISTRO_NOTIFICADORES[tipo] = (tuple(chaves), fabrica)
+        return fabrica
+    return decorador
+
 
-    # Configurar Email
-    email_notificador = NotificadorEmail(
+@registrar_notificador('desktop')
+def _criar_desktop(config):
+    return NotificadorDesktop()
+
+
+@registrar_notificador('email', ('email_remetente', 'senha_remetente', 'email_destinatario'))
+def _criar_email(config):
+    return NotificadorEmail(
         email_remetente=config.get('email_remetente', None),
         senha_remetente=config.get('senha_remetente', None),
         email_destinatario=config.get('email_destinatario', None)
     )
-    gerenciador.adicionar_notificador('email', email_notificador)
 
-    # Configurar Telegram
-    telegram_notificador = NotificadorTelegram(
+
+@registrar_notificador('telegram', ('token_bot_telegram', 'chat_id_telegram'))
+def _criar_telegram(config):
+    return NotificadorTelegram(
         token_bot=config.get('token_bot_telegram', None),
         chat_id=config.get('chat_id_telegram', None)
     )
-    gerenciador.adicionar_notificador('telegram', telegram_notificador)
 
-    # Configurar SMS (Twilio)
-    sms_notificador = NotificadorSMS(
+
+# Configurar SMS (Twilio)
+@registrar_notificador('sms', ('account_sid_twilio', 'auth_token_twilio', 'numero_remetente_twilio', 'numero_destinatario_twilio'))
+def _criar_sms(config):
+    return NotificadorSMS(
         account_sid=config.get('account_sid_twilio', None),
         auth_token=config.get('auth_token_twilio', None),
         numero_remetente=config.get('numero_remetente_twilio', None),
         numero_destinatario=config.get('numero_destinatario_twilio', None)
     )
-    gerenciador.adicionar_notificador('sms', sms_notificador)
 
-    # Configurar WhatsApp Business API
-    whatsapp_notificador = NotificadorWhatsApp(
+
+# Configurar WhatsApp Business API
+@registrar_notificador('whatsapp', ('url_whatsapp', 'token_whatsapp', 'numero_destinatario_whatsapp'))
+def _criar_whatsapp(config):
+    return NotificadorWhatsApp(
         url=config.get('url_whatsapp', None),
         token=config.get('token_whatsapp', None),
         numero_destinatario=config.get('numero_destinatario_whatsapp', None)
     )
-    gerenciador.adicionar_notificador('whatsapp', whatsapp_notificador)
 
-    return gerenciador
\ No newline at end of file
+
+def tipos_ativos(config):
+    """Retorna os tipos de notificação ativos na configuração que possuem plugin registrado"""
+    return [tipo for tipo in config.get('tipos_notificacao', ['desktop']) if tipo in REGISTRO_NOTIFICADORES]
+
+
+def criar_notificador(tipo, config):
+    """Cria e configura o notificador de um tipo a partir do arquivo de configuração"""
+    if tipo not in REGISTRO_NOTIFICADORES:
+        raise ValueError(f"Tipo de notificação desconhecido: {tipo}")
+    notificador = REGISTRO_NOTIFICADORES[tipo][1](config)
+    notificador.definir_rajada(config.get('rajada_notificacao', 1))
+    return notificador
+
+
+def notificadores_alterados(antigas, novas):
+    """Retorna os tipos ativos que precisam ser (re)criados: recém-ativados ou com credenciais alteradas"""
+    ativos_antes = set(tipos_ativos(antigas))
+    rajada_alterada = antigas.get('rajada_notificacao', 1) != novas.get('rajada_notificacao', 1)
+    return {
+        tipo for tipo in tipos_ativos(novas)
+        if tipo not in ativos_antes or rajada_alterada
+        or any(antigas.get(chave) != novas.get(chave) for chave in REGISTRO_NOTIFICADORES[tipo][0])
+    }
+
+
+# Função para configurar notificações a partir do arquivo de configuração
+def configurar_notificacoes(config):
+    """Configura e retorna um gerenciador apenas com os notificadores ativos"""
+    gerenciador = GerenciadorNotificacoes()
+
+    for tipo in tipos_ativos(config):
+        gerenciador.adicionar_notificador(tipo, criar_notificador(tipo, config))
+
+    return gerenciador
@@ -0,0 +1,75 @@
+import os
+import threading
+
+
+class ObservadorArquivo:
+    """Observa um arquivo por alterações (mtime/tamanho) e chama um callback quando ele muda"""
+    def __init__(self, caminho, callback, intervalo=2):
+        self.caminho = caminho
+        self.callback = callback
+        self.intervalo = intervalo
+        self.assinatura = self._obter_assinatura()
+        self.evento_parada = threading.Event()
+        self.thread = None
+
+    def _obter_assinatura(self):
+        """Retorna a assinatura atual do arquivo ou None se ele não existir"""
+        try:
+            stat = os.stat(self.caminho)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def iniciar(self):
+        """Inicia o thread de observação"""
+        self.evento_parada.clear()
+        self.thread = threading.Thread(target=self._observar, daemon=True)
+        self.thread.start()
+
+    def parar(self):
+        """Para o thread de observação"""
+        self.evento_parada.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.thread = None
+
+    def _observar(self):
+        """Verifica periodicamente se o arquivo mudou"""
+        while not self.evento_parada.wait(self.intervalo):
+            assinatura = self._obter_assinatura()
+            if assinatura is None or assinatura == self.assinatura:
+                continue
+            try:
+                self.callback()
+                self.assinatura = assinatura
+            except Exception as e:
+                # Arquivo pode estar sendo escrito; tenta novamente na próxima verificação
+                print(f"Erro ao recarregar {self.caminho}: {str(e)}")
+
+
+def normalizar_hosts(hosts):
+    """Converte a lista de hosts do arquivo em um dicionário host -> opções"""
+    normalizados = {}
+    for item in hosts or []:
+        if isinstance(item, str):
+            normalizados[item] = {}
+        elif isinstance(item, dict) and item.get('host'):
+            opcoes = dict(item)
+            normalizados[opcoes.pop('host')] = opcoes
+    return normalizados
+
+
+def calcular_diferencas(antigas, novas):
+    """Calcula o que mudou nos hosts entre duas versões da configuração"""
+    hosts_antigos = normalizar_hosts(antigas.get('hosts'))
+    hosts_novos = normalizar_hosts(novas.get('hosts'))
+
+    return {
+        'adicionados': [host for host in hosts_novos if host not in hosts_antigos],
+        'removidos': [host for host in hosts_antigos if host not in hosts_novos],
+        'alterados': [
+            host for host in hosts_novos
+            if host in hosts_antigos and hosts_novos[host] != hosts_antigos[host]
+        ],
+        'opcoes': hosts_novos,
+    }
@@ -0,0 +1,197 @@
+from collections import OrderedDict
+import atexit
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+
+
+class RegistroHosts:
+    """Registro de hosts com rótulos, grupos e histórico de uso, persistido em disco"""
+    def __init__(self, arquivo, max_recentes=9, atraso_gravacao=2, max_expansao=65536):
+        self.arquivo = arquivo
+        self.max_recentes = max_recentes
+        self.atraso_gravacao = atraso_gravacao  # Segundos agrupando alterações antes de gravar
+        self.max_expansao = max_expansao  # Limite de endereços por faixa CIDR
+        self.hosts = {}  # host -> {'rotulo': str | None, 'grupos': set}
+        self.grupos = {}  # grupo -> set de hosts
+        self.recentes = OrderedDict()  # Hosts usados recentemente, o mais recente no final
+        self.lock = threading.RLock()
+        self._timer_gravacao = None
+        self.carregar()
+        # O timer de gravação é daemon: alterações ainda agendadas são gravadas na saída do processo
+        atexit.register(self.gravar_pendentes)
+
+    def __contains__(self, host):
+        return host in self.hosts
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def carregar(self):
+        """Carrega o registro do disco, aceitando também o formato antigo (lista de hosts)"""
+        if not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        with self.lock:
+            if isinstance(dados, list):
+                dados = {'recentes': dados, 'hosts': {}}
+            for host, info in dados.get('hosts', {}).items():
+                self._registrar(host, info.get('rotulo'), info.get('grupos', ()))
+            # O arquivo guarda o mais recente primeiro
+            for host in reversed(dados.get('recentes', [])):
+                self._registrar(host)
+                self.recentes[host] = None
+
+    def _registrar(self, host, rotulo=None, grupos=()):
+        """Registra ou atualiza um host nos índices, sem agendar gravação"""
+        info = self.hosts.get(host)
+        novo = info is None
+        if novo:
+            info = self.hosts[host] = {'rotulo': None, 'grupos': set()}
+        if rotulo:
+            info['rotulo'] = rotulo
+        for grupo in grupos:
+            info['grupos'].add(grupo)
+            self.grupos.setdefault(grupo, set()).add(host)
+        return novo
+
+    def adicionar(self, host, rotulo=None, grupos=()):
+        """Adiciona um host ao registro. Retorna True se ele ainda não existia."""
+        with self.lock:
+            novo = self._registrar(host, rotulo, grupos)
+        self.agendar_gravacao()
+        return novo
+
+    def remover(self, host):
+        """Remove um host do registro e de todos os índices"""
+        with self.lock:
+            info = self.hosts.pop(host, None)
+            if info is None:
+                return
+            for grupo in info['grupos']:
+                membros = self.grupos.get(grupo)
+                if membros is not None:
+                    membros.discard(host)
+                    if not membros:
+                        del self.grupos[grupo]
+            self.recentes.pop(host, None)
+        self.agendar_gravacao()
+
+    def marcar_recente(self, host):
+        """Move o host para o topo dos recentes, mantendo apenas os últimos max_recentes"""
+        with self.lock:
+            self._registrar(host)
+            self.recentes[host] = None
+            self.recentes.move_to_end(host)
+            while len(self.recentes) > self.max_recentes:
+                self.recentes.popitem(last=False)
+        self.agendar_gravacao()
+
+    def listar_recentes(self):
+        """Retorna os hosts recentes, do mais recente para o mais antigo"""
+        with self.lock:
+            return list(reversed(self.recentes))
+
+    def obter_rotulo(self, host):
+        """Retorna o rótulo de um host, se houver"""
+        info = self.hosts.get(host)
+        return info['rotulo'] if info else None
+
+    def hosts_do_grupo(self, grupo):
+        """Retorna os hosts pertencentes a um grupo"""
+        with self.lock:
+            return sorted(self.grupos.get(grupo, ()))
+
+    def expandir_alvo(self, alvo):
+        """Expande uma faixa CIDR em endereços; outros alvos são retornados como estão"""
+        if '/' not in alvo or '://' in alvo:
+            return [alvo]
+        try:
+            rede = ipaddress.ip_network(alvo, strict=False)
+        except ValueError:
+            return [alvo]
+        if rede.num_addresses > self.max_expansao:
+            raise ValueError(f"Faixa {alvo} excede o limite de {self.max_expansao} endereços")
+        if rede.num_addresses == 1:
+            return [str(rede.network_address)]
+        return [str(ip) for ip in rede.hosts()]
+
+    def importar(self, alvos, rotulo=None, grupos=()):
+        """Importa uma lista de alvos (hosts ou faixas CIDR). Retorna os hosts importados."""
+        importados = []
+        with self.lock:
+            for alvo in alvos:
+                for host in self.expandir_alvo(alvo.strip()):
+                    self._registrar(host, rotulo, grupos)
+                    importados.append(host)
+        self.agendar_gravacao()
+        return importados
+
+    def importar_arquivo(self, caminho, rotulo=None, grupos=()):
+        """Importa hosts de um arquivo texto.
+
+        Cada linha tem o formato: alvo[,rótulo[,grupo1;grupo2]]. O alvo pode ser um
+        host ou uma faixa CIDR. Linhas vazias e iniciadas por '#' são ignoradas.
+        `rotulo` é usado nas linhas que não informam um rótulo próprio.
+        """
+        importados = []
+        with open(caminho, 'r', encoding='utf-8') as f:
+            with self.lock:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha or linha.startswith('#'):
+                        continue
+                    campos = [campo.strip() for campo in linha.split(',')]
+                    rotulo_linha = campos[1] if len(campos) > 1 and campos[1] else rotulo
+                    grupos_linha = [g.strip() for g in campos[2].split(';') if g.strip()] if len(campos) > 2 else []
+                    for host in self.expandir_alvo(campos[0]):
+                        self._registrar(host, rotulo_linha, list(grupos) + grupos_linha)
+                        importados.append(host)
+        self.agendar_gravacao()
+        return importados
+
+    def agendar_gravacao(self):
+        """Agenda a gravação em disco, agrupando alterações próximas em uma única escrita"""
+        with self.lock:
+            if self._timer_gravacao is not None:
+                return
+            self._timer_gravacao = threading.Timer(self.atraso_gravacao, self.gravar)
+            self._timer_gravacao.daemon = True
+            self._timer_gravacao.start()
+
+    def gravar_pendentes(self):
+        """Grava o registro apenas se houver uma gravação agendada"""
+        if self._timer_gravacao is not None:
+            self.gravar()
+
+    def gravar(self):
+        """Grava o registro de forma atômica (arquivo temporário + substituição)"""
+        with self.lock:
+            if self._timer_gravacao is not None:
+                self._timer_gravacao.cancel()
+                self._timer_gravacao = None
+            dados = {
+                'recentes': list(reversed(self.recentes)),
+                'hosts': {
+                    host: {'rotulo': info['rotulo'], 'grupos': sorted(info['grupos'])}
+                    for host, info in self.hosts.items()
+                },
+            }
+
+        diretorio = os.path.dirname(os.path.abspath(self.arquivo))
+        fd, temporario = tempfile.mkstemp(dir=diretorio, prefix='.registro_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(dados, f)
+            os.replace(temporario, self.arquivo)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
@@ -0,0 +1,449 @@
+import asyncio
+import concurrent.futures
+import platform
+import re
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Tipos de sonda suportados pelo prefixo do alvo (ex: tcp://host:porta)
+TIPOS_SONDA = ('icmp', 'tcp', 'http', 'https', 'udp')
+
+# Endereço de quem respondeu ao ping: "64 bytes from X", "From X ... Time to live exceeded",
+# "Reply from X" e "Resposta de X" (Windows em português)
+_RESPONDENTE_PING = re.compile(
+    r'\b(?:[Ff]rom|[Dd]e)\s+(\d{1,3}(?:\.\d{1,3}){3}|[0-9A-Fa-f]*:[0-9A-Fa-f:]*[0-9A-Fa-f])'
+)
+
+# Tempo de cada resposta: "time=0.045 ms", "tempo=12ms" e "tempo<1ms" (Windows, abaixo de 1ms)
+_TEMPO_PING = re.compile(r'(?:tempo|time)[=<]\s*([\d.,]+)')
+
+
+def extrair_tempos(saida):
+    """Retorna o tempo, em ms, de cada resposta na saída do ping"""
+    return [float(valor.replace(',', '.')) for valor in _TEMPO_PING.findall(saida)]
+
+
+def interpretar_alvo(alvo):
+    """Converte um alvo em um dicionário com tipo, host, porta e caminho da sonda.
+
+    Alvos sem prefixo são sondados por ICMP. Exemplos: 'tcp://host:443',
+    'https://host/saude', 'udp://host:7'.
+    """
+    if '://' not in alvo:
+        return {'tipo': 'icmp', 'host': alvo, 'porta': None, 'caminho': None}
+
+    partes = urlsplit(alvo)
+    tipo = partes.scheme.lower()
+    if tipo not in TIPOS_SONDA:
+        raise ValueError(f"Tipo de sonda desconhecido: {tipo}")
+
+    porta = partes.port
+    if porta is None:
+        if tipo == 'http':
+            porta = 80
+        elif tipo == 'https':
+            porta = 443
+        elif tipo in ('tcp', 'udp'):
+            raise ValueError(f"Sonda {tipo} exige uma porta: {alvo}")
+
+    caminho = partes.path or '/'
+    if partes.query:
+        caminho += f"?{partes.query}"
+    return {'tipo': tipo, 'host': partes.hostname, 'porta': porta, 'caminho': caminho}
+
+
+def agregar_rajada(rtts, enviados, status_falha="Timeout", limiar_perda=None):
+    """Agrega as respostas de uma rajada em perda %, mín/méd/máx e jitter.
+
+    Com `limiar_perda` (%), uma rajada com perda igual ou maior tem o status "Perda elevada"
+    e conta como falha, mesmo que algumas respostas tenham chegado.
+    """
+    recebidos = len(rtts)
+    if not recebidos:
+        return {
+            'ping': None, 'status': status_falha, 'min': None, 'max': None,
+            'jitter': None, 'perda': 100.0, 'enviados': enviados, 'recebidos': 0
+        }
+
+    # Jitter como a média da variação absoluta entre respostas consecutivas do ciclo
+    variacoes = [abs(rtts[i] - rtts[i - 1]) for i in range(1, recebidos)]
+    perda = round(100 * (enviados - recebidos) / enviados, 1)
+    return {
+        'ping': round(sum(rtts) / recebidos, 3),
+        'status': "Perda elevada" if limiar_perda and perda >= limiar_perda else "Sucesso",
+        'min': min(rtts),
+        'max': max(rtts),
+        'jitter': round(sum(variacoes) / len(variacoes), 3) if variacoes else 0.0,
+        'perda': perda,
+        'enviados': enviados,
+        'recebidos': recebidos
+    }
+
+
+def caminho_alterado(anterior, novo):
+    """Verifica se a rota mudou entre duas descobertas de saltos.
+
+    Saltos sem resposta em uma das descobertas são ignorados; uma diferença na quantidade
+    de saltos só conta quando as duas descobertas terminam no mesmo endereço.
+    """
+    if not anterior or not novo:
+        return False
+    if any(a and b and a != b for a, b in zip(anterior, novo)):
+        return True
+    return len(anterior) != len(novo) and anterior[-1] == novo[-1]
+
+
+class _ProtocoloEcoUDP(asyncio.DatagramProtocol):
+    """Protocolo que aguarda a primeira resposta de um eco UDP"""
+    def __init__(self, resposta):
+        self.resposta = resposta
+
+    def datagram_received(self, data, addr):
+        if not self.resposta.done():
+            self.resposta.set_result(data)
+
+    def error_received(self, exc):
+        if not self.resposta.done():
+            self.resposta.set_exception(exc)
+
+
+class MotorSondas:
+    """Executa sondas ICMP, TCP, HTTP(S) e UDP em um event loop asyncio compartilhado"""
+    def __init__(self, timeout=5, ttl_dns=300):
+        self.timeout = timeout
+        self.ttl_dns = ttl_dns  # Segundos que um endereço resolvido é reutilizado
+        self.cache_dns = {}  # (host, porta, tipo de socket) -> (expiração, família, endereço)
+        self.loop = None
+        self.thread = None
+        self.pendentes = set()  # Futuros das sondas em andamento, cancelados ao encerrar
+        self.lock_pendentes = threading.Lock()
+        self.windows = platform.system().lower() == 'windows'
+        self.macos = platform.system().lower() == 'darwin'
+
+    def iniciar(self):
+        """Inicia o event loop em um thread dedicado"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.loop = asyncio.new_event_loop()
+        pronto = threading.Event()
+        self.thread = threading.Thread(target=self._executar_loop, args=(pronto,), daemon=True)
+        self.thread.start()
+        pronto.wait()
+
+    def _executar_loop(self, pronto):
+        """Executa o event loop até ser parado"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(pronto.set)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def parar(self, prazo=None):
+        """Cancela as sondas em andamento, para o event loop e aguarda o thread encerrar.
+
+        Aguarda no máximo `prazo` segundos (padrão: o timeout das sondas); o thread do event
+        loop é daemon e não impede o fim do processo se passar do prazo.
+        """
+        fim = time.monotonic() + (self.timeout if prazo is None else prazo)
+        self.cancelar_pendentes()
+        if self.loop and self.loop.is_running():
+            try:
+                # Deixa as tarefas canceladas finalizarem (ex: encerrar processos ping) antes de parar
+                asyncio.run_coroutine_threadsafe(self._finalizar_tarefas(), self.loop).result(
+                    max(0, fim - time.monotonic()))
+            except concurrent.futures.TimeoutError:
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread and self.thread.is_alive():
+            self.thread.join(max(0, fim - time.monotonic()))
+        self.thread = None
+
+    def cancelar_pendentes(self):
+        """Cancela as sondas em andamento; quem as aguarda recebe o status "Cancelado" imediatamente"""
+        with self.lock_pendentes:
+            pendentes = list(self.pendentes)
+        for futuro in pendentes:
+            futuro.cancel()
+
+    async def _finalizar_tarefas(self):
+        """Cancela as tarefas restantes do event loop e aguarda sua finalização"""
+        tarefas = [tarefa for tarefa in asyncio.all_tasks() if tarefa is not asyncio.current_task()]
+        for tarefa in tarefas:
+            if not tarefa.cancelling():  # Cancelar de novo interromperia a limpeza em andamento
+                tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+    def _aguardar(self, corrotina, cancelado):
+        """Executa a corrotina no event loop e aguarda o resultado, retornando `cancelado` se cancelada"""
+        futuro = asyncio.run_coroutine_threadsafe(corrotina, self.loop)
+        with self.lock_pendentes:
+            self.pendentes.add(futuro)
+        try:
+            return futuro.result()
+        except concurrent.futures.CancelledError:
+            return cancelado
+        finally:
+            with self.lock_pendentes:
+                self.pendentes.discard(futuro)
+
+    def executar_em_segundo_plano(self, corrotina):
+        """Agenda a corrotina no event loop sem aguardá-la. Retorna o futuro, cancelado ao encerrar."""
+        futuro = asyncio.run_coroutine_threadsafe(corrotina, self.loop)
+        with self.lock_pendentes:
+            self.pendentes.add(futuro)
+
+        def concluir(futuro):
+            with self.lock_pendentes:
+                self.pendentes.discard(futuro)
+        futuro.add_done_callback(concluir)
+        return futuro
+
+    def sondar(self, alvo):
+        """Executa uma sonda de forma síncrona e retorna (ms, status)"""
+        return self._aguardar(self.sondar_async(alvo), (None, "Cancelado"))
+
+    def sondar_rajada(self, alvo, quantidade, intervalo=0.2, limiar_perda=None):
+        """Executa uma rajada de sondas de forma síncrona e retorna o resultado agregado"""
+        return self._aguardar(
+            self.sondar_rajada_async(alvo, quantidade, intervalo, limiar_perda),
+            agregar_rajada([], quantidade, "Cancelado")
+        )
+
+    async def sondar_rajada_async(self, alvo, quantidade, intervalo=0.2, limiar_perda=None):
+        """Envia várias sondas próximas ao alvo e agrega o resultado do ciclo"""
+        try:
+            sonda = interpretar_alvo(alvo)
+            if sonda['tipo'] == 'icmp':
+                # Uma única chamada ao ping envia toda a rajada
+                return await self.sondar_icmp_rajada(sonda['host'], quantidade, intervalo, limiar_perda)
+        except asyncio.TimeoutError:
+            return agregar_rajada([], quantidade)
+        except (ConnectionError, socket.gaierror):
+            return agregar_rajada([], quantidade, "Falha na conexão")
+        except Exception as e:
+            return agregar_rajada([], quantidade, f"Erro: {str(e)}")
+
+        rtts = []
+        status_falha = "Timeout"
+        for i in range(quantidade):
+            if i:
+                await asyncio.sleep(intervalo)
+            ms, status = await self.sondar_async(alvo)
+            if ms is not None and status == "Sucesso":
+                rtts.append(ms)
+            else:
+                status_falha = status
+        return agregar_rajada(rtts, quantidade, status_falha, limiar_perda)
+
+    async def sondar_async(self, alvo):
+        """Executa a sonda adequada ao tipo do alvo e retorna (ms, status)"""
+        try:
+            sonda = interpretar_alvo(alvo)
+            if sonda['tipo'] == 'icmp':
+                return await self.sondar_icmp(sonda['host'])
+            if sonda['tipo'] == 'tcp':
+                return await self.sondar_tcp(sonda['host'], sonda['porta'])
+            if sonda['tipo'] in ('http', 'https'):
+                return await self.sondar_http(
+                    sonda['host'], sonda['porta'], sonda['caminho'], sonda['tipo'] == 'https'
+                )
+            return await self.sondar_udp(sonda['host'], sonda['porta'])
+        except asyncio.TimeoutError:
+            return None, "Timeout"
+        except (ConnectionError, socket.gaierror):
+            return None, "Falha na conexão"
+        except Exception as e:
+            return None, f"Erro: {str(e)}"
+
+    async def resolver(self, host, porta, tipo_socket=socket.SOCK_STREAM):
+        """Resolve um host reutilizando o resultado enquanto ele estiver no cache"""
+        chave = (host, porta, tipo_socket)
+        agora = time.monotonic()
+        em_cache = self.cache_dns.get(chave)
+        if em_cache and em_cache[0] > agora:
+            return em_cache[1], em_cache[2]
+
+        enderecos = await asyncio.wait_for(
+            self.loop.getaddrinfo(host, porta, type=tipo_socket), self.timeout
+        )
+        familia, _, _, _, endereco = enderecos[0]
+        self.cache_dns[chave] = (agora + self.ttl_dns, familia, endereco)
+        return familia, endereco
+
+    def invalidar_dns(self, host, porta, tipo_socket=socket.SOCK_STREAM):
+        """Descarta um endereço do cache (ex: após falha de conexão)"""
+        self.cache_dns.pop((host, porta, tipo_socket), None)
+
+    async def _conectar(self, host, porta):
+        """Abre um socket TCP não bloqueante já conectado ao host"""
+        familia, endereco = await self.resolver(host, porta)
+        sock = socket.socket(familia, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(self.loop.sock_connect(sock, endereco), self.timeout)
+        except BaseException:
+            sock.close()
+            self.invalidar_dns(host, porta)
+            raise
+        return sock
+
+    async def _executar_ping(self, comando, timeout):
+        """Executa o binário ping e retorna (código de saída, saída)"""
+        processo = await asyncio.create_subprocess_exec(
+            *comando,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            saida, _ = await asyncio.wait_for(processo.communicate(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # Também ao cancelar (encerramento), para não deixar processos ping órfãos
+            processo.kill()
+            await processo.wait()
+            raise
+        return processo.returncode, saida
+
+    async def _ping_ttl(self, endereco, ttl):
+        """Envia um echo com TTL limitado e retorna o endereço de quem respondeu (None sem resposta)"""
+        if self.windows:
+            comando = ['ping', '-n', '1', '-i', str(ttl), '-w', str(int(self.timeout * 1000)), endereco]
+        elif self.macos:
+            comando = ['ping', '-n', '-c', '1', '-m', str(ttl), endereco]
+        else:
+            comando = ['ping', '-n', '-c', '1', '-t', str(ttl), endereco]
+        try:
+            _, saida = await self._executar_ping(comando, self.timeout)
+        except asyncio.TimeoutError:
+            return None
+        encontrado = _RESPONDENTE_PING.search(saida.decode('cp1252' if self.windows else 'utf-8', errors='replace'))
+        return encontrado.group(1) if encontrado else None
+
+    async def descobrir_caminho_async(self, alvo, max_saltos=30, lote=10):
+        """Descobre os saltos até o alvo com echos de TTL limitado.
+
+        Os TTLs são sondados em lotes paralelos, parando no lote em que o destino responde.
+        Retorna a lista de endereços por salto (None para saltos que não responderam).
+        """
+        _, endereco = await self.resolver(interpretar_alvo(alvo)['host'], None)
+        caminho = []
+        for inicio in range(1, max_saltos + 1, lote):
+            ttls = range(inicio, min(inicio + lote, max_saltos + 1))
+            respostas = await asyncio.gather(*(self._ping_ttl(endereco[0], ttl) for ttl in ttls))
+            for resposta in respostas:
+                caminho.append(resposta)
+                if resposta == endereco[0]:
+                    return caminho
+        # Destino não alcançado: descarta os saltos finais sem resposta
+        while caminho and caminho[-1] is None:
+            caminho.pop()
+        return caminho
+
+    async def sondar_caminho_async(self, saltos):
+        """Sonda todos os saltos em paralelo e retorna [(ms, status)] na ordem dos saltos"""
+        async def sondar_salto(endereco):
+            if endereco is None:
+                return None, "Sem resposta"
+            return await self.sondar_async(endereco)
+        return await asyncio.gather(*(sondar_salto(endereco) for endereco in saltos))
+
+    def descobrir_caminho(self, alvo, max_saltos=30, lote=10):
+        """Descobre, de forma síncrona, os saltos até o alvo"""
+        try:
+            return self._aguardar(self.descobrir_caminho_async(alvo, max_saltos, lote), [])
+        except (OSError, asyncio.TimeoutError, ValueError):
+            return []
+
+    def sondar_caminho(self, saltos):
+        """Sonda, de forma síncrona, todos os saltos em paralelo"""
+        return self._aguardar(self.sondar_caminho_async(saltos), [(None, "Cancelado")] * len(saltos))
+
+    async def sondar_icmp(self, host):
+        """Envia um echo ICMP usando o binário ping do sistema"""
+        _, endereco = await self.resolver(host, None)
+        param = '-n' if self.windows else '-c'
+        encoding = 'cp1252' if self.windows else 'utf-8'
+
+        codigo, saida = await self._executar_ping(['ping', param, '1', endereco[0]], self.timeout)
+        if codigo != 0:
+            return None, "Falha na conexão"
+
+        tempos = extrair_tempos(saida.decode(encoding, errors='replace'))
+        if tempos:
+            return tempos[0], "Sucesso"
+        return None, "Timeout"
+
+    async def sondar_icmp_rajada(self, host, quantidade, intervalo, limiar_perda=None):
+        """Envia uma rajada de echos ICMP em uma única execução do ping"""
+        _, endereco = await self.resolver(host, None)
+        encoding = 'cp1252' if self.windows else 'utf-8'
+        if self.windows:
+            # O ping do Windows não permite ajustar o intervalo entre pacotes
+            comando = ['ping', '-n', str(quantidade), endereco[0]]
+            duracao = quantidade
+        else:
+            comando = ['ping', '-c', str(quantidade), '-i', str(intervalo), endereco[0]]
+            duracao = quantidade * intervalo
+
+        codigo, saida = await self._executar_ping(comando, self.timeout + duracao)
+
+        rtts = extrair_tempos(saida.decode(encoding, errors='replace'))
+        status_falha = "Falha na conexão" if codigo != 0 else "Timeout"
+        return agregar_rajada(rtts, quantidade, status_falha, limiar_perda)
+
+    async def sondar_tcp(self, host, porta):
+        """Mede o tempo do handshake TCP com o host"""
+        inicio = time.perf_counter()
+        sock = await self._conectar(host, porta)
+        ms = (time.perf_counter() - inicio) * 1000
+        sock.close()
+        return round(ms, 3), "Sucesso"
+
+    async def sondar_http(self, host, porta, caminho, tls):
+        """Mede o tempo até o primeiro byte de uma requisição HTTP(S) e verifica o status"""
+        inicio = time.perf_counter()
+        sock = await self._conectar(host, porta)
+        escritor = None
+        try:
+            contexto = ssl.create_default_context() if tls else None
+            leitor, escritor = await asyncio.wait_for(
+                asyncio.open_connection(sock=sock, ssl=contexto, server_hostname=host if tls else None),
+                self.timeout
+            )
+            escritor.write(
+                f"GET {caminho} HTTP/1.1\r\nHost: {host}\r\n"
+                f"User-Agent: Monitor-de-Ping\r\nConnection: close\r\n\r\n".encode('ascii')
+            )
+            await escritor.drain()
+            linha_status = await asyncio.wait_for(leitor.readline(), self.timeout)
+            ms = (time.perf_counter() - inicio) * 1000
+        finally:
+            if escritor is not None:
+                escritor.close()
+            else:
+                sock.close()  # Falha na conexão ou no handshake TLS: nenhum transporte assumiu o socket
+
+        partes = linha_status.decode('latin-1').split()
+        if len(partes) < 2 or not partes[1].isdigit():
+            return None, "Erro: resposta HTTP inválida"
+        codigo = int(partes[1])
+        if codigo >= 400:
+            return round(ms, 3), f"HTTP {codigo}"
+        return round(ms, 3), "Sucesso"
+
+    async def sondar_udp(self, host, porta, carga=b'monitor-de-ping'):
+        """Envia um datagrama UDP e mede o tempo até o eco"""
+        familia, endereco = await self.resolver(host, porta, socket.SOCK_DGRAM)
+        resposta = self.loop.create_future()
+        transporte, _ = await self.loop.create_datagram_endpoint(
+            lambda: _ProtocoloEcoUDP(resposta), remote_addr=endereco, family=familia
+        )
+        try:
+            inicio = time.perf_counter()
+            transporte.sendto(carga)
+            await asyncio.wait_for(resposta, self.timeout)
+            ms = (time.perf_counter() - inicio) * 1000
+        finally:
+            transporte.close()
+        return round(ms, 3), "Sucesso"
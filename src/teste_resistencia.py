@@ -0,0 +1,233 @@
+"""Teste de resistência (soak) para detectar vazamentos de memória no monitor.
+
+Executa milhares de hosts simulados com tempo acelerado, amostrando RSS, os maiores
+alocadores do tracemalloc, quantidade de threads e profundidade das filas. Termina
+com código 1 se o crescimento após o aquecimento ultrapassar os limites.
+
+Uso: python src/teste_resistencia.py --hosts 2000 --duracao 300 --limite-rss 30
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from log import GerenciadorLog
+from main import MonitorMultiplosHosts
+from notificação import NotificadorBase, registrar_notificador
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class NotificadorSimulado(NotificadorBase):
+    """Notificador que não envia nada, exercitando apenas limitador e filas"""
+    intervalo_minimo = 1
+
+    def enviar_notificacao(self, mensagem):
+        return True
+
+
+@registrar_notificador('simulado')
+def _criar_simulado(config):
+    return NotificadorSimulado()
+
+
+class MonitorSimulado(MonitorMultiplosHosts):
+    """Monitor cujas sondas são simuladas, sem acesso à rede"""
+    def __init__(self, taxa_falhas):
+        super().__init__()
+        self.taxa_falhas = taxa_falhas
+
+    def verificar_ping(self, host):
+        if random.random() < self.taxa_falhas:
+            return None, "Timeout"
+        return round(random.uniform(1, 50), 3), "Sucesso"
+
+    def verificar_rajada(self, host):
+        ms, status = self.verificar_ping(host)
+        return {
+            'ping': ms, 'status': status, 'min': ms, 'max': ms, 'jitter': 0.0,
+            'perda': 0.0 if ms is not None else 100.0, 'enviados': 1, 'recebidos': int(ms is not None)
+        }
+
+
+def obter_rss_mb():
+    """Retorna a memória residente do processo em MB"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    try:
+        # Linux sem psutil
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+def profundidade_filas(monitor):
+    """Soma a quantidade de itens pendentes nas filas de log e de notificação"""
+    filas_log = sum(g.log_queue.qsize() for g in list(GerenciadorLog._instances.values()))
+    filas_notificacao = sum(n.log_queue.qsize() for n in monitor.notificador.notificadores.values())
+    return filas_log + filas_notificacao
+
+
+def coletar_amostra(monitor):
+    """Coleta uma amostra dos indicadores de consumo do processo"""
+    atual, _ = tracemalloc.get_traced_memory()
+    return {
+        'tempo': time.monotonic(),
+        'rss_mb': obter_rss_mb(),
+        'tracemalloc_mb': atual / 1024 / 1024,
+        'threads': threading.active_count(),
+        'filas': profundidade_filas(monitor),
+        'instancias_log': len(GerenciadorLog._instances),
+        'historico': sum(len(m.historico) for m in list(monitor.hosts.values())),
+    }
+
+
+def renovar_hosts(monitor, quantidade, sequencia):
+    """Remove e adiciona hosts para exercitar a limpeza de recursos por host"""
+    # list(dict) sob o lock: os threads de monitoramento não alteram o dicionário, mas a API sim
+    with monitor.lock:
+        hosts = list(monitor.hosts)
+    for host in random.sample(hosts, min(quantidade, len(hosts))):
+        monitor.remover_host(host)
+    novos = [f"10.{(sequencia + i) >> 16 & 255}.{(sequencia + i) >> 8 & 255}.{(sequencia + i) & 255}"
+             for i in range(quantidade)]
+    monitor.adicionar_host(novos)
+    with monitor.lock:
+        for host in novos:
+            monitor.iniciar_thread(host)
+    return sequencia + quantidade
+
+
+class Renovacao(threading.Thread):
+    """Renova hosts em segundo plano, para que a remoção (que aguarda o thread de log do
+    host, até 5s) não atrase a amostragem. Mede o tempo gasto em cada renovação."""
+    def __init__(self, monitor, quantidade, intervalo):
+        super().__init__(daemon=True)
+        self.monitor = monitor
+        self.quantidade = quantidade
+        self.intervalo = intervalo
+        self.sequencia = 1 << 20
+        self.duracoes = []
+        self.parar = threading.Event()
+
+    def run(self):
+        while not self.parar.wait(self.intervalo):
+            inicio = time.monotonic()
+            self.sequencia = renovar_hosts(self.monitor, self.quantidade, self.sequencia)
+            self.duracoes.append(time.monotonic() - inicio)
+
+
+def executar(args):
+    """Executa o teste em um diretório temporário e retorna True se nenhum limite foi ultrapassado"""
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='teste_resistencia_') as diretorio:
+        os.chdir(diretorio)
+        try:
+            return medir(args)
+        finally:
+            # Grava os logs pendentes antes de o diretório ser removido
+            GerenciadorLog.parar_todas()
+            os.chdir(diretorio_original)
+
+
+def medir(args):
+    """Executa o monitor simulado no diretório atual e compara o consumo com a base"""
+    with open('config.json', 'w') as f:
+        json.dump({
+            'intervalo_ping': args.intervalo,
+            'max_hosts': 0,
+            'tipos_notificacao': ['simulado'],
+            'tamanho_historico': args.tamanho_historico,
+        }, f)
+
+    tracemalloc.start(args.quadros)
+    monitor = MonitorSimulado(args.taxa_falhas)
+    monitor.adicionar_host([f"10.0.{i >> 8 & 255}.{i & 255}" for i in range(args.hosts)])
+    monitor.iniciar_monitoramento()
+
+    print(f"Aquecendo por {args.aquecimento}s com {args.hosts} hosts simulados...")
+    time.sleep(args.aquecimento)
+    # O histórico por host cresce até o limite; a base só é válida depois de saturá-lo
+    capacidade = len(monitor.hosts) * args.tamanho_historico
+    prazo = time.monotonic() + 2 * args.aquecimento
+    while coletar_amostra(monitor)['historico'] < 0.95 * capacidade and time.monotonic() < prazo:
+        time.sleep(1)
+    renovacao = Renovacao(monitor, args.renovacao, args.amostragem) if args.renovacao else None
+    if renovacao:
+        renovacao.start()  # Antes da base, para que o thread de renovação não conte como crescimento
+    base = coletar_amostra(monitor)
+    snapshot_base = tracemalloc.take_snapshot()
+
+    falhou = False
+    fim = time.monotonic() + args.duracao
+    while time.monotonic() < fim:
+        time.sleep(args.amostragem)
+        amostra = coletar_amostra(monitor)
+        print(
+            f"RSS: {amostra['rss_mb']:.1f}MB ({amostra['rss_mb'] - base['rss_mb']:+.1f}) - "
+            f"tracemalloc: {amostra['tracemalloc_mb']:.1f}MB ({amostra['tracemalloc_mb'] - base['tracemalloc_mb']:+.1f}) - "
+            f"Threads: {amostra['threads']} - Filas: {amostra['filas']} - "
+            f"Logs: {amostra['instancias_log']} - Histórico: {amostra['historico']}"
+        )
+
+    final = coletar_amostra(monitor)
+    if renovacao:
+        renovacao.parar.set()
+        renovacao.join()
+    print("\nMaiores crescimentos de alocação desde o aquecimento:")
+    for estatistica in tracemalloc.take_snapshot().compare_to(snapshot_base, 'lineno')[:args.top]:
+        print(f"  {estatistica}")
+
+    limites = [
+        ('RSS (MB)', final['rss_mb'] - base['rss_mb'], args.limite_rss),
+        ('tracemalloc (MB)', final['tracemalloc_mb'] - base['tracemalloc_mb'], args.limite_tracemalloc),
+        ('Threads', final['threads'] - base['threads'], args.limite_threads),
+        ('Filas', final['filas'] - base['filas'], args.limite_filas),
+    ]
+    print("\nResultado:")
+    for nome, crescimento, limite in limites:
+        excedeu = crescimento > limite
+        falhou = falhou or excedeu
+        print(f"  {nome}: crescimento {crescimento:+.1f} (limite {limite}) - {'FALHA' if excedeu else 'OK'}")
+
+    descartados = sum(g.descartados for g in list(GerenciadorLog._instances.values()))
+    print(f"  Entradas de log descartadas por fila cheia: {descartados}")
+    if renovacao and renovacao.duracoes:
+        print(f"  Renovações: {len(renovacao.duracoes)} - tempo médio "
+              f"{sum(renovacao.duracoes) / len(renovacao.duracoes):.2f}s, máximo {max(renovacao.duracoes):.2f}s")
+
+    monitor.parar_monitoramento()
+    tracemalloc.stop()
+    return not falhou
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de resistência do Monitor de Ping")
+    parser.add_argument('--hosts', type=int, default=2000, help="Quantidade de hosts simulados")
+    parser.add_argument('--duracao', type=float, default=300, help="Duração da medição, em segundos")
+    parser.add_argument('--aquecimento', type=float, default=30, help="Tempo antes da amostra base, em segundos")
+    parser.add_argument('--amostragem', type=float, default=10, help="Intervalo entre amostras, em segundos")
+    parser.add_argument('--intervalo', type=float, default=0.05, help="Intervalo de ping acelerado, em segundos")
+    parser.add_argument('--taxa-falhas', type=float, default=0.05, help="Fração de sondas simuladas com falha")
+    parser.add_argument('--tamanho-historico', type=int, default=100, help="Resultados mantidos por host")
+    parser.add_argument('--renovacao', type=int, default=10, help="Hosts removidos e adicionados por amostra")
+    parser.add_argument('--top', type=int, default=10, help="Quantidade de alocadores exibidos")
+    parser.add_argument('--quadros', type=int, default=1, help="Quadros de pilha guardados pelo tracemalloc")
+    parser.add_argument('--limite-rss', type=float, default=50, help="Crescimento máximo de RSS, em MB")
+    parser.add_argument('--limite-tracemalloc', type=float, default=20, help="Crescimento máximo no tracemalloc, em MB")
+    parser.add_argument('--limite-threads', type=int, default=20, help="Crescimento máximo de threads")
+    parser.add_argument('--limite-filas', type=int, default=50000, help="Crescimento máximo dos itens em filas")
+    sys.exit(0 if executar(parser.parse_args()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def diretorio(tmp_path, monkeypatch):
+    """Executa o teste em um diretório temporário (config.json, logs e registro ficam nele)"""
+    from log import GerenciadorLog
+
+    monkeypatch.chdir(tmp_path)
+    GerenciadorLog.reabrir()  # O teste anterior encerrou os logs
+    yield tmp_path
+    # Grava os logs criados no teste enquanto o diretório ainda é o atual
+    GerenciadorLog.parar_todas(1)
+
+
+@pytest.fixture
+def criar_monitor(diretorio):
+    """Cria um MonitorMultiplosHosts com o config.json informado, parando-o ao final do teste"""
+    from main import MonitorMultiplosHosts
+
+    monitores = []
+
+    def criar(**config):
+        config.setdefault('tipos_notificacao', [])
+        (diretorio / 'config.json').write_text(json.dumps(config))
+        monitor = MonitorMultiplosHosts()
+        monitores.append(monitor)
+        return monitor
+
+    yield criar
+    for monitor in monitores:
+        if monitor.running:
+            monitor.parar_monitoramento()
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from anomalias import DetectorAnomalias
+from log import GerenciadorLog
+
+
+def aquecer(detector, host="a", amostras=30):
+    for i in range(amostras):
+        detector.registrar(host, 10.0 + (i % 3))
+    assert detector.avaliar() == ([], [])
+
+
+def test_todas_as_amostras_entre_avaliacoes_sao_consideradas():
+    detector = DetectorAnomalias(ciclos_minimos=3)
+    aquecer(detector)
+    media, _ = detector.linha_de_base("a")
+    assert media == pytest.approx(11.0, abs=0.5)
+
+    # Três amostras degradadas seguidas antes de uma única avaliação
+    for _ in range(3):
+        detector.registrar("a", 200.0)
+    [(host, ping, media, _)] = detector.avaliar()[0]
+    assert host == "a" and ping == 200.0 and media < 40
+
+    detector.registrar("a", 11.0)
+    assert [host for host, *_ in detector.avaliar()[1]] == ["a"]
+
+
+def test_amostra_normal_no_meio_reinicia_a_sequencia():
+    detector = DetectorAnomalias(ciclos_minimos=3)
+    aquecer(detector)
+    for ping in (200.0, 200.0, 11.0, 200.0, 200.0):
+        detector.registrar("a", ping)
+    assert detector.avaliar() == ([], [])
+
+
+def test_falhas_sao_ignoradas():
+    detector = DetectorAnomalias()
+    detector.registrar("a", None)
+    assert "a" not in detector.slots
+    aquecer(detector)
+    contagem = int(detector.contagem[detector.slots["a"]])
+    detector.registrar("a", None)
+    detector.avaliar()
+    assert int(detector.contagem[detector.slots["a"]]) == contagem
+
+
+def test_buffer_cheio_mantem_as_amostras_mais_recentes():
+    detector = DetectorAnomalias(amostras_pendentes=4)
+    for ping in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+        detector.registrar("a", ping)
+    detector.avaliar()
+    slot = detector.slots["a"]
+    assert int(detector.contagem[slot]) == 4
+    assert float(detector.amostra[slot]) == 6.0
+
+
+def test_hosts_avaliados_de_forma_independente():
+    detector = DetectorAnomalias(ciclos_minimos=1)
+    aquecer(detector, "a")
+    aquecer(detector, "b")
+    detector.registrar("a", 500.0)
+    detector.registrar("b", 11.0)
+    assert [host for host, *_ in detector.avaliar()[0]] == ["a"]
+
+
+def test_avaliar_anomalias_ignora_hosts_removidos(criar_monitor):
+    monitor = criar_monitor()
+    monitor.adicionar_host(["a"])
+    monitor.detector = DetectorAnomalias()
+    monitor.detector.avaliar = lambda: ([("removido", 200.0, 10.0, 1.0)], [("removido", 10.0, 10.0, 1.0)])
+    monitor.avaliar_anomalias()
+    assert "removido" not in GerenciadorLog._instances
@@ -0,0 +1,89 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api import ServidorAPI
+
+
+def atualizar(monitor, host, ping):
+    """Registra um resultado como o thread de monitoramento faria"""
+    with monitor.lock:
+        if monitor.hosts[host].adicionar_resultado(ping, "Sucesso"):
+            monitor.registrar_alteracao(host, monitor.hosts[host].versao)
+
+
+@pytest.fixture
+def monitor(criar_monitor):
+    monitor = criar_monitor()
+    monitor.adicionar_host(["a", "b", "c"])
+    return monitor
+
+
+def test_obter_alteracoes(monitor):
+    versao, hosts, removidos, completo = monitor.obter_alteracoes()
+    assert completo and set(hosts) == {"a", "b", "c"} and removidos == []
+
+    atualizar(monitor, "a", 10.0)
+    atualizar(monitor, "a", 12.0)
+    monitor.remover_host("b")
+    nova_versao, hosts, removidos, completo = monitor.obter_alteracoes(versao)
+    assert not completo and nova_versao > versao
+    assert list(hosts) == ["a"] and hosts["a"]["último_ping"] == 12.0
+    assert removidos == ["b"]
+    assert monitor.obter_alteracoes(nova_versao)[1:] == ({}, [], False)
+
+
+def test_obter_alteracoes_fora_do_log_retorna_estado_completo(monitor):
+    monitor.alteracoes.clear()
+    atualizar(monitor, "a", 10.0)
+    atualizar(monitor, "c", 10.0)
+    _, hosts, _, completo = monitor.obter_alteracoes(monitor.versao_atual - 5)
+    assert completo and set(hosts) == {"a", "b", "c"}
+
+
+@pytest.fixture
+def api(monitor):
+    servidor = ServidorAPI(monitor, porta=0, intervalo_eventos=0.05)  # Porta efêmera
+    servidor.iniciar()
+    yield servidor
+    servidor.parar()
+
+
+def obter(api, caminho):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{api.porta}{caminho}", timeout=5) as resposta:
+            return resposta.status, json.load(resposta)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_api_estatisticas(api, monitor):
+    codigo, dados = obter(api, "/estatisticas")
+    assert codigo == 200 and dados["completo"] and set(dados["hosts"]) == {"a", "b", "c"}
+
+    atualizar(monitor, "c", 3.0)
+    codigo, dados = obter(api, f"/estatisticas?desde={dados['versao']}")
+    assert codigo == 200 and not dados["completo"] and list(dados["hosts"]) == ["c"]
+
+    assert obter(api, "/estatisticas?desde=abc")[0] == 400
+
+
+def test_api_rotas_indisponiveis(api):
+    assert obter(api, "/inexistente")[0] == 404
+    assert obter(api, "/caminho?host=desconhecido")[0] == 404
+    assert obter(api, "/notificacoes")[0] == 503  # Caixa de saída só existe com o monitoramento iniciado
+
+
+def test_api_eventos(api, monitor):
+    with urllib.request.urlopen(f"http://127.0.0.1:{api.porta}/eventos", timeout=5) as resposta:
+        assert resposta.headers["Content-Type"].startswith("text/event-stream")
+        linhas = [resposta.readline().decode() for _ in range(3)]
+        assert linhas[1] == "event: completo\n"
+        assert set(json.loads(linhas[2][len("data: "):])["hosts"]) == {"a", "b", "c"}
+
+        atualizar(monitor, "b", 7.0)
+        while (linha := resposta.readline().decode()) != "event: delta\n":
+            pass
+        assert list(json.loads(resposta.readline().decode()[len("data: "):])["hosts"]) == ["b"]
@@ -0,0 +1,82 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from armazenamento import ArmazenamentoColunar
+
+
+def test_agregados_da_janela():
+    armazenamento = ArmazenamentoColunar(janela=4)
+    for ping in (10.0, 20.0, None, 30.0, 40.0):  # A primeira amostra sai da janela
+        armazenamento.registrar("a", ping, ping is not None)
+    agregados = armazenamento.calcular_agregados()["a"]
+    assert agregados["media"] == 30.0
+    assert agregados["minimo"] == 20.0 and agregados["maximo"] == 40.0
+    assert agregados["perda"] == 25.0
+
+
+def test_perda_em_pacotes_nas_rajadas():
+    armazenamento = ArmazenamentoColunar(janela=10)
+    armazenamento.registrar("a", 10.0, True, enviados=10, recebidos=9)
+    armazenamento.registrar("a", None, False, enviados=10, recebidos=0)
+    # 11 de 20 pacotes perdidos, não 1 de 2 ciclos
+    assert armazenamento.calcular_agregados()["a"]["perda"] == 55.0
+    assert armazenamento.resumo_frota()["perda_geral"] == 55.0
+
+
+def test_top_n_e_hosts_sem_dados_no_fim():
+    armazenamento = ArmazenamentoColunar(capacidade=2)  # Amplia a capacidade sob demanda
+    for host, ping in (("a", 10.0), ("b", 50.0), ("c", 30.0)):
+        armazenamento.registrar(host, ping, True)
+    armazenamento.registrar("d", None, False)
+    assert armazenamento.top_n("p95", 2) == [("b", 50.0), ("c", 30.0)]
+    assert [host for host, _ in armazenamento.top_n("media", 4, maiores=False)] == ["a", "c", "b", "d"]
+    with pytest.raises(ValueError):
+        armazenamento.top_n("desconhecida")
+
+
+def test_resumo_frota_e_grupos():
+    armazenamento = ArmazenamentoColunar()
+    armazenamento.registrar("a", 10.0, True)
+    armazenamento.registrar("b", 30.0, True)
+    armazenamento.registrar("c", None, False)
+    resumo = armazenamento.resumo_frota()
+    assert resumo["hosts"] == 3 and resumo["em_falha"] == 1
+    assert resumo["media_ping"] == 20.0
+    grupos = armazenamento.agregados_por_grupo({"web": ["a", "b"], "vazio": ["x"]})
+    assert grupos == {"web": {"hosts": 2, "media": 20.0, "p95": 20.0, "perda": 0.0}}
+
+
+def test_remover_reaproveita_slot():
+    armazenamento = ArmazenamentoColunar()
+    armazenamento.registrar("a", 10.0, True)
+    slot = armazenamento.slots["a"]
+    armazenamento.remover("a")
+    armazenamento.registrar("b", 99.0, True)
+    assert armazenamento.slots["b"] == slot
+    assert armazenamento.calcular_agregados()["b"]["media"] == 99.0
+
+
+def test_exportar_e_restaurar():
+    origem = ArmazenamentoColunar(janela=4)
+    origem.registrar("a", 10.0, True)
+    origem.registrar("b", 20.0, True)
+    destino = ArmazenamentoColunar(janela=4)
+    destino.restaurar(*origem.exportar(), permitidos={"a"})
+    assert list(destino.slots) == ["a"]
+    assert destino.calcular_agregados()["a"]["media"] == 10.0
+    # Colunas com outro tamanho de janela são ignoradas
+    outra_janela = ArmazenamentoColunar(janela=8)
+    outra_janela.restaurar(*origem.exportar())
+    assert outra_janela.calcular_agregados()["a"]["media"] is None
+
+
+def test_obter_estatisticas_inclui_a_janela(criar_monitor):
+    monitor = criar_monitor()
+    monitor.adicionar_host(["a", "b"])
+    monitor.armazenamento = ArmazenamentoColunar()
+    monitor.armazenamento.registrar("a", 10.0, True)
+    estatisticas = monitor.obter_estatisticas()
+    assert estatisticas["a"]["janela"]["media"] == 10.0
+    assert estatisticas["b"]["janela"] is None and estatisticas["b"]["status"] == "Iniciando..."
+    assert list(monitor.obter_estatisticas(top=1)) == ["a"]
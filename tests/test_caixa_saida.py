@@ -0,0 +1,116 @@
+import time
+
+from caixa_saida import ADIADA, CaixaSaida
+from notificação import GerenciadorNotificacoes, NotificadorBase
+
+
+class NotificadorFalso(NotificadorBase):
+    """Notificador que registra os envios ou falha como um provedor fora do ar"""
+    def __init__(self, entregar=True):
+        super().__init__()
+        self.entregar = entregar
+        self.enviadas = []
+
+    def enviar_notificacao(self, mensagem):
+        if not self.entregar:
+            self.registrar_erro('telegram', 'servidor indisponível')
+            return False
+        self.enviadas.append((self.host, mensagem))
+        return True
+
+
+def test_reenvio_usa_o_limitador_do_canal(diretorio):
+    gerenciador = GerenciadorNotificacoes()
+    notificador = NotificadorFalso()
+    gerenciador.adicionar_notificador('telegram', notificador)
+
+    assert gerenciador.reenviar('telegram', 'host1', None, 'alerta') == (True, None)
+    # O reenvio consumiu o token compartilhado: o envio normal do mesmo host aguarda
+    assert gerenciador.enviar_notificacao('outro alerta', tipos=['telegram'], host='host1') == {'telegram': False}
+    # E um novo reenvio é adiado em vez de ignorar o limite
+    entregue, espera = gerenciador.reenviar('telegram', 'host1', None, 'alerta 2')
+    assert entregue == ADIADA and 59 < espera <= 60
+    assert notificador.enviadas == [('host1', 'alerta')]
+    # Outros hosts não são afetados
+    assert gerenciador.reenviar('telegram', 'host2', None, 'alerta') == (True, None)
+
+
+def test_reenvio_de_canal_inativo(diretorio):
+    assert GerenciadorNotificacoes().reenviar('telegram', 'host1', None, 'alerta') == (None, None)
+
+
+def test_falha_de_entrega_vai_para_caixa_de_saida(diretorio):
+    gerenciador = GerenciadorNotificacoes()
+    gerenciador.adicionar_notificador('telegram', NotificadorFalso(entregar=False))
+    gerenciador.caixa_saida = CaixaSaida(str(diretorio / 'caixa'), gerenciador.reenviar)
+    assert gerenciador.enviar_notificacao('alerta', tipos=['telegram'], host='host1') == {'telegram': False}
+    [item] = gerenciador.caixa_saida.pendentes.values()
+    assert item['ultimo_erro'] == 'servidor indisponível'
+
+
+def test_caixa_saida_deduplica_e_persiste(diretorio):
+    caixa = CaixaSaida(str(diretorio), lambda *args: (True, None))
+    assert caixa.adicionar('email', 'host1', 'Alerta', 'msg', 'erro')
+    assert caixa.adicionar('email', 'host1', 'Alerta', 'msg', 'erro') is None
+    assert caixa.obter_metricas()['duplicadas'] == 1
+    # Outra instância carrega a pendente gravada em disco
+    assert len(CaixaSaida(str(diretorio), None).pendentes) == 1
+
+
+def test_chave_ignora_a_mensagem(diretorio):
+    caixa = CaixaSaida(str(diretorio), None)
+    assert caixa.adicionar('email', 'host1', 'Alerta', 'Status: Timeout', estado='falha')
+    # O mesmo alerta com outro texto não gera uma segunda pendente
+    assert caixa.adicionar('email', 'host1', 'Alerta', 'Status: Host inacessível', estado='falha') is None
+    assert caixa.adicionar('email', 'host1', 'Alerta', 'Status: Timeout', estado='latencia_degradada')
+    assert len(caixa.pendentes) == 2
+
+
+def test_caixa_saida_limita_pendentes_e_mortas(diretorio):
+    caixa = CaixaSaida(str(diretorio), None, maximo_pendentes=2, maximo_mortas=2)
+    chaves = [caixa.adicionar('email', f'host{i}', None, 'msg') for i in range(5)]
+    # As mais antigas vão para as mortas; só as duas mais recentes de cada uma ficam
+    assert set(caixa.pendentes) == set(chaves[3:])
+    assert len(list(diretorio.glob('*.json'))) == 2
+    assert len(list((diretorio / 'mortas').iterdir())) == 2
+    metricas = caixa.obter_metricas()
+    assert (metricas['excedentes'], metricas['mortas']) == (3, 3)
+
+
+def test_caixa_saida_entrega_e_descarta_apos_tentativas(diretorio):
+    resultados = {'a': (True, None), 'b': (False, 'recusado')}
+    caixa = CaixaSaida(str(diretorio), lambda tipo, *args: resultados[tipo], tentativas_maximas=2)
+    caixa.adicionar('a', 'host1', None, 'msg')
+    caixa.adicionar('b', 'host1', None, 'msg')
+    for item in caixa.pendentes.values():
+        item['proxima_tentativa'] = 0
+    caixa.processar()
+    metricas = caixa.obter_metricas()
+    assert (metricas['entregues'], metricas['mortas'], metricas['pendentes']) == (1, 1, 0)
+    assert len(list((diretorio / 'mortas').iterdir())) == 1
+
+
+def test_reenvio_adiado_nao_conta_como_tentativa(diretorio):
+    caixa = CaixaSaida(str(diretorio), lambda *args: (ADIADA, 30), tentativas_maximas=2)
+    chave = caixa.adicionar('email', 'host1', None, 'msg')
+    caixa.pendentes[chave]['proxima_tentativa'] = 0
+    caixa.processar()
+    item = caixa.pendentes[chave]
+    assert item['tentativas'] == 1
+    assert item['proxima_tentativa'] >= time.time() + 29
+    assert caixa.obter_metricas()['tentativas'] == 0
+
+
+def test_reenvio_para_host_removido_nao_recria_o_log(criar_monitor):
+    from log import GerenciadorLog
+
+    monitor = criar_monitor(hosts=['h1'], intervalo_estado=0, deteccao_anomalias=False)
+    monitor.atualizar_configuracoes()
+    monitor.adicionar_hosts_configurados()
+    monitor.notificador.adicionar_notificador('telegram', NotificadorFalso())
+    GerenciadorLog.get_instance('h1')
+    monitor.remover_host('h1')
+
+    assert monitor.reenviar_notificacao('telegram', 'h1', None, 'alerta') == (True, None)
+    monitor.notificador.enviar_notificacao('alerta', tipos=['telegram'], host='h1')
+    assert 'h1' not in GerenciadorLog._instances
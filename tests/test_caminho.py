@@ -0,0 +1,145 @@
+import json
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from sondas import _RESPONDENTE_PING, MotorSondas, caminho_alterado
+
+# Simula o binário ping: com -t (TTL) menor que a quantidade de saltos do arquivo `saltos`,
+# responde "Time to live exceeded" a partir de 10.<rota>.0.<ttl>; o salto 3 não responde
+PING_SIMULADO = f"""#!{sys.executable}
+import os, sys
+argumentos = sys.argv[1:]
+alvo = argumentos[-1]
+rota, saltos = open(os.path.join(os.path.dirname(__file__), 'saltos')).read().split()
+print(f"PING {{alvo}} ({{alvo}}) 56(84) bytes of data.")
+if '-t' in argumentos:
+    ttl = int(argumentos[argumentos.index('-t') + 1])
+    if ttl == 3:
+        sys.exit(1)
+    if ttl < int(saltos):
+        print(f"From 10.{{rota}}.0.{{ttl}} icmp_seq=1 Time to live exceeded")
+        sys.exit(1)
+print(f"64 bytes from {{alvo}}: icmp_seq=1 ttl=64 time=1.5 ms")
+"""
+
+
+def respondente(saida):
+    encontrado = _RESPONDENTE_PING.search(saida)
+    return encontrado.group(1) if encontrado else None
+
+
+def test_respondente_nas_saidas_do_ping():
+    assert respondente("64 bytes from 8.8.8.8: icmp_seq=1 ttl=117 time=9.1 ms") == "8.8.8.8"
+    assert respondente("From 192.168.0.1 icmp_seq=1 Time to live exceeded") == "192.168.0.1"
+    assert respondente("Reply from 10.0.0.1: TTL expired in transit.") == "10.0.0.1"
+    assert respondente("Resposta de 10.0.0.254: TTL expirado em trânsito.") == "10.0.0.254"
+    assert respondente("64 bytes from 2001:db8::1: icmp_seq=1 ttl=64 time=3 ms") == "2001:db8::1"
+    # "de" no fim de outra palavra não é o respondente
+    assert respondente("Unidade 10.9.9.9 indisponível") is None
+    assert respondente("Esgotado o tempo limite do pedido.") is None
+
+
+def test_caminho_alterado():
+    assert not caminho_alterado([], ["a", "b"])
+    assert not caminho_alterado(["a", "b"], ["a", "b"])
+    assert caminho_alterado(["a", "b", "c"], ["a", "x", "c"])
+    # Saltos sem resposta em uma das descobertas não contam como mudança
+    assert not caminho_alterado(["a", None, "c"], ["a", "b", "c"])
+    # Quantidade diferente só conta quando o destino é o mesmo
+    assert caminho_alterado(["a", "b", "c"], ["a", "c"])
+    assert not caminho_alterado(["a", "b"], ["a", "b", "c"])
+
+
+@pytest.fixture
+def ping_simulado(tmp_path, monkeypatch):
+    if sys.platform.startswith('win'):
+        pytest.skip("simulação do ping usa um script executável")
+    diretorio = tmp_path / 'bin'
+    diretorio.mkdir()
+    script = diretorio / 'ping'
+    script.write_text(PING_SIMULADO)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{diretorio}{os.pathsep}{os.environ['PATH']}")
+
+    def definir_rota(rota, saltos):
+        (diretorio / 'saltos').write_text(f"{rota} {saltos}")
+    definir_rota(1, 5)
+    return definir_rota
+
+
+def test_descobrir_caminho_com_ping_simulado(ping_simulado):
+    motor = MotorSondas(timeout=2)
+    motor.iniciar()
+    try:
+        assert motor.descobrir_caminho("127.0.0.1", max_saltos=10, lote=2) == [
+            "10.1.0.1", "10.1.0.2", None, "10.1.0.4", "127.0.0.1"
+        ]
+    finally:
+        motor.parar()
+
+
+def aguardar(condicao, prazo=10):
+    fim = time.monotonic() + prazo
+    while not condicao():
+        assert time.monotonic() < fim, "condição não atingida no prazo"
+        time.sleep(0.05)
+
+
+def test_modo_caminho_no_monitor(criar_monitor, ping_simulado, diretorio):
+    pytest.importorskip("numpy")
+    config = {
+        'hosts': [{'host': '127.0.0.1', 'caminho': True}], 'intervalo_ping': 0.1,
+        'ciclos_descoberta_caminho': 2, 'max_saltos': 10, 'intervalo_estado': 0, 'deteccao_anomalias': False,
+    }
+    monitor = criar_monitor(**config)
+    monitor.iniciar_monitoramento()
+    host = monitor.hosts['127.0.0.1']
+    aguardar(lambda: len(host.saltos) == 5 and monitor.obter_caminho('127.0.0.1')[0].get('media'))
+    assert [salto['endereco'] for salto in monitor.obter_caminho('127.0.0.1')][:2] == ["10.1.0.1", "10.1.0.2"]
+
+    ping_simulado(2, 5)  # Nova rota com os mesmos saltos
+    aguardar(lambda: host.alteracoes_caminho == 1)
+
+    # Desativar o modo caminho pelo recarregamento descarta os saltos e suas estatísticas
+    config['hosts'] = ['127.0.0.1']
+    (diretorio / 'config.json').write_text(json.dumps(dict(config, tipos_notificacao=[])))
+    monitor.recarregar_configuracoes()
+    time.sleep(0.3)
+    assert host.saltos == [] and monitor.obter_caminho('127.0.0.1') == []
+    assert not [chave for chave in monitor.armazenamento_saltos.slots if chave[0] == '127.0.0.1']
+    assert host.snapshot['saltos'] is None
+
+
+def test_descoberta_nao_bloqueia_o_event_loop_com_o_lock_ocupado(criar_monitor):
+    import asyncio
+
+    monitor = criar_monitor(hosts=[{'host': 'h', 'caminho': True}], intervalo_estado=0, deteccao_anomalias=False)
+    monitor.atualizar_configuracoes()
+    monitor.adicionar_hosts_configurados()
+    host = monitor.hosts['h']
+
+    async def descobrir(alvo, max_saltos):
+        return ["10.0.0.1", "h"]
+
+    async def sondar(saltos):
+        return [(1.0, "Sucesso")] * len(saltos)
+
+    monitor.motor.descobrir_caminho_async = descobrir
+    monitor.motor.sondar_caminho_async = sondar
+    monitor.motor.iniciar()
+    monitor.running = True
+    try:
+        with monitor.lock:  # Ex.: a API ou um recarregamento segurando o lock do monitor
+            tarefa = asyncio.run_coroutine_threadsafe(monitor.monitorar_caminho('h', host), monitor.motor.loop)
+            time.sleep(0.2)
+            # O event loop continua atendendo as sondas dos demais hosts
+            assert asyncio.run_coroutine_threadsafe(asyncio.sleep(0), monitor.motor.loop).result(1) is None
+        aguardar(lambda: host.saltos == ["10.0.0.1", "h"])
+    finally:
+        monitor.running = False
+        tarefa.cancel()
+        monitor.motor.parar(1)
@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from dependencias import MapaDependencias
+from notificação import NotificadorTelegram
+
+
+def monitor(status, idade=0):
+    return SimpleNamespace(status=status, criado_em=time.monotonic() - idade)
+
+
+def test_ancestrais_e_descendentes():
+    mapa = MapaDependencias({"servidor": "switch", "switch": ["gateway", "backup"]})
+    assert sorted(mapa.ancestrais("servidor")) == ["backup", "gateway", "switch"]
+    assert sorted(mapa.descendentes("gateway")) == ["servidor", "switch"]
+    assert mapa.ancestrais("gateway") == []
+
+
+def test_ciclos_e_auto_dependencia_sao_tolerados():
+    mapa = MapaDependencias({"a": ["b", "a"], "b": "c", "c": "a"})
+    assert sorted(mapa.ancestrais("a")) == ["b", "c"]
+    assert sorted(mapa.descendentes("a")) == ["b", "c"]
+
+
+def test_pai_em_falha():
+    mapa = MapaDependencias({"servidor": "switch", "switch": "gateway"})
+    monitores = {"servidor": monitor("Timeout"), "switch": monitor("Sucesso"), "gateway": monitor("Timeout")}
+    assert mapa.pai_em_falha("servidor", monitores) == "gateway"
+    monitores["gateway"] = monitor("Sucesso")
+    assert mapa.pai_em_falha("servidor", monitores) is None
+    # Pais que não são monitorados são ignorados
+    assert mapa.pai_em_falha("servidor", {"servidor": monitor("Timeout")}) is None
+
+
+def test_pai_pendente_so_suprime_durante_a_carencia():
+    mapa = MapaDependencias({"servidor": "gateway"})
+    monitores = {"gateway": monitor("Iniciando...")}
+    assert mapa.pai_em_falha("servidor", monitores) is None
+    assert mapa.pai_em_falha("servidor", monitores, carencia_pendentes=30) == "gateway"
+    # Um pai que nunca respondeu (thread aguardando vaga, sonda travada) deixa de suprimir
+    monitores["gateway"] = monitor("Iniciando...", idade=31)
+    assert mapa.pai_em_falha("servidor", monitores, carencia_pendentes=30) is None
+
+
+def test_descendentes_em_falha():
+    mapa = MapaDependencias({"a": "gateway", "b": "gateway", "c": "b", "d": "gateway"})
+    monitores = {
+        "a": monitor("Timeout"), "b": monitor("Sucesso"),
+        "c": monitor("Falha na conexão"), "d": monitor("Iniciando..."),
+    }
+    assert sorted(mapa.descendentes_em_falha("gateway", monitores)) == ["a", "c"]
+
+
+class NotificadorRegistro(NotificadorTelegram):
+    """Telegram que apenas registra os hosts alertados"""
+    def __init__(self, alertados):
+        super().__init__('token', 'chat')
+        self.alertados = alertados
+
+    def enviar_notificacao(self, mensagem):
+        self.alertados.append(self.host)
+        return True
+
+
+def test_pai_e_filhos_que_caem_no_mesmo_ciclo_geram_um_alerta(criar_monitor):
+    filhos = ['c1', 'c2', 'c3', 'c4']
+    monitor = criar_monitor(
+        hosts=['gw'] + filhos, dependencias={filho: 'gw' for filho in filhos}, intervalo_ping=0.2,
+        intervalo_estado=0, deteccao_anomalias=False, diretorio_caixa_saida=None, intervalo_recarregamento=60
+    )
+    caido = threading.Event()
+
+    def verificar_ping(host):
+        if not caido.is_set():
+            return 1.0, "Sucesso"
+        if host == 'gw':
+            time.sleep(0.1)  # A sonda do pai termina depois das sondas dos filhos
+        return None, "Timeout"
+
+    monitor.verificar_ping = verificar_ping
+    monitor.iniciar_monitoramento()
+    alertados = []
+    monitor.notificador.adicionar_notificador('telegram', NotificadorRegistro(alertados))
+    monitor.tipos_notificacao = ['telegram']
+    time.sleep(0.3)
+
+    caido.set()
+    time.sleep(1)
+    monitor.parar_monitoramento()
+    assert set(alertados) == {'gw'}
+    assert all(monitor.hosts[filho].suprimido_por == 'gw' for filho in filhos)
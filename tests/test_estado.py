@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+
+import pytest
+
+from estado import (
+    VERSAO_FORMATO, PontoRestauracao, caminho_arrays, carregar_arrays, carregar_estado, dividir_analises, dividir_historico,
+    gravar_estado, juntar_analises, juntar_historico,
+)
+
+
+def test_estado_em_json(diretorio):
+    gravar_estado('estado.json', {'hosts': {'a': {'status': 'Sucesso'}}})
+    dados = json.loads((diretorio / 'estado.json').read_text(encoding='utf-8'))
+    assert dados['versao_formato'] == VERSAO_FORMATO
+    assert carregar_estado('estado.json')['hosts'] == {'a': {'status': 'Sucesso'}}
+    assert not (diretorio / 'estado.npz').exists()
+
+
+def test_estado_ausente_ilegivel_antigo_ou_de_outra_versao(diretorio):
+    assert carregar_estado('estado.json') is None
+    (diretorio / 'estado.json').write_text('{"incompleto')
+    assert carregar_estado('estado.json') is None
+    (diretorio / 'estado.json').write_text(json.dumps({'versao_formato': VERSAO_FORMATO - 1, 'gravado_em': 0}))
+    assert carregar_estado('estado.json') is None
+    gravar_estado('estado.json', {})
+    assert carregar_estado('estado.json', idade_maxima=3600) is not None
+    dados = json.loads((diretorio / 'estado.json').read_text())
+    dados['gravado_em'] -= 7200
+    (diretorio / 'estado.json').write_text(json.dumps(dados))
+    assert carregar_estado('estado.json', idade_maxima=3600) is None
+
+
+def test_arrays_em_npz(diretorio):
+    np = pytest.importorskip("numpy")
+    analises = {'saltos': ([('a', 1), ('a', 2)], {'rtt': np.array([[1.0, 2.0], [3.0, 4.0]])})}
+    chaves, arrays = dividir_analises(analises)
+    gravar_estado('estado.json', {'analises': chaves}, arrays)
+    estado = carregar_estado('estado.json')
+    restauradas = juntar_analises(estado['analises'], carregar_arrays('estado.json', estado['gravado_em']))
+    assert restauradas['saltos'][0] == [('a', 1), ('a', 2)]
+    assert restauradas['saltos'][1]['rtt'].tolist() == [[1.0, 2.0], [3.0, 4.0]]
+    # Arrays de outra gravação não são misturados ao estado
+    assert carregar_arrays('estado.json', estado['gravado_em'] + 1) == {}
+
+
+def test_arrays_ilegiveis_reiniciam_as_analises(diretorio):
+    np = pytest.importorskip("numpy")
+    assert carregar_arrays('estado.json', 0) == {}
+    (diretorio / 'estado.npz').write_bytes(b'corrompido')
+    assert carregar_arrays('estado.json', 0) == {}
+    # Arrays de objetos exigiriam pickle e são recusados
+    np.savez(caminho_arrays('estado.json'), _gravado_em=np.array(0.0), x=np.array([{}], dtype=object))
+    assert carregar_arrays('estado.json', 0.0) == {}
+
+
+def test_juntar_analises_ignora_tamanhos_diferentes():
+    np = pytest.importorskip("numpy")
+    assert juntar_analises({'detector': ['a', 'b']}, {'detector.media': np.zeros(3)}) == {}
+    assert juntar_analises({'detector': ['a']}, {}) == {}
+
+
+def test_historico_em_colunas():
+    pytest.importorskip("numpy")
+    historicos = {
+        'a': [
+            {'timestamp': '2026-01-01 00:00:00', 'ping': 12.5, 'status': 'Sucesso'},
+            {'timestamp': '2026-01-01 00:00:01', 'ping': None, 'status': 'Falha na conexão'},
+        ],
+        'b': [],
+        'c': [{'timestamp': '2026-01-01 00:00:02', 'ping': 3.0, 'status': 'Sucesso',
+               'min': 1.0, 'max': 5.0, 'jitter': 0.5, 'perda': 20.0}],
+    }
+    hosts, arrays = dividir_historico(historicos)
+    assert hosts == ['a', 'b', 'c']
+    assert all(valores.dtype != object for valores in arrays.values())  # Carregáveis sem pickle
+    assert juntar_historico(hosts, arrays) == historicos
+    # Colunas de tamanhos diferentes não são restauradas
+    arrays['historico.ping'] = arrays['historico.ping'][:1]
+    assert juntar_historico(hosts, arrays) == {}
+    assert juntar_historico(hosts, {}) == {}
+
+
+def test_monitor_restaura_o_ponto_de_restauracao(criar_monitor):
+    np = pytest.importorskip("numpy")
+    from armazenamento import ArmazenamentoColunar
+
+    config = {'hosts': ['a', 'b'], 'deteccao_anomalias': False}
+    origem = criar_monitor(**config)
+    origem.atualizar_configuracoes()
+    origem.adicionar_hosts_configurados()
+    origem.armazenamento = ArmazenamentoColunar(origem.config.janela_armazenamento)
+    origem.armazenamento_saltos = ArmazenamentoColunar(origem.config.janela_armazenamento)
+    origem.hosts['a'].adicionar_resultado(None, "Timeout")
+    origem.hosts['a'].adicionar_resultado(12.0, "Sucesso")
+    origem.hosts['b'].adicionar_resultado(None, "Timeout")
+    origem.armazenamento.registrar('a', 12.0, True)
+    origem.armazenamento_saltos.registrar(('a', 1), 1.0, True)
+    gravar_estado(origem.config.arquivo_estado, *origem.capturar_estado())
+    # O JSON guarda só as estatísticas; o histórico fica no .npz
+    assert 'historico' not in carregar_estado(origem.config.arquivo_estado)['hosts']['a']
+
+    destino = criar_monitor(**config)
+    destino.atualizar_configuracoes()
+    destino.adicionar_hosts_configurados()
+    estado = carregar_estado(destino.config.arquivo_estado)
+    assert sorted(destino.restaurar_estado(estado)) == ['a', 'b']
+    destino.iniciar_analises(estado, ['a', 'b'])
+
+    assert destino.hosts['a'].snapshot == origem.hosts['a'].snapshot
+    assert destino.hosts['b'].ultima_falha == origem.hosts['b'].ultima_falha
+    assert list(destino.hosts['a'].historico) == list(origem.hosts['a'].historico)
+    assert destino.armazenamento.calcular_agregados()['a']['media'] == 12.0
+    assert destino.armazenamento_saltos.calcular_agregados()[('a', 1)]['media'] == 1.0
+
+
+def test_parada_do_ponto_de_restauracao_respeita_o_prazo(diretorio):
+    liberar = threading.Event()
+
+    def capturar():
+        liberar.wait(5)  # Disco lento
+        return {'hosts': {}}, None
+
+    ponto = PontoRestauracao('estado.json', capturar)
+    inicio = time.monotonic()
+    assert ponto.parar(prazo=0.2) is False
+    assert time.monotonic() - inicio < 1
+    liberar.set()
+    assert PontoRestauracao('estado.json', capturar).parar(prazo=5) is True
+    assert carregar_estado('estado.json') is not None
+
+
+def test_ponto_de_restauracao_ignorado_e_informado(diretorio, capsys):
+    assert carregar_estado('estado.json') is None
+    assert capsys.readouterr().out == ''  # Ausente não é informado: é o primeiro início
+
+    (diretorio / 'estado.json').write_text(json.dumps({'versao_formato': VERSAO_FORMATO + 1, 'gravado_em': 0}))
+    assert carregar_estado('estado.json') is None
+    assert f'formato {VERSAO_FORMATO + 1}, esperado' in capsys.readouterr().out
+
+    (diretorio / 'estado.json').write_text(json.dumps({'versao_formato': VERSAO_FORMATO, 'gravado_em': 0}))
+    assert carregar_estado('estado.json', idade_maxima=60) is None
+    assert 'ignorado: gravado há' in capsys.readouterr().out
+
+
+def test_falha_em_andamento_nao_soma_o_tempo_parado(criar_monitor, diretorio):
+    config = {'hosts': ['a'], 'intervalo_ping': 5, 'deteccao_anomalias': False}
+    origem = criar_monitor(**config)
+    origem.atualizar_configuracoes()
+    origem.adicionar_hosts_configurados()
+    origem.hosts['a'].adicionar_resultado(None, "Timeout")
+    gravar_estado(origem.config.arquivo_estado, *origem.capturar_estado())
+    # O monitor ficou parado uma hora, bem mais que um intervalo do host
+    dados = json.loads((diretorio / origem.config.arquivo_estado).read_text(encoding='utf-8'))
+    dados['gravado_em'] -= 3600
+    (diretorio / origem.config.arquivo_estado).write_text(json.dumps(dados), encoding='utf-8')
+
+    destino = criar_monitor(**config)
+    destino.atualizar_configuracoes()
+    destino.adicionar_hosts_configurados()
+    destino.restaurar_estado(carregar_estado(destino.config.arquivo_estado))
+    monitor = destino.hosts['a']
+    assert monitor.ultima_falha is None and monitor.falhas == 1
+    monitor.adicionar_resultado(None, "Timeout")
+    assert monitor.tempo_total_falhas < 1
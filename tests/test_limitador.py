@@ -0,0 +1,54 @@
+import json
+import time
+
+from limitador import BaldeTokens, FilaLimitada, LimitadorTaxa
+
+
+def test_balde_permite_rajada_e_recarrega():
+    balde = BaldeTokens(capacidade=2, taxa=1, agora=0)
+    assert balde.consumir(0) and balde.consumir(0)
+    assert not balde.consumir(0)
+    assert balde.tempo_restante(0.5) == 0.5
+    assert balde.consumir(1.5)
+    # A recarga não passa da capacidade
+    assert balde.disponivel(100) and balde.tokens == 2
+
+
+def test_limitador_separa_chaves():
+    limitador = LimitadorTaxa(capacidade=1, taxa=1 / 60)
+    assert limitador.consumir(("a", "email"))
+    assert not limitador.disponivel(("a", "email"))
+    assert 59 < limitador.tempo_restante(("a", "email")) <= 60
+    assert limitador.disponivel(("b", "email"))
+    assert limitador.tempo_restante(("b", "email")) == 0
+
+
+def test_limitador_descarta_balde_mais_antigo():
+    limitador = LimitadorTaxa(capacidade=1, taxa=1 / 60, max_baldes=2)
+    for chave in ("a", "b", "c"):
+        limitador.consumir(chave)
+    assert list(limitador.baldes) == ["b", "c"]
+    # Um balde descartado equivale a um balde cheio
+    assert limitador.disponivel("a")
+
+
+def test_exportar_e_restaurar_em_outro_limitador():
+    origem = LimitadorTaxa(capacidade=1, taxa=1 / 60)
+    origem.consumir(("a", "email"))
+    estado = json.loads(json.dumps(origem.exportar()))  # Como no ponto de restauração
+    [[chave, _, atualizado]] = estado
+    assert chave == ["a", "email"]
+    assert abs(atualizado - time.time()) < 1  # Relógio de parede, não monotônico
+
+    destino = LimitadorTaxa(capacidade=1, taxa=1 / 60)
+    destino.restaurar(estado)
+    assert not destino.disponivel(("a", "email"))
+    assert 59 < destino.tempo_restante(("a", "email")) <= 60
+
+
+def test_fila_limitada_conta_descartes():
+    fila = FilaLimitada(2)
+    assert fila.colocar(1) and fila.colocar(2)
+    assert not fila.colocar(3)
+    assert fila.descartados == 1
+    assert [fila.get_nowait(), fila.get_nowait()] == [1, 2]
@@ -0,0 +1,34 @@
+
+def _sem_sondas(monitor):
+    """Substitui o thread de sondas por uma espera até o host sair ou o monitor parar"""
+    def monitor_thread(host):
+        while monitor.running and host in monitor.hosts:
+            monitor.evento_parada.wait(0.01)
+    monitor.monitor_thread = monitor_thread
+
+
+def test_hosts_acima_do_limite_aguardam_e_sao_iniciados_ao_liberar_vaga(criar_monitor):
+    monitor = criar_monitor(max_hosts=2, intervalo_estado=0, diretorio_caixa_saida=None,
+                            deteccao_anomalias=False)
+    _sem_sondas(monitor)
+    monitor.atualizar_configuracoes()
+    monitor.adicionar_host(['a', 'b', 'c', 'd'])
+    monitor.running = True
+    with monitor.lock:
+        for host in list(monitor.hosts):
+            monitor.iniciar_thread(host)
+
+    assert set(monitor.threads) == {'a', 'b'}
+    assert list(monitor.aguardando_vaga) == ['c', 'd']
+
+    monitor.remover_host('a')
+    assert set(monitor.threads) == {'b', 'c'}
+    assert list(monitor.aguardando_vaga) == ['d']
+
+    # Um host removido enquanto aguardava não ocupa a vaga
+    monitor.remover_host('d')
+    monitor.remover_host('b')
+    assert set(monitor.threads) == {'c'}
+    assert not monitor.aguardando_vaga
+    monitor.running = False
+    monitor.evento_parada.set()
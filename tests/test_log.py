@@ -0,0 +1,72 @@
+from log import GerenciadorLog
+
+
+def linhas(diretorio):
+    return [linha for arquivo in sorted((diretorio / 'logs').iterdir())
+            for linha in arquivo.read_text(encoding='utf-8').splitlines()]
+
+
+def entrada(host, ping=1.0):
+    return {'timestamp': '2024-01-01 00:00:00', 'host': host, 'ping': ping, 'status': 'Sucesso'}
+
+
+def test_parar_todas_grava_as_filas(diretorio):
+    GerenciadorLog.get_instance('a').registrar_log(entrada('a'))
+    GerenciadorLog.get_instance().registrar_log({
+        'timestamp': '2024-01-01 00:00:00', 'tipo': 'servico', 'evento': 'iniciado', 'detalhes': {'pid': 1}
+    })
+    assert GerenciadorLog.parar_todas(1) == (0, 0)
+    assert sorted(linhas(diretorio)) == [
+        '[2024-01-01 00:00:00] Host: a - Ping: 1.0ms - Status: Sucesso',
+        '[2024-01-01 00:00:00] Serviço iniciado: pid=1',
+    ]
+
+
+def test_entrada_apos_parada_e_recusada_e_contada(diretorio, capsys):
+    log = GerenciadorLog.get_instance('a')
+    log.parar(1)
+    assert log.registrar_log(entrada('a')) is False
+    assert log.registrar_log(entrada('a')) is False
+    assert log.descartados == 2
+    assert capsys.readouterr().err.count('já encerrado') == 1  # Avisado uma única vez
+
+
+def test_instancia_apos_parar_todas_nao_inicia_escrita(diretorio):
+    GerenciadorLog.parar_todas(1)
+    tardia = GerenciadorLog.get_instance('tardio')
+    assert tardia.log_thread is None
+    assert tardia.registrar_log(entrada('tardio')) is False
+    assert 'tardio' not in GerenciadorLog._instances
+    assert not (diretorio / 'logs').exists()
+
+    GerenciadorLog.reabrir()
+    assert GerenciadorLog.get_instance('tardio').registrar_log(entrada('tardio'))
+    GerenciadorLog.parar_todas(1)
+    assert len(linhas(diretorio)) == 1
+
+
+def test_descartes_apos_parar_todas_sao_contados(diretorio, capsys, monkeypatch):
+    original = GerenciadorLog.aguardar_fim
+
+    def aguardar_fim(self, prazo=5):
+        # Um thread de monitoramento ainda registra enquanto os logs são gravados
+        GerenciadorLog.get_instance('tardio').registrar_log(entrada('tardio'))
+        return original(self, prazo)
+
+    monkeypatch.setattr(GerenciadorLog, 'aguardar_fim', aguardar_fim)
+    GerenciadorLog.get_instance('a')
+    assert GerenciadorLog.parar_todas(1) == (1, 0)
+    tardia = GerenciadorLog.get_instance('tardio')
+    assert GerenciadorLog.get_instance('tardio') is tardia
+    tardia.registrar_log(entrada('tardio'))
+    assert capsys.readouterr().err.count('já encerrado') == 1
+    assert GerenciadorLog.parar_todas(1) == (2, 0)
+
+
+def test_fila_cheia_descarta(diretorio, monkeypatch):
+    monkeypatch.setattr(GerenciadorLog, 'TAMANHO_MAXIMO_FILA', 1)
+    log = GerenciadorLog('a', iniciar=False)
+    log.running = True  # Sem thread de escrita, a fila não esvazia
+    assert log.registrar_log(entrada('a'))
+    assert not log.registrar_log(entrada('a'))
+    assert log.descartados == 1
@@ -0,0 +1,171 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from notificação import (
+    GerenciadorNotificacoes, NotificadorEmail, NotificadorTelegram, configurar_notificacoes, criar_notificador,
+    notificadores_alterados, tipos_ativos,
+)
+
+
+def test_tipos_ativos_ignora_tipos_sem_plugin():
+    assert tipos_ativos({'tipos_notificacao': ['email', 'pombo', 'telegram']}) == ['email', 'telegram']
+    assert tipos_ativos({}) == ['desktop']
+
+
+def test_criar_notificador():
+    config = {'email_remetente': 'a@x', 'senha_remetente': 's', 'email_destinatario': 'b@x',
+              'rajada_notificacao': 3}
+    notificador = criar_notificador('email', config)
+    assert isinstance(notificador, NotificadorEmail)
+    assert notificador.email_destinatario == 'b@x'
+    assert notificador.limitador.capacidade == 3
+    with pytest.raises(ValueError):
+        criar_notificador('pombo', config)
+
+
+def test_configurar_notificacoes_cria_apenas_os_ativos():
+    gerenciador = configurar_notificacoes({'tipos_notificacao': ['telegram'], 'token_bot_telegram': 't'})
+    assert list(gerenciador.notificadores) == ['telegram']
+    assert isinstance(gerenciador.notificadores['telegram'], NotificadorTelegram)
+
+
+def test_notificadores_alterados():
+    antigas = {'tipos_notificacao': ['email', 'telegram'], 'token_bot_telegram': 't1', 'email_remetente': 'a@x'}
+    # Credenciais de outro canal ou chaves sem relação não recriam o notificador
+    assert notificadores_alterados(antigas, dict(antigas, intervalo_ping=5)) == set()
+    assert notificadores_alterados(antigas, dict(antigas, token_bot_telegram='t2')) == {'telegram'}
+    assert notificadores_alterados(antigas, dict(antigas, tipos_notificacao=['email', 'telegram', 'desktop'])) == {'desktop'}
+    assert notificadores_alterados(antigas, dict(antigas, rajada_notificacao=2)) == {'email', 'telegram'}
+
+
+def test_bibliotecas_dos_canais_sao_carregadas_sob_demanda():
+    src = os.path.join(os.path.dirname(__file__), os.pardir, 'src')
+    codigo = (
+        "import sys, main, notificação\n"
+        "notificação.configurar_notificacoes({'tipos_notificacao': ['email', 'telegram', 'sms', 'desktop']})\n"
+        "print([m for m in ('requests', 'twilio', 'plyer', 'smtplib') if m in sys.modules])"
+    )
+    saida = subprocess.run([sys.executable, '-c', codigo], cwd=src, capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == '[]'
+
+
+class NotificadorLento(NotificadorTelegram):
+    """Telegram cujo envio só termina quando o teste libera"""
+    def __init__(self):
+        super().__init__('token', 'chat')
+        self.enviando = threading.Event()
+        self.liberar = threading.Event()
+
+    def enviar_notificacao(self, mensagem):
+        self.enviando.set()
+        self.liberar.wait(5)
+        return True
+
+
+@pytest.fixture
+def monitor_lento(criar_monitor):
+    monitor = criar_monitor(hosts=['a'])
+    monitor.atualizar_configuracoes()
+    monitor.adicionar_hosts_configurados()
+    notificador = NotificadorLento()
+    monitor.notificador.adicionar_notificador('telegram', notificador)
+    monitor.tipos_notificacao = ['telegram']
+    yield monitor, notificador
+    monitor.running = False
+    monitor.evento_parada.set()
+    notificador.liberar.set()
+    monitor.notificador.parar_envios(5)
+
+
+def _lock_livre_durante_envio(monitor, notificador, alvo):
+    thread = threading.Thread(target=alvo, daemon=True)
+    thread.start()
+    assert notificador.enviando.wait(5)
+    assert monitor.lock.acquire(timeout=1), "o envio não deve segurar o lock do monitor"
+    monitor.lock.release()
+    notificador.liberar.set()
+    thread.join(5)
+
+
+def test_alerta_de_falha_enviado_fora_do_lock(monitor_lento):
+    monitor, notificador = monitor_lento
+    monitor.running = True
+
+    def verificar_ping(host):
+        monitor.running = False  # Um único ciclo
+        return None, "Timeout"
+
+    monitor.verificar_ping = verificar_ping
+    _lock_livre_durante_envio(monitor, notificador, lambda: monitor.monitor_thread('a'))
+
+
+def test_sonda_nao_aguarda_o_envio_do_alerta(monitor_lento):
+    monitor, notificador = monitor_lento
+    monitor.notificador.iniciar_envios()
+    monitor.running = True
+
+    def verificar_ping(host):
+        monitor.running = False  # Um único ciclo
+        return None, "Timeout"
+
+    monitor.verificar_ping = verificar_ping
+    thread = threading.Thread(target=monitor.monitor_thread, args=('a',), daemon=True)
+    thread.start()
+    assert notificador.enviando.wait(5)
+    # O thread de monitoramento termina enquanto o thread de envio ainda aguarda o canal
+    thread.join(5)
+    assert not thread.is_alive()
+    notificador.liberar.set()
+    assert monitor.notificador.parar_envios(5) == 0
+
+
+def test_alerta_de_latencia_enviado_fora_do_lock(monitor_lento):
+    monitor, notificador = monitor_lento
+    monitor.detector = SimpleNamespace(avaliar=lambda: ([('a', 200.0, 10.0, 1.0)], []))
+    _lock_livre_durante_envio(monitor, notificador, monitor.avaliar_anomalias)
+
+
+def test_envios_paralelos_nao_misturam_o_host(diretorio):
+    gerenciador = GerenciadorNotificacoes()
+    hosts = []
+
+    class NotificadorRegistro(NotificadorTelegram):
+        def enviar_notificacao(self, mensagem):
+            time.sleep(0.01)  # Troca de thread no meio do envio
+            hosts.append((self.host, mensagem))
+            return True
+
+    gerenciador.adicionar_notificador('telegram', NotificadorRegistro('token', 'chat'))
+    threads = [
+        threading.Thread(target=gerenciador.enviar_notificacao, args=(host,), kwargs={'host': host})
+        for host in ('a', 'b', 'c', 'd')
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(hosts) == [('a', 'a'), ('b', 'b'), ('c', 'c'), ('d', 'd')]
+
+
+def test_tentativa_que_falha_consome_o_token(diretorio):
+    gerenciador = GerenciadorNotificacoes()
+    tentativas = []
+
+    class NotificadorForaDoAr(NotificadorTelegram):
+        def enviar_notificacao(self, mensagem):
+            tentativas.append(self.host)
+            self.registrar_erro('telegram', 'servidor indisponível')
+            return False
+
+    gerenciador.adicionar_notificador('telegram', NotificadorForaDoAr('token', 'chat'))
+    for _ in range(5):
+        gerenciador.enviar_notificacao('alerta', host='a')
+    gerenciador.enviar_notificacao('alerta', host='b')
+    # Com o provedor fora do ar, cada host tenta uma vez por intervalo, não a cada ciclo
+    assert tentativas == ['a', 'b']
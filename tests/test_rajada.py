@@ -0,0 +1,52 @@
+from sondas import agregar_rajada, extrair_tempos
+
+
+def test_agregar_rajada():
+    rajada = agregar_rajada([10.0, 14.0, 12.0], 4)
+    assert rajada['ping'] == 12.0
+    assert rajada['min'] == 10.0 and rajada['max'] == 14.0
+    assert rajada['jitter'] == 3.0  # (|14-10| + |12-14|) / 2
+    assert rajada['perda'] == 25.0
+    assert rajada['enviados'] == 4 and rajada['recebidos'] == 3
+    assert rajada['status'] == "Sucesso"
+
+
+def test_agregar_rajada_sem_respostas():
+    rajada = agregar_rajada([], 5, "Falha na conexão")
+    assert rajada['ping'] is None and rajada['jitter'] is None
+    assert rajada['perda'] == 100.0
+    assert rajada['status'] == "Falha na conexão"
+
+
+def test_agregar_rajada_uma_resposta_tem_jitter_zero():
+    assert agregar_rajada([5.0], 1)['jitter'] == 0.0
+
+
+def test_limiar_de_perda_marca_rajada_como_falha():
+    assert agregar_rajada([10.0], 10, limiar_perda=50)['status'] == "Perda elevada"
+    assert agregar_rajada([10.0] * 5, 10, limiar_perda=50)['status'] == "Perda elevada"
+    assert agregar_rajada([10.0] * 6, 10, limiar_perda=50)['status'] == "Sucesso"
+    # Sem limiar, qualquer resposta conta como sucesso
+    assert agregar_rajada([10.0], 10)['status'] == "Sucesso"
+
+
+def test_extrair_tempos_do_windows_com_resposta_abaixo_de_1ms():
+    saida = (
+        "Disparando 192.168.0.1 com 32 bytes de dados:\r\n"
+        "Resposta de 192.168.0.1: bytes=32 tempo<1ms TTL=64\r\n"
+        "Resposta de 192.168.0.1: bytes=32 tempo=2ms TTL=64\r\n"
+        "Esgotado o tempo limite do pedido.\r\n"
+        "Reply from 192.168.0.1: bytes=32 time<1ms TTL=64\r\n"
+    )
+    assert extrair_tempos(saida) == [1.0, 2.0, 1.0]
+    # Uma rajada de LAN saudável não é contada como perda
+    assert agregar_rajada(extrair_tempos(saida), 4, limiar_perda=50)['status'] == "Sucesso"
+
+
+def test_extrair_tempos_do_linux():
+    saida = (
+        "64 bytes from 10.0.0.1: icmp_seq=1 ttl=64 time=0.045 ms\n"
+        "64 bytes from 10.0.0.1: icmp_seq=2 ttl=64 time=12.3 ms\n"
+        "2 packets transmitted, 2 received, 0% packet loss, time 1001ms\n"
+    )
+    assert extrair_tempos(saida) == [0.045, 12.3]
@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+
+from recarregamento import ObservadorArquivo, calcular_diferencas, normalizar_hosts
+
+
+def test_normalizar_hosts_aceita_texto_e_dicionario():
+    hosts = normalizar_hosts(['8.8.8.8', {'host': '1.1.1.1', 'intervalo_ping': 5}, {'sem_host': True}, 42])
+    assert hosts == {'8.8.8.8': {}, '1.1.1.1': {'intervalo_ping': 5}}
+
+
+def test_normalizar_hosts_vazio():
+    assert normalizar_hosts(None) == {}
+
+
+def test_calcular_diferencas():
+    antigas = {'hosts': ['a', 'b', {'host': 'c', 'intervalo_ping': 1}]}
+    novas = {'hosts': ['a', {'host': 'c', 'intervalo_ping': 2}, 'd']}
+    diferencas = calcular_diferencas(antigas, novas)
+    assert diferencas['adicionados'] == ['d']
+    assert diferencas['removidos'] == ['b']
+    assert diferencas['alterados'] == ['c']
+    assert diferencas['opcoes']['c'] == {'intervalo_ping': 2}
+
+
+def test_observador_chama_callback_quando_arquivo_muda(tmp_path):
+    arquivo = tmp_path / 'config.json'
+    arquivo.write_text('{}')
+    chamado = threading.Event()
+    observador = ObservadorArquivo(str(arquivo), chamado.set, intervalo=0.01)
+    observador.iniciar()
+    try:
+        arquivo.write_text('{"hosts": ["8.8.8.8"]}')
+        assert chamado.wait(2)
+    finally:
+        observador.parar()
+
+
+CONFIG_MONITOR = {'intervalo_estado': 0, 'deteccao_anomalias': False, 'diretorio_caixa_saida': None,
+                  'intervalo_recarregamento': 60}
+
+
+def aguardar(condicao, prazo=5):
+    fim = time.monotonic() + prazo
+    while not condicao():
+        assert time.monotonic() < fim, "condição não atingida no prazo"
+        time.sleep(0.01)
+
+
+def test_intervalo_reduzido_vale_para_a_espera_em_andamento(criar_monitor, diretorio):
+    config = dict(CONFIG_MONITOR, hosts=[{'host': 'a', 'intervalo_ping': 60}])
+    monitor = criar_monitor(**config)
+    sondas = []
+    monitor.verificar_ping = lambda host: sondas.append(host) or (1.0, "Sucesso")
+    monitor.iniciar_monitoramento()
+    aguardar(lambda: len(sondas) == 1)
+
+    config['hosts'] = [{'host': 'a', 'intervalo_ping': 0.05}]
+    (diretorio / 'config.json').write_text(json.dumps(dict(config, tipos_notificacao=[])))
+    monitor.recarregar_configuracoes()
+    # Sem acordar o host, a próxima sonda só ocorreria ao fim dos 60s
+    aguardar(lambda: len(sondas) >= 3)
+
+
+def test_notificadores_trocados_sob_o_lock(criar_monitor, diretorio):
+    config = dict(CONFIG_MONITOR, tipos_notificacao=['telegram'], token_bot_telegram='t1', chat_id_telegram='c')
+    monitor = criar_monitor(**config)
+    monitor.atualizar_configuracoes()
+    anteriores = monitor.notificador.notificadores
+    (diretorio / 'config.json').write_text(json.dumps(dict(config, tipos_notificacao=['desktop'])))
+
+    with monitor.lock:
+        thread = threading.Thread(target=monitor.recarregar_configuracoes)
+        thread.start()
+        time.sleep(0.1)
+        assert monitor.notificador.notificadores is anteriores
+    thread.join(5)
+    assert list(monitor.notificador.notificadores) == ['desktop']
+    # O dicionário anterior não é alterado: quem o percorria continua com uma visão consistente
+    assert list(anteriores) == ['telegram']
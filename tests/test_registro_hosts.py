@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+from registro_hosts import RegistroHosts
+
+
+@pytest.fixture
+def registro(tmp_path):
+    return RegistroHosts(str(tmp_path / 'registro.json'), max_recentes=3, atraso_gravacao=60)
+
+
+def test_adicionar_e_remover_atualiza_grupos(registro):
+    assert registro.adicionar('10.0.0.1', 'roteador', ['core', 'sp'])
+    assert not registro.adicionar('10.0.0.1')
+    assert registro.obter_rotulo('10.0.0.1') == 'roteador'
+    assert registro.hosts_do_grupo('core') == ['10.0.0.1']
+
+    registro.remover('10.0.0.1')
+    assert '10.0.0.1' not in registro
+    assert registro.hosts_do_grupo('core') == []
+    assert 'core' not in registro.grupos
+
+
+def test_recentes_limitados_e_mais_recente_primeiro(registro):
+    for host in ['a', 'b', 'c', 'd', 'b']:
+        registro.marcar_recente(host)
+    assert registro.listar_recentes() == ['b', 'd', 'c']
+
+
+def test_expandir_cidr(registro):
+    assert registro.expandir_alvo('192.168.0.0/30') == ['192.168.0.1', '192.168.0.2']
+    assert registro.expandir_alvo('10.0.0.5/32') == ['10.0.0.5']
+    assert registro.expandir_alvo('https://exemplo.com/a/b') == ['https://exemplo.com/a/b']
+    registro.max_expansao = 16
+    with pytest.raises(ValueError):
+        registro.expandir_alvo('10.0.0.0/24')
+
+
+def test_importar_arquivo_usa_rotulo_padrao_nas_linhas_sem_rotulo(registro, tmp_path):
+    arquivo = tmp_path / 'hosts.txt'
+    arquivo.write_text(
+        "# comentário\n"
+        "\n"
+        "8.8.8.8,dns google,dns;externo\n"
+        "1.1.1.1\n"
+        "10.0.0.0/31,,lab\n",
+        encoding='utf-8'
+    )
+    importados = registro.importar_arquivo(str(arquivo), 'padrão', ['importados'])
+    assert importados == ['8.8.8.8', '1.1.1.1', '10.0.0.0', '10.0.0.1']
+    assert registro.obter_rotulo('8.8.8.8') == 'dns google'
+    assert registro.obter_rotulo('1.1.1.1') == 'padrão'
+    assert registro.obter_rotulo('10.0.0.1') == 'padrão'
+    assert registro.hosts_do_grupo('dns') == ['8.8.8.8']
+    assert registro.hosts_do_grupo('lab') == ['10.0.0.0', '10.0.0.1']
+    assert len(registro.hosts_do_grupo('importados')) == 4
+
+
+def test_gravar_e_carregar(registro):
+    registro.adicionar('8.8.8.8', 'dns', ['externo'])
+    registro.marcar_recente('8.8.8.8')
+    registro.gravar()
+
+    carregado = RegistroHosts(registro.arquivo)
+    assert carregado.obter_rotulo('8.8.8.8') == 'dns'
+    assert carregado.hosts_do_grupo('externo') == ['8.8.8.8']
+    assert carregado.listar_recentes() == ['8.8.8.8']
+
+
+def test_carregar_formato_antigo(tmp_path):
+    arquivo = tmp_path / 'historico.json'
+    arquivo.write_text(json.dumps(['a', 'b']))
+    assert RegistroHosts(str(arquivo)).listar_recentes() == ['a', 'b']
+
+
+def test_gravar_pendentes_grava_apenas_se_agendado(registro):
+    registro.gravar_pendentes()
+    assert not os.path.exists(registro.arquivo)
+
+    registro.adicionar('8.8.8.8')  # Agenda a gravação para daqui a 60s
+    registro.gravar_pendentes()
+    with open(registro.arquivo, encoding='utf-8') as f:
+        assert '8.8.8.8' in json.load(f)['hosts']
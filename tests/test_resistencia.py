@@ -0,0 +1,37 @@
+import os
+from types import SimpleNamespace
+
+from log import GerenciadorLog
+from main import MonitorHost
+
+
+def test_historico_do_host_e_limitado():
+    monitor = MonitorHost("host1", tamanho_historico=5)
+    for i in range(20):
+        monitor.adicionar_resultado(float(i), "Sucesso")
+    assert [registro['ping'] for registro in monitor.historico] == [15.0, 16.0, 17.0, 18.0, 19.0]
+    # Os agregados continuam cobrindo todos os resultados
+    assert monitor.snapshot['média_ping'] == 9.5
+    assert monitor.snapshot['min_ping'] == 0.0 and monitor.snapshot['max_ping'] == 19.0
+
+
+def test_remover_host_libera_recursos(criar_monitor):
+    monitor = criar_monitor()
+    monitor.adicionar_host(["host1"])
+    GerenciadorLog.get_instance("host1")
+    monitor.remover_host("host1")
+    assert "host1" not in monitor.hosts
+    assert "host1" not in GerenciadorLog._instances
+
+
+def test_teste_de_resistencia_restaura_o_diretorio(diretorio):
+    import teste_resistencia
+
+    args = SimpleNamespace(
+        hosts=20, duracao=0.3, aquecimento=0.1, amostragem=0.1, intervalo=0.01, taxa_falhas=0.1,
+        tamanho_historico=5, renovacao=2, top=0, quadros=1, limite_rss=50, limite_tracemalloc=20,
+        limite_threads=20, limite_filas=50000,
+    )
+    assert teste_resistencia.executar(args)
+    assert os.getcwd() == str(diretorio)
+    assert os.listdir(diretorio) == []  # Config e logs ficaram no diretório temporário removido
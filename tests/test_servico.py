@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+from main import analisar_argumentos, executar_servico
+
+MAIN = os.path.join(os.path.dirname(__file__), os.pardir, 'src', 'main.py')
+
+
+def test_argumentos_do_modo_servico():
+    args = analisar_argumentos(['--servico', '--config', 'outro.json', '--host', 'a', '--host', 'tcp://b:80'])
+    assert args.servico and args.config == 'outro.json' and args.hosts == ['a', 'tcp://b:80']
+    assert not analisar_argumentos([]).servico
+
+
+def test_configuracao_ausente_e_erro(diretorio, capsys):
+    assert executar_servico('ausente.json', ['127.0.0.1']) == 1
+    assert 'ausente.json não encontrado' in capsys.readouterr().err
+    assert not (diretorio / 'ausente.json').exists()
+
+
+def test_processo_sem_configuracao_nao_cria_padrao(diretorio):
+    resultado = subprocess.run(
+        [sys.executable, MAIN, '--host', '127.0.0.1', '--config', 'ausente.json'],
+        capture_output=True, text=True, timeout=30
+    )
+    assert resultado.returncode == 1
+    assert os.listdir(diretorio) == []
+
+
+def test_processo_sem_hosts_retorna_2(diretorio):
+    (diretorio / 'config.json').write_text(json.dumps({'modo_servico': True, 'tipos_notificacao': []}))
+    resultado = subprocess.run([sys.executable, MAIN], capture_output=True, text=True, timeout=30)
+    assert resultado.returncode == 2
+    assert 'Nenhum host configurado' in resultado.stderr
@@ -0,0 +1,152 @@
+import socket
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import sondas
+from sondas import MotorSondas, interpretar_alvo
+
+
+@pytest.fixture
+def motor():
+    motor = MotorSondas(timeout=1)
+    motor.iniciar()
+    yield motor
+    motor.parar()
+
+
+@pytest.fixture
+def porta_fechada():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _iniciar_thread(alvo):
+    thread = threading.Thread(target=alvo, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def servidor_tcp():
+    """Servidor que aceita conexões e as fecha em seguida, sem responder"""
+    servidor = socket.create_server(('127.0.0.1', 0))
+    parar = threading.Event()
+
+    def aceitar():
+        servidor.settimeout(0.05)
+        while not parar.is_set():
+            try:
+                conexao, _ = servidor.accept()
+                conexao.close()
+            except OSError:
+                continue
+
+    _iniciar_thread(aceitar)
+    yield servidor.getsockname()[1]
+    parar.set()
+    servidor.close()
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(404 if self.path == '/ausente' else 200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor_http():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Manipulador)
+    _iniciar_thread(servidor.serve_forever)
+    yield servidor.server_address[1]
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def servidor_udp():
+    """Servidor de eco UDP"""
+    servidor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    servidor.bind(('127.0.0.1', 0))
+    servidor.settimeout(0.05)
+    parar = threading.Event()
+
+    def ecoar():
+        while not parar.is_set():
+            try:
+                dados, origem = servidor.recvfrom(1024)
+                servidor.sendto(dados, origem)
+            except OSError:
+                continue
+
+    _iniciar_thread(ecoar)
+    yield servidor.getsockname()[1]
+    parar.set()
+    servidor.close()
+
+
+def test_interpretar_alvo():
+    assert interpretar_alvo('8.8.8.8') == {'tipo': 'icmp', 'host': '8.8.8.8', 'porta': None, 'caminho': None}
+    assert interpretar_alvo('tcp://exemplo.com:443')['porta'] == 443
+    assert interpretar_alvo('https://exemplo.com') == {
+        'tipo': 'https', 'host': 'exemplo.com', 'porta': 443, 'caminho': '/'
+    }
+    assert interpretar_alvo('http://exemplo.com:8080/saude?x=1') == {
+        'tipo': 'http', 'host': 'exemplo.com', 'porta': 8080, 'caminho': '/saude?x=1'
+    }
+    with pytest.raises(ValueError):
+        interpretar_alvo('udp://exemplo.com')
+    with pytest.raises(ValueError):
+        interpretar_alvo('ftp://exemplo.com')
+
+
+def test_sonda_tcp(motor, servidor_tcp, porta_fechada):
+    ms, status = motor.sondar(f'tcp://127.0.0.1:{servidor_tcp}')
+    assert status == "Sucesso" and ms >= 0
+    assert motor.sondar(f'tcp://127.0.0.1:{porta_fechada}') == (None, "Falha na conexão")
+
+
+def test_sonda_http(motor, servidor_http):
+    ms, status = motor.sondar(f'http://127.0.0.1:{servidor_http}/saude')
+    assert status == "Sucesso" and ms >= 0
+    assert motor.sondar(f'http://127.0.0.1:{servidor_http}/ausente')[1] == "HTTP 404"
+
+
+def test_sonda_udp(motor, servidor_udp, porta_fechada):
+    ms, status = motor.sondar(f'udp://127.0.0.1:{servidor_udp}')
+    assert status == "Sucesso" and ms >= 0
+    ms, status = motor.sondar(f'udp://127.0.0.1:{porta_fechada}')
+    assert ms is None and status != "Sucesso"
+
+
+def test_sonda_https_fecha_socket_quando_tls_falha(motor, servidor_tcp, monkeypatch):
+    sockets = []
+    conectar = motor._conectar
+
+    async def registrar_socket(host, porta):
+        sock = await conectar(host, porta)
+        sockets.append(sock)
+        return sock
+
+    def contexto_invalido():
+        raise ssl.SSLError("certificados indisponíveis")
+
+    monkeypatch.setattr(motor, '_conectar', registrar_socket)
+    monkeypatch.setattr(sondas.ssl, 'create_default_context', contexto_invalido)
+    ms, status = motor.sondar(f'https://127.0.0.1:{servidor_tcp}/')
+    assert ms is None and status.startswith("Erro")
+    assert sockets and sockets[0].fileno() == -1
+
+    # Servidor que fecha a conexão durante o handshake
+    monkeypatch.undo()
+    monkeypatch.setattr(motor, '_conectar', registrar_socket)
+    ms, status = motor.sondar(f'https://127.0.0.1:{servidor_tcp}/')
+    assert ms is None and status != "Sucesso"
+    assert sockets[1].fileno() == -1